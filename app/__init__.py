@@ -1,3 +1,6 @@
 # app/__init__.py
 
-# This file is intentionally left blank.
\ No newline at end of file
+import time
+
+# Moment the application package started importing, the start of startup timings.
+IMPORT_STARTED = time.perf_counter()
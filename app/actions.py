@@ -1,10 +1,26 @@
 import typing
 from functools import wraps
-from typing import Optional
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
 
+from beanie import PydanticObjectId
+
+from app.cache import product_cache, stats_cache
+from app.config import get_settings
 from app.documents import Product
-from app.exceptions import InternalServerError
+from app.exceptions import (
+    APIException,
+    InternalServerError,
+    InvalidCursor,
+    ProductNotFound,
+)
 from app.models import Category
+from app.models import Product as ProductModel
+from app.pagination import decode_cursor, encode_cursor
+from app.repository import SORT_KEYS, ProductQuery, get_repository
+from app.timing import timed
+
+# Retrieve application settings which include pagination limits.
+SETTINGS = get_settings()
 
 
 # Wrapper function to run action and rais InternalServerError if it fails
@@ -13,8 +29,12 @@ def run_action(action):
     @wraps(action)
     async def wrapper(*args, **kwargs):
         try:
-            # Call the wrapped function with provided arguments.
-            return await action(*args, **kwargs)
+            # Call the wrapped function, reporting its time in the Server-Timing header.
+            with timed("action"):
+                return await action(*args, **kwargs)
+        except APIException:
+            # Let errors that already carry an HTTP status code pass through.
+            raise
         except Exception as e:
             # Convert APIException into HTTPException with corresponding code and message.
             raise InternalServerError(str(e))
@@ -22,11 +42,359 @@ def run_action(action):
     return wrapper
 
 
-# List all products
+def _invalidate_products(product_ids: Sequence[PydanticObjectId]) -> None:
+    """Drop cached data made stale by a write to the given products.
+
+    Args:
+        product_ids (Sequence[PydanticObjectId]): The IDs of the written products.
+    """
+    for product_id in product_ids:
+        product_cache.invalidate(product_id)
+    # Any write can change the collection statistics.
+    stats_cache.clear()
+
+
+def _validate_documents(documents: Iterable[dict[str, Any]]) -> None:
+    """Validate raw product documents when lean read validation is enabled.
+
+    Lean reads trust the database, so this check is meant for debugging only. The
+    fields are checked against the plain product model rather than the Beanie
+    document, which cannot be built before MongoDB is initialized, so the check
+    works with every storage backend.
+
+    Args:
+        documents (Iterable[dict[str, Any]]): The whole documents read from storage.
+
+    Raises:
+        ValidationError: If a document is not a valid product.
+    """
+    if SETTINGS.lean_reads_validate:
+        for document in documents:
+            ProductModel.model_validate(document)
+
+
+def _list_query(
+    cursor: Optional[str],
+    sort: str,
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+) -> ProductQuery:
+    """Build the query selecting one page of products.
+
+    Pages are addressed by the sort value and ID of the last product of the previous
+    page, and the ID breaks ties between equal sort values, so every page is read
+    from the position where the previous one stopped.
+
+    Args:
+        cursor (Optional[str]): The token returned with the previous page, if any.
+        sort (str): The sort key, prefixed with '-' for descending order.
+        category (Optional[str]): Only list products in this category.
+        min_price (Optional[float]): Only list products at or above this price.
+        max_price (Optional[float]): Only list products at or below this price.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded or belongs to another sort order.
+
+    Returns:
+        ProductQuery: The selection, sort order and position of the page.
+    """
+    key = sort.removeprefix("-")
+    query = ProductQuery(
+        sort=key,
+        descending=sort.startswith("-"),
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+    )
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            if position.get("sort", "id") != sort:
+                raise ValueError("Cursor belongs to another sort order")
+            last_id = PydanticObjectId(position["id"])
+            query.after = (last_id if key == "id" else position["value"], last_id)
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+
+    return query
+
+
+def _next_cursor(last_id: Any, last_value: Any, sort: str) -> str:
+    """Encode the position of the last product of a page.
+
+    Args:
+        last_id (Any): The ID of the last product on the page.
+        last_value (Any): The sort value of the last product on the page.
+        sort (str): The sort order of the listing.
+
+    Returns:
+        str: The token for the next page.
+    """
+    if sort == "id":
+        return encode_cursor({"id": str(last_id)})
+    if sort == "-id":
+        # The ID is the sort value, so it is not stored twice.
+        return encode_cursor({"id": str(last_id), "sort": sort})
+    return encode_cursor({"id": str(last_id), "sort": sort, "value": last_value})
+
+
+def _page_size(limit: Optional[int]) -> int:
+    """Apply the default and the server-side cap to a requested page size."""
+    return min(limit or SETTINGS.page_size, SETTINGS.max_page_size)
+
+
+# List one page of products
+@run_action
+async def get_all_products(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> tuple[list[Product], Optional[str]]:
+    """List one page of products, optionally filtered and sorted.
+
+    Pages are addressed by the position of the last product of the previous page, so
+    every page costs the same regardless of how deep it is.
+
+    Args:
+        limit (Optional[int]): The requested page size, capped at the configured maximum.
+        cursor (Optional[str]): The token returned with the previous page, if any.
+        sort (str): The sort key (id, price or name), prefixed with '-' for descending order.
+        category (Optional[str]): Only list products in this category.
+        min_price (Optional[float]): Only list products at or above this price.
+        max_price (Optional[float]): Only list products at or below this price.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+
+    Returns:
+        tuple[list[Product], Optional[str]]: The products on this page and the token
+            for the next page, or None when this is the last page.
+    """
+    limit = _page_size(limit)
+    query = _list_query(cursor, sort, category, min_price, max_price)
+
+    # Fetch one extra product to find out whether another page follows.
+    products = await get_repository().find(query, limit + 1)
+
+    next_cursor: Optional[str] = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = _next_cursor(last.id, getattr(last, sort.removeprefix("-")), sort)
+
+    return products, next_cursor
+
+
+# List one page of raw products, optionally with only some of their fields
+@run_action
+async def get_all_products_projected(
+    projection: Optional[dict[str, int]],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """List one page of raw product documents, optionally restricted to a projection.
+
+    The documents are read straight from the storage without building Product
+    documents. Whole documents are validated only when lean read validation is on.
+
+    Args:
+        projection (Optional[dict[str, int]]): The MongoDB projection, which must
+            include _id, or None for whole documents.
+        limit (Optional[int]): The requested page size, capped at the configured maximum.
+        cursor (Optional[str]): The token returned with the previous page, if any.
+        sort (str): The sort key (id, price or name), prefixed with '-' for descending order.
+        category (Optional[str]): Only list products in this category.
+        min_price (Optional[float]): Only list products at or above this price.
+        max_price (Optional[float]): Only list products at or below this price.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+
+    Returns:
+        tuple[list[dict[str, Any]], Optional[str]]: The raw documents on this page and
+            the token for the next page, or None when this is the last page.
+    """
+    limit = _page_size(limit)
+    query = _list_query(cursor, sort, category, min_price, max_price)
+
+    # The sort key is needed for the next cursor even when it was not requested.
+    key = SORT_KEYS[sort.removeprefix("-")]
+    hidden_key = projection is not None and key not in projection
+    if projection is not None and hidden_key:
+        projection = {**projection, key: 1}
+
+    # Fetch one extra document to find out whether another page follows.
+    documents = await get_repository().find_documents(query, limit + 1, projection)
+
+    next_cursor: Optional[str] = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = _next_cursor(last["_id"], last[key], sort)
+
+    if hidden_key:
+        for document in documents:
+            document.pop(key, None)
+    elif projection is None:
+        _validate_documents(documents)
+
+    return documents, next_cursor
+
+
+# Search products by relevance
+@run_action
+async def search_products(
+    text: str,
+    projection: Optional[dict[str, int]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """Search products by text, most relevant first.
+
+    Every match is scored before sorting, so pages are addressed by their
+    offset into the ranked results rather than by a keyset position. The cursor
+    is bound to the search text it was issued for.
+
+    Args:
+        text (str): The words to search for.
+        projection (Optional[dict[str, int]]): The MongoDB projection, or None for
+            whole documents.
+        limit (Optional[int]): The requested page size, capped at the configured maximum.
+        cursor (Optional[str]): The token returned with the previous page, if any.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded or belongs to another search.
+
+    Returns:
+        tuple[list[dict[str, Any]], Optional[str]]: The raw documents on this page and
+            the token for the next page, or None when this is the last page.
+    """
+    limit = _page_size(limit)
+
+    offset = 0
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            if position["search"] != text:
+                raise ValueError("Cursor belongs to another search")
+            offset = int(position["offset"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+
+    # Fetch one extra document to find out whether another page follows.
+    documents = await get_repository().search(text, offset, limit + 1, projection)
+
+    next_cursor: Optional[str] = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor({"search": text, "offset": offset + limit})
+
+    if projection is None:
+        _validate_documents(documents)
+
+    return documents, next_cursor
+
+
+# Summarize products per category
 @run_action
-async def get_all_products() -> list[Product]:
-    products: list[Product] = await Product.find_all().to_list()
-    return products
+async def get_product_stats(category: Optional[str] = None) -> dict[str, Any]:
+    """Compute product counts, prices and a price histogram.
+
+    The storage groups the products by category and counts their prices per range,
+    in a single aggregation with MongoDB, so only the summary is read. Results are
+    cached in process until they expire or a write action changes the products.
+
+    Args:
+        category (Optional[str]): Only summarize products in this category.
+
+    Returns:
+        dict[str, Any]: The overall and per-category statistics and the price histogram.
+    """
+    cached, stats = stats_cache.get(category)
+    if cached and stats is not None:
+        return stats
+
+    # A write landing during the aggregation must not leave its result cached.
+    generation = stats_cache.generation
+    boundaries = SETTINGS.stats_price_buckets
+    categories, bucket_counts = await get_repository().summarize(category, boundaries)
+
+    # Empty ranges are left out of the counts, so report every range explicitly.
+    histogram: list[dict[str, Any]] = [
+        {"min_price": lower, "max_price": upper, "count": bucket_counts.get(lower, 0)}
+        for lower, upper in zip(boundaries, boundaries[1:])
+    ]
+    if "other" in bucket_counts:
+        histogram.append(
+            {"min_price": None, "max_price": None, "count": bucket_counts["other"]}
+        )
+
+    count = sum(c["count"] for c in categories)
+    stats = {
+        "count": count,
+        "min_price": min((c["min_price"] for c in categories), default=None),
+        "avg_price": (
+            sum(c["avg_price"] * c["count"] for c in categories) / count
+            if count
+            else None
+        ),
+        "max_price": max((c["max_price"] for c in categories), default=None),
+        "categories": categories,
+        "price_histogram": histogram,
+    }
+    stats_cache.set(category, stats, generation)
+
+    return stats
+
+
+# Stream every product
+async def stream_products(batch_size: Optional[int] = None) -> AsyncIterator[Product]:
+    """Stream all products ordered by ID.
+
+    Products are read from the storage batch_size at a time, so only one batch is
+    held in memory at any time.
+
+    Args:
+        batch_size (Optional[int]): The number of products fetched per round trip.
+
+    Yields:
+        Product: Each product in the collection.
+    """
+    products = get_repository().stream(batch_size or SETTINGS.export_batch_size)
+    async for product in products:
+        yield product
+
+
+# Stream every product as a raw document
+async def stream_product_documents(
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream all raw product documents ordered by ID.
+
+    Documents are read in batches, like stream_products, but are yielded as the
+    dictionaries the storage returns without building Product documents.
+
+    Args:
+        batch_size (Optional[int]): The number of documents fetched per round trip.
+
+    Yields:
+        dict[str, Any]: Each product document in the collection.
+    """
+    documents = get_repository().stream_documents(
+        batch_size or SETTINGS.export_batch_size
+    )
+    async for document in documents:
+        _validate_documents([document])
+        yield document
 
 
 # Get a single product
@@ -47,6 +415,31 @@ async def get_product(product: Product) -> Product:
     return product
 
 
+# Get a single product with only some of its fields
+@run_action
+async def get_product_projected(
+    product_id: PydanticObjectId, projection: dict[str, int]
+) -> dict[str, Any]:
+    """Get a raw product document restricted to a projection.
+
+    Args:
+        product_id (PydanticObjectId): The ID of the product to get.
+        projection (dict[str, int]): The MongoDB projection.
+
+    Raises:
+        ProductNotFound: If the product is not found.
+
+    Returns:
+        dict[str, Any]: The raw document with only the projected fields.
+    """
+    document = await get_repository().get_document(product_id, projection)
+
+    if not document:
+        raise ProductNotFound(product_id)
+
+    return document
+
+
 # Create a new product
 async def create_product(
     name: str,
@@ -54,52 +447,131 @@ async def create_product(
     category: Category,
     description: str = "",
 ) -> Product:
-    new_product: Product = await Product(
-        name=name, description=description, price=price, category=category
-    ).insert()
+    new_product = await get_repository().insert(
+        ProductModel(name=name, description=description, price=price, category=category)
+    )
 
     if not new_product:
         raise InternalServerError("Failed to create product")
 
+    # Drop any negative entry cached for the new ID.
+    if new_product.id:
+        _invalidate_products([new_product.id])
+
     return new_product
 
 
+# Create many products at once
+@run_action
+async def create_products(
+    products: Sequence[ProductModel],
+) -> list[tuple[Optional[PydanticObjectId], Optional[str]]]:
+    """Create many products with one unordered insert_many per chunk.
+
+    The products have already been validated by the request schema, so they are
+    stored without validating them a second time. A product that fails to insert
+    does not stop the others.
+
+    Args:
+        products (Sequence[ProductModel]): The validated products to create.
+
+    Returns:
+        list[tuple[Optional[PydanticObjectId], Optional[str]]]: For each product, in
+            request order, its new ID or the reason it was not inserted.
+    """
+    results = await get_repository().insert_many(products)
+
+    _invalidate_products(
+        [product_id for product_id, _ in results if product_id is not None]
+    )
+
+    return results
+
+
 # Update a product
+@run_action
 async def update_product(
-    product: Product,
-    name: Optional[str] = None,
-    description: Optional[str] = None,
-    price: Optional[float] = None,
-    category: Optional[Category] = None,
+    product_id: PydanticObjectId, changes: dict[str, Any]
 ) -> Product:
-    if name:
-        product.name = name
-    if description:
-        product.description = description
-    if price:
-        product.price = price
-    if category:
-        product.category = category
-
-    # Update the product
-    await product.save()
+    """Update a product in a single atomic round trip.
+
+    Only the given fields are written, using $set, so concurrent updates to other
+    fields are not lost and any value the schema accepts can be set.
+
+    Args:
+        product_id (PydanticObjectId): The ID of the product to update.
+        changes (dict[str, Any]): The fields to set and their new values.
+
+    Raises:
+        ProductNotFound: If the product is not found.
+
+    Returns:
+        Product: The product as it is after the update.
+    """
+    product = await get_repository().update(product_id, changes)
+
+    _invalidate_products([product_id])
 
     if not product:
-        raise InternalServerError("Failed to update product")
+        raise ProductNotFound(product_id)
 
     return product
 
 
-async def delete_product(product: Product) -> None:
-    """Delete a product
+# Update many products at once
+@run_action
+async def update_products(
+    updates: Sequence[tuple[PydanticObjectId, dict[str, Any]]],
+) -> tuple[int, int]:
+    """Apply partial updates to many products with a single bulk_write.
+
+    Each update only sets the fields it contains, so no product has to be read
+    before it is written.
+
+    Args:
+        updates (Sequence[tuple[PydanticObjectId, dict[str, Any]]]): The ID of each
+            product and the fields to set on it.
+
+    Returns:
+        tuple[int, int]: The number of products matched and actually modified.
+    """
+    matched_count, modified_count = await get_repository().update_many(updates)
+    _invalidate_products([product_id for product_id, _ in updates])
+
+    return matched_count, modified_count
+
+
+# Delete many products at once
+@run_action
+async def delete_products(product_ids: Sequence[PydanticObjectId]) -> int:
+    """Delete many products in a single round trip.
+
+    Args:
+        product_ids (Sequence[PydanticObjectId]): The IDs of the products to delete.
+
+    Returns:
+        int: The number of products deleted.
+    """
+    deleted_count = await get_repository().delete_many(product_ids)
+
+    _invalidate_products(product_ids)
+
+    return deleted_count
+
+
+# Delete a product
+@run_action
+async def delete_product(product_id: PydanticObjectId) -> None:
+    """Delete a product in a single round trip.
 
     Args:
-        product (Product): The Product document to delete
+        product_id (PydanticObjectId): The ID of the product to delete.
 
     Raises:
-        InternalServerError: If the product was not deleted
+        ProductNotFound: If no product was deleted.
     """
-    await Product.delete(product)
+    deleted = await get_repository().delete(product_id)
+    _invalidate_products([product_id])
 
-    if await Product.get(product.id):
-        raise InternalServerError("Failed to delete product")
+    if not deleted:
+        raise ProductNotFound(product_id)
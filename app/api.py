@@ -1,59 +1,301 @@
-from typing import Literal
+from typing import Any, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 import app.actions as Actions
 import app.documents as Documents
 import app.schemas as Schemas
-from app.dependencies import product_dependency
+from app.config import get_settings
+from app.dependencies import product_dependency, product_id_dependency
 from app.exceptions import APIException
+from app.export import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    csv_lines,
+    ndjson_lines,
+    negotiate_export_format,
+)
+from app.middleware import document_etag, etag_matches
+from app.projection import includes_id, parse_fields, shape_product
+from app.responses import FastJSONResponse, model_response
+from app.timing import TimedRoute
+
+# Retrieve application settings which include bulk request limits and read modes.
+SETTINGS = get_settings()
 
-router = APIRouter()
+# Product routes report their response model validation time in Server-Timing.
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/", response_model=Schemas.GetAllProductsResponse)
-async def get_products() -> dict[Literal["products"], list[Documents.Product]]:
+async def get_products(
+    limit: Optional[int] = Query(
+        None, ge=1, description="The maximum number of products to return."
+    ),
+    cursor: Optional[str] = Query(
+        None, alias="next", description="The cursor returned with the previous page."
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated product fields to return, e.g. id,name,price.",
+    ),
+    sort: Schemas.ProductSort = Query(
+        "id", description="Sort key, prefixed with '-' for descending order."
+    ),
+    category: Optional[str] = Query(
+        None, description="Only return products in this category."
+    ),
+    min_price: Optional[float] = Query(
+        None, ge=0, description="Only return products at or above this price."
+    ),
+    max_price: Optional[float] = Query(
+        None, ge=0, description="Only return products at or below this price."
+    ),
+) -> dict[str, Any] | Response:
+    """
+    Retrieve a page of products.
+
+    This endpoint returns one page of products from the database, optionally filtered
+    by category and price range and sorted by ID, price or name. It uses the
+    get_all_products action to fetch product data. Pass the returned 'next' cursor
+    back, with the same filters and sort, to fetch the following page. When 'fields'
+    is given, only those fields are read from the database and returned. In lean
+    read mode the raw documents are returned without building Product documents.
+
+    Args:
+        limit (Optional[int]): The maximum number of products to return.
+        cursor (Optional[str]): The cursor returned with the previous page.
+        fields (Optional[str]): Comma separated product fields to return.
+        sort (Schemas.ProductSort): The sort key, prefixed with '-' for descending order.
+        category (Optional[str]): Only return products in this category.
+        min_price (Optional[float]): Only return products at or above this price.
+        max_price (Optional[float]): Only return products at or below this price.
+
+    Returns:
+        dict: A dictionary with a key 'products' containing a list of product responses
+            and a key 'next' containing the cursor for the next page.
+    """
+    try:
+        projection = parse_fields(fields)
+        if projection or SETTINGS.lean_reads:
+            # Retrieve one page of raw products without building documents.
+            documents, next_cursor = await Actions.get_all_products_projected(
+                projection, limit, cursor, sort, category, min_price, max_price
+            )
+            include_id = includes_id(fields)
+            return FastJSONResponse(
+                {
+                    "products": [shape_product(d, include_id) for d in documents],
+                    "next": next_cursor,
+                }
+            )
+
+        # Retrieve one page of products from the database.
+        products, next_cursor = await Actions.get_all_products(
+            limit, cursor, sort, category, min_price, max_price
+        )
+        return model_response(
+            Schemas.GetAllProductsResponse,
+            {"products": products, "next": next_cursor},
+        )
+    except APIException as e:
+        # Raise HTTP exception if an API specific error occurs.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+
+@router.get("/search", response_model=Schemas.GetAllProductsResponse)
+async def search_products(
+    q: str = Query(..., min_length=1, description="The words to search for."),
+    limit: Optional[int] = Query(
+        None, ge=1, description="The maximum number of products to return."
+    ),
+    cursor: Optional[str] = Query(
+        None, alias="next", description="The cursor returned with the previous page."
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated product fields to return, e.g. id,name,price.",
+    ),
+) -> dict[str, Any] | Response:
     """
-    Retrieve all products.
+    Search products.
+
+    This endpoint searches the product names, descriptions and category descriptions
+    and returns one page of matches, most relevant first. Matches in the name rank
+    above matches in the descriptions. Pass the returned 'next' cursor back, with the
+    same search text, to fetch the following page.
 
-    This endpoint returns a list of all products in the database.
-    It uses the get_all_products action to fetch product data.
+    Args:
+        q (str): The words to search for.
+        limit (Optional[int]): The maximum number of products to return.
+        cursor (Optional[str]): The cursor returned with the previous page.
+        fields (Optional[str]): Comma separated product fields to return.
 
     Returns:
-        dict: A dictionary with a key 'products' containing a list of product responses.
+        dict: A dictionary with a key 'products' containing the matching products
+            and a key 'next' containing the cursor for the next page.
     """
     try:
-        # Retrieve all products from the database.
-        products: list[Documents.Product] = await Actions.get_all_products()
-        return {"products": products}
+        projection = parse_fields(fields)
+        documents, next_cursor = await Actions.search_products(
+            q, projection, limit, cursor
+        )
+        products = [shape_product(d, includes_id(fields)) for d in documents]
+        if projection:
+            # Partial products do not match the response schema.
+            return FastJSONResponse({"products": products, "next": next_cursor})
+        return model_response(
+            Schemas.GetAllProductsResponse,
+            {"products": products, "next": next_cursor},
+        )
     except APIException as e:
         # Raise HTTP exception if an API specific error occurs.
         raise HTTPException(status_code=e.code, detail=e.detail)
 
 
+@router.get("/stats", response_model=Schemas.GetProductStatsResponse)
+async def get_product_stats(
+    category: Optional[str] = Query(
+        None, description="Only summarize products in this category."
+    ),
+) -> dict[str, Any]:
+    """
+    Retrieve product statistics.
+
+    This endpoint returns the number of products and their lowest, mean and highest
+    price, overall and per category, along with a price histogram. The figures are
+    computed by a single aggregation in the database and cached briefly.
+
+    Args:
+        category (Optional[str]): Only summarize products in this category.
+
+    Returns:
+        Schemas.GetProductStatsResponse: The product statistics.
+    """
+    try:
+        # Retrieve the statistics using the get_product_stats action.
+        stats: dict[str, Any] = await Actions.get_product_stats(category)
+        return stats
+    except APIException as e:
+        # Raise HTTP exception if an API specific error occurs.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}}},
+        406: {"description": "Requested media type is not supported"},
+    },
+)
+async def export_products(
+    batch_size: Optional[int] = Query(
+        None, ge=1, description="The number of products fetched per round trip."
+    ),
+    accept: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """
+    Export all products as a stream.
+
+    This endpoint streams every product in the database as NDJSON or CSV, chosen by
+    the Accept header (NDJSON by default). Products are written to the client as they
+    are read from the database cursor, so memory use does not grow with the catalog.
+
+    Args:
+        batch_size (Optional[int]): The number of products fetched per round trip.
+        accept (Optional[str]): The Accept header of the request.
+
+    Returns:
+        StreamingResponse: The products, one per line.
+    """
+    try:
+        # Pick the output format before any data is read.
+        media_type = negotiate_export_format(accept)
+    except APIException as e:
+        # Convert API exception to HTTP exception.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+    products: AsyncIterator[dict[str, Any]]
+    if SETTINGS.lean_reads:
+        # Shape the raw documents without building Product documents.
+        products = (
+            shape_product(d) async for d in Actions.stream_product_documents(batch_size)
+        )
+    else:
+        products = (
+            p.model_dump(mode="json") async for p in Actions.stream_products(batch_size)
+        )
+    lines = (
+        csv_lines(products) if media_type == CSV_MEDIA_TYPE else ndjson_lines(products)
+    )
+    return StreamingResponse(lines, media_type=media_type)
+
+
 @router.get("/{product_id}", response_model=Schemas.GetProductResponse)
 async def get_product(
-    product: Documents.Product = Depends(product_dependency),
-) -> Documents.Product:
+    response: Response,
+    product_id: PydanticObjectId = Depends(product_id_dependency),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated product fields to return, e.g. id,name,price.",
+    ),
+    if_none_match: Optional[str] = Header(None),
+) -> Documents.Product | Response:
     """
     Retrieve a single product by its ID.
 
+    When 'fields' is given, only those fields are read from the database and returned.
+    The ETag is computed from the product as read, so a matching If-None-Match header
+    is answered with 304 before the response body is serialized.
+
     Args:
+        response (Response): The response whose headers are sent with the product.
         product_id (PydanticObjectId): The unique identifier of the product.
+        fields (Optional[str]): Comma separated product fields to return.
+        if_none_match (Optional[str]): The ETags of the client's cached copies.
 
     Returns:
         Schemas.GetProductResponse: The product data corresponding to the given ID.
     """
     try:
+        projection = parse_fields(fields)
+        if projection:
+            # Retrieve only the requested fields of the product.
+            document = await Actions.get_product_projected(product_id, projection)
+            etag = document_etag(fields, document)
+            if if_none_match and etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            return JSONResponse(
+                shape_product(document, includes_id(fields)), headers={"ETag": etag}
+            )
+
         # Retrieve the product using the provided product_id.
-        return await Actions.get_product(product)
+        product: Documents.Product = await product_dependency(product_id)
+        etag = document_etag(product)
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        content = model_response(
+            Schemas.GetProductResponse, await Actions.get_product(product)
+        )
+        if isinstance(content, Response):
+            content.headers["ETag"] = etag
+        else:
+            # FastAPI sends the headers set on 'response' with the serialized product.
+            response.headers["ETag"] = etag
+        return content
     except APIException as e:
         # Convert API exception to HTTP exception.
         raise HTTPException(status_code=e.code, detail=e.detail)
 
 
 @router.post("/", response_model=Schemas.CreateProductResponse, status_code=201)
-async def create_product(product: Schemas.CreateProductRequest) -> Documents.Product:
+async def create_product(
+    product: Schemas.CreateProductRequest,
+) -> Documents.Product | Response:
     """
     Create a new product.
 
@@ -68,33 +310,149 @@ async def create_product(product: Schemas.CreateProductRequest) -> Documents.Pro
     """
     try:
         # Using the product data to create a new product.
-        return await Actions.create_product(**product.model_dump())
+        new_product = await Actions.create_product(**product.model_dump())
+        return model_response(
+            Schemas.CreateProductResponse, new_product, status.HTTP_201_CREATED
+        )
     except APIException as e:
         # Convert API exception to HTTP exception.
         raise HTTPException(status_code=e.code, detail=e.detail)
 
 
-@router.patch("/{product_id}", response_model=Schemas.UpdateProductResponse)
+@router.post("/bulk", response_model=Schemas.BulkCreateProductsResponse)
+async def create_products(
+    products: list[Schemas.CreateProductRequest] = Body(
+        ..., min_length=1, max_length=SETTINGS.bulk_max_items
+    ),
+) -> dict[str, Any]:
+    """
+    Create many products in one request.
+
+    This endpoint validates all products in one pass and writes them with the
+    create_products action, which issues one unordered insert per chunk. A product
+    that fails to insert does not stop the others.
+
+    Args:
+        products (list[Schemas.CreateProductRequest]): The products to create.
+
+    Returns:
+        Schemas.BulkCreateProductsResponse: The ID or error of each product, in request order.
+    """
+    try:
+        # Insert the products and report the outcome of each one.
+        results = await Actions.create_products(products)
+        return {
+            "inserted_count": sum(1 for _, error in results if error is None),
+            "results": [
+                {"index": index, "id": product_id, "error": error}
+                for index, (product_id, error) in enumerate(results)
+            ],
+        }
+    except APIException as e:
+        # Convert API exception to HTTP exception.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+
+@router.patch("/bulk", response_model=Schemas.BulkUpdateProductsResponse)
+async def update_products(
+    updates: list[Schemas.BulkUpdateProductRequest] = Body(
+        ..., min_length=1, max_length=SETTINGS.bulk_max_items
+    ),
+) -> dict[str, int]:
+    """
+    Update many products in one request.
+
+    This endpoint applies a partial update to each listed product using the
+    update_products action, which sends all of them to the database in one bulk write.
+    Only the fields present in each item are changed.
+
+    Args:
+        updates (list[Schemas.BulkUpdateProductRequest]): The ID and new values of each product.
+
+    Returns:
+        Schemas.BulkUpdateProductsResponse: The number of products matched and modified.
+    """
+    try:
+        # Keep only the fields each client actually sent, with nested values whole.
+        matched_count, modified_count = await Actions.update_products(
+            [
+                (
+                    update.id,
+                    update.model_dump(
+                        include=update.model_fields_set - {"id"}, exclude_none=True
+                    ),
+                )
+                for update in updates
+            ]
+        )
+        return {"matched_count": matched_count, "modified_count": modified_count}
+    except APIException as e:
+        # Handle API exception by converting it into an HTTP exception.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+
+@router.delete("/bulk", response_model=Schemas.BulkDeleteProductsResponse)
+async def delete_products(
+    product_ids: list[PydanticObjectId] = Body(
+        ..., min_length=1, max_length=SETTINGS.bulk_max_items
+    ),
+) -> dict[str, int]:
+    """
+    Delete many products in one request.
+
+    This endpoint deletes every listed product using the delete_products action,
+    which removes all of them in a single database round trip. IDs that do not
+    exist are ignored.
+
+    Args:
+        product_ids (list[PydanticObjectId]): The IDs of the products to delete.
+
+    Returns:
+        Schemas.BulkDeleteProductsResponse: The number of products deleted.
+    """
+    try:
+        # Delete the products using the delete_products action.
+        deleted_count = await Actions.delete_products(product_ids)
+        return {"deleted_count": deleted_count}
+    except APIException as e:
+        # Convert API exception to HTTP exception if deletion fails.
+        raise HTTPException(status_code=e.code, detail=e.detail)
+
+
+@router.patch(
+    "/{product_id}",
+    response_model=Schemas.UpdateProductResponse,
+    responses={404: {"description": "Product not found"}},
+)
 async def update_product(
     request_body: Schemas.UpdateProductRequest,
-    product: Documents.Product = Depends(product_dependency),
-) -> Documents.Product:
+    product_id: PydanticObjectId = Depends(product_id_dependency),
+) -> Documents.Product | Response:
     """
     Update an existing product.
 
-    This endpoint updates the product identified by the provided product dependency.
-    The update action is performed using the details from the request body.
+    This endpoint updates the product identified by product_id without reading it first.
+    Only the fields present in the request body are changed, and the updated
+    product is returned from the same database round trip.
 
     Args:
+        product_id (PydanticObjectId): The unique identifier of the product.
         request_body (Schemas.UpdateProductRequest): The payload containing updated data.
-        product (Documents.Product): The product instance retrieved via dependency injection.
 
     Returns:
         Schemas.UpdateProductResponse: The updated product details.
     """
     try:
-        # Update the product with the new values provided.
-        return await Actions.update_product(product, **request_body.model_dump())
+        # Update the product with only the fields the client sent. A nested category
+        # is written whole, with the defaults of the fields it left out, as
+        # exclude_unset would also drop those and leave a partial category.
+        product: Documents.Product = await Actions.update_product(
+            product_id,
+            request_body.model_dump(
+                include=request_body.model_fields_set, exclude_none=True
+            ),
+        )
+        return model_response(Schemas.UpdateProductResponse, product)
     except APIException as e:
         # Handle API exception by converting it into an HTTP exception.
         raise HTTPException(status_code=e.code, detail=e.detail)
@@ -106,23 +464,24 @@ async def update_product(
     responses={404: {"description": "Product not found"}},
 )
 async def delete_product(
-    product: Documents.Product = Depends(product_dependency),
+    product_id: PydanticObjectId = Depends(product_id_dependency),
 ) -> None:
     """
     Delete a product.
 
-    This endpoint deletes the specified product. It returns a 204 status code
-    upon successful deletion. If the product is not found, a 404 response is returned.
+    This endpoint deletes the specified product without reading it first. It returns
+    a 204 status code upon successful deletion. If the product is not found, a 404
+    response is returned.
 
     Args:
-        product (Documents.Product): The product instance retrieved via dependency injection.
+        product_id (PydanticObjectId): The unique identifier of the product.
 
     Returns:
         int: HTTP status code 204 on successful deletion.
     """
     try:
         # Delete the product using the delete_product action.
-        await Actions.delete_product(product)
+        await Actions.delete_product(product_id)
     except APIException as e:
         # Convert API exception to HTTP exception if deletion fails.
         raise HTTPException(status_code=e.code, detail=e.detail)
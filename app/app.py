@@ -1,15 +1,27 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 
 from app.api import router as api_router
 from app.config import get_settings
-from app.mongo import init_mongo
+from app.debug import router as debug_router
+from app.dependencies import mongo_ready_dependency
+from app.health import router as health_router
+from app.metrics import MetricsMiddleware
+from app.metrics import router as metrics_router
+from app.middleware import ETagMiddleware, RequestContextMiddleware
+from app.mongo import close_mongo, init_mongo, start_mongo
+from app.profiling import ProfilerMiddleware
+from app.startup import startup_timer
+from app.timing import ServerTimingMiddleware
 
 # Load application settings from environment or configuration.
 SETTINGS = get_settings()
 
+# Everything up to here is spent importing the application's modules.
+startup_timer.mark("imports")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
@@ -17,9 +29,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     Application lifespan context manager for FastAPI.
 
     This context manager handles startup and shutdown events for the application.
-    On startup, it connects to MongoDB by calling init_mongo().
-    On shutdown, any required cleanup logic (e.g., closing database connections)
-    can be added here.
+    On startup, it connects to MongoDB by calling init_mongo(), or in fast start mode
+    starts the connection in the background and begins serving right away. With the
+    in-memory storage backend, there is no database to connect to.
+    On shutdown, it closes the shared MongoDB client and its connection pool.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -27,15 +40,54 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     Yields:
         None: Control is yielded back after startup actions.
     """
-    # Connect to MongoDB during app startup
-    await init_mongo()
+    startup_timer.mark("server")
+    if SETTINGS.storage_backend == "memory":
+        # Products are kept in process, so there is no database to connect to
+        startup_timer.report("serving")
+        yield
+        return
+    if SETTINGS.fast_start:
+        # Connect to MongoDB in the background; requests wait at the readiness gate
+        start_mongo()
+    else:
+        # Connect to MongoDB during app startup
+        await init_mongo()
+    startup_timer.report("serving")
     yield
-    # TODO: Add cleanup logic during shutdown (e.g., disconnect MongoDB)
+    # Close the MongoDB client and its pooled connections during app shutdown
+    await close_mongo()
 
 
 # Create a FastAPI application instance, using the custom lifespan context manager.
 app = FastAPI(lifespan=lifespan)
 
+# Tag JSON GET responses so clients can revalidate them with If-None-Match.
+app.add_middleware(ETagMiddleware)
+
+# Expose the current request to MongoDB listeners, so slow queries name their route.
+app.add_middleware(RequestContextMiddleware)
+
+# Record request metrics, outside the ETag middleware so 304 responses are measured as sent.
+app.add_middleware(MetricsMiddleware)
+
+# Send a Server-Timing header when enabled, outermost so its total covers every layer.
+app.add_middleware(ServerTimingMiddleware)
+
+# Profile requests that carry the profiler token, outermost so every layer is profiled.
+app.add_middleware(ProfilerMiddleware)
+
 # Include API routes for product management.
 # The "api_router" contains all the endpoint definitions and is mounted under "/products".
-app.include_router(api_router, prefix="/products")
+# Requests wait for MongoDB to be initialized when it is started in the background.
+app.include_router(
+    api_router, prefix="/products", dependencies=[Depends(mongo_ready_dependency)]
+)
+
+# Include the liveness and readiness endpoints, which must answer before MongoDB is ready.
+app.include_router(health_router)
+
+# Include the Prometheus metrics endpoint.
+app.include_router(metrics_router)
+
+# Include the debug endpoints, which answer only when enabled in the settings.
+app.include_router(debug_router, prefix="/debug")
@@ -0,0 +1,237 @@
+"""
+Module for microbenchmarks of the CPU hot paths.
+
+The benchmarks time the work the application does per request without any I/O:
+validating products and categories, building list responses of 1k, 10k and 100k
+products, encoding them as JSON, and the overhead of the action and dependency
+wrappers. Each benchmark is timed with timeit, over enough iterations to take at
+least 0.2 seconds, a few times over; the fastest round is the least disturbed by
+the rest of the machine, so it is the one compared.
+
+Results can be saved as a JSON baseline and later runs compared against it. A
+benchmark whose fastest time grew by more than the threshold is a regression.
+Timings depend on the machine, so a baseline should be recorded on the machine, or
+the kind of machine, that runs the comparison.
+"""
+
+import json
+import platform
+import statistics
+import timeit
+from typing import Any, Callable, Optional
+
+from beanie import PydanticObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import app.schemas as Schemas
+from app.actions import run_action
+from app.dependencies import http_request_dependency
+from app.models import Category, Product
+from app.responses import FastJSONResponse, response_include
+
+# Number of awaits per timed call of the wrapper benchmarks, to hide the loop's cost.
+AWAITS = 1000
+
+
+def product_document(index: int) -> dict[str, Any]:
+    """
+    Build a product as read from the database.
+
+    Args:
+        index (int): The position of the product, which makes its fields unique.
+
+    Returns:
+        dict[str, Any]: The product fields, with its ID.
+    """
+    return {
+        "id": PydanticObjectId(),
+        "name": f"product-{index}",
+        "description": "A product used in benchmarks",
+        "price": index % 1000 + 0.99,
+        "category": {"name": "Phones", "description": "Mobile phones"},
+    }
+
+
+class Benchmark:
+    """
+    A named piece of work to time.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]], ops: int = 1):
+        # Name the benchmark is reported and compared under.
+        self.name = name
+        # Builds the data of the benchmark, untimed, and returns the timed function.
+        self.setup = setup
+        # Number of operations each call of the timed function performs.
+        self.ops = ops
+
+
+def _validate_product() -> Callable[[], Any]:
+    data = product_document(0)
+    return lambda: Product.model_validate(data)
+
+
+def _validate_category() -> Callable[[], Any]:
+    data = {"name": "Phones", "description": "Mobile phones"}
+    return lambda: Category.model_validate(data)
+
+
+def _price_validator() -> Callable[[], Any]:
+    return lambda: Product.price_ends_with_99(799.99)
+
+
+def _list_response(count: int) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        content = {"products": [product_document(i) for i in range(count)]}
+        return lambda: Schemas.GetAllProductsResponse.model_validate(content)
+
+    return setup
+
+
+def _encode_fast() -> Callable[[], Any]:
+    content = {"products": [product_document(i) for i in range(1000)], "next": None}
+    response = FastJSONResponse(content)
+    # Encode as the product list route does, keeping the response model's fields.
+    response.include = response_include(Schemas.GetAllProductsResponse)
+    return lambda: response.render(content)
+
+
+def _encode_standard() -> Callable[[], Any]:
+    content = Schemas.GetAllProductsResponse.model_validate(
+        {"products": [product_document(i) for i in range(1000)]}
+    )
+    response = JSONResponse(None)
+    # Encode as FastAPI does once it has validated a route's return value.
+    return lambda: response.render(jsonable_encoder(content))
+
+
+def _awaited(wrap: Callable[[Any], Any]) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        async def work() -> None:
+            pass
+
+        wrapped = wrap(work)
+
+        async def batch() -> None:
+            for _ in range(AWAITS):
+                await wrapped()
+
+        def drive() -> None:
+            # Nothing in the batch suspends, so it runs to completion without a loop.
+            try:
+                batch().send(None)
+            except StopIteration:
+                pass
+
+        return drive
+
+    return setup
+
+
+# Every benchmark, in the order they run.
+BENCHMARKS = [
+    Benchmark("validate_product", _validate_product),
+    Benchmark("validate_category", _validate_category),
+    Benchmark("price_ends_with_99", _price_validator),
+    Benchmark("list_response_1k", _list_response(1_000)),
+    Benchmark("list_response_10k", _list_response(10_000)),
+    Benchmark("list_response_100k", _list_response(100_000)),
+    Benchmark("json_encode_fast_1k", _encode_fast),
+    Benchmark("json_encode_standard_1k", _encode_standard),
+    Benchmark("await_plain", _awaited(lambda func: func), ops=AWAITS),
+    Benchmark("await_run_action", _awaited(run_action), ops=AWAITS),
+    Benchmark(
+        "await_http_request_dependency",
+        _awaited(http_request_dependency),
+        ops=AWAITS,
+    ),
+]
+
+
+def run_benchmarks(
+    repeat: int = 5, select: Optional[str] = None
+) -> dict[str, dict[str, float]]:
+    """
+    Run the benchmarks.
+
+    Args:
+        repeat (int): The number of timed rounds of each benchmark.
+        select (Optional[str]): Only run benchmarks whose name contains this text.
+
+    Returns:
+        dict[str, dict[str, float]]: The fastest and median time of one operation of
+            each benchmark, in microseconds, and the operations per round.
+    """
+    results = {}
+    for benchmark in BENCHMARKS:
+        if select and select not in benchmark.name:
+            continue
+        timer = timeit.Timer(benchmark.setup())
+        number, _ = timer.autorange()
+        times = [
+            seconds / (number * benchmark.ops) * 1_000_000
+            for seconds in timer.repeat(repeat=repeat, number=number)
+        ]
+        results[benchmark.name] = {
+            "min_us": min(times),
+            "median_us": statistics.median(times),
+            "ops": number * benchmark.ops,
+        }
+    return results
+
+
+def save_baseline(results: dict[str, dict[str, float]], path: str) -> None:
+    """
+    Save benchmark results as a baseline, with the machine they were recorded on.
+
+    Args:
+        results (dict[str, dict[str, float]]): The results of run_benchmarks.
+        path (str): The baseline file.
+    """
+    baseline = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        "benchmarks": results,
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2)
+        file.write("\n")
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[dict[str, Any]]:
+    """
+    Compare benchmark results with a baseline.
+
+    Args:
+        results (dict[str, dict[str, float]]): The results of run_benchmarks.
+        baseline (dict[str, dict[str, float]]): The benchmarks of a saved baseline.
+        threshold (float): The largest allowed slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list[dict[str, Any]]: One row per benchmark in both, with the baseline and
+            current fastest times, their ratio and whether it is a regression.
+    """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["min_us"]
+        ratio = result["min_us"] / before
+        rows.append(
+            {
+                "name": name,
+                "baseline_us": before,
+                "current_us": result["min_us"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
@@ -0,0 +1,171 @@
+"""
+Module for in-process caching of database lookups.
+
+This module provides a small TTL cache with least-recently-used eviction, the
+process-wide caches of product documents, used by the product dependency, and of
+collection statistics. Write actions invalidate entries so a process never serves
+its own stale writes; writes made by other processes become visible once the
+entry expires. The lookups and entries of both caches are exposed on /metrics.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+from beanie import PydanticObjectId
+
+from app.config import get_settings
+from app.documents import Product
+from app.metrics import CallbackMetric, registry
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Retrieve application settings which include cache sizing and lifetimes.
+SETTINGS = get_settings()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A bounded mapping whose entries expire after a fixed time.
+
+    When the cache is full the least recently used entry is evicted. A value of None
+    can be stored to remember that a key does not exist (a negative entry), usually
+    with a shorter lifetime than regular entries.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # Largest number of entries kept before evicting the least recently used one.
+        self.max_size = max_size
+        # Lifetime in seconds of regular and negative entries.
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # Source of the current time, replaceable in tests.
+        self.clock = clock
+        # Entries ordered from least to most recently used, with their expiry time.
+        self._entries: OrderedDict[K, tuple[float, Optional[V]]] = OrderedDict()
+        # Number of lookups that were and were not answered from the cache.
+        self.hits = 0
+        self.misses = 0
+        # Incremented by every invalidation, so a value read from the database can
+        # be checked for an invalidation that happened while it was being read.
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> tuple[bool, Optional[V]]:
+        """
+        Look up a key.
+
+        Args:
+            key (K): The key to look up.
+
+        Returns:
+            tuple[bool, Optional[V]]: Whether the key was cached and its value, which is
+                None for a negative entry.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def set(self, key: K, value: Optional[V], generation: Optional[int] = None) -> None:
+        """
+        Store a value, or a negative entry when the value is None.
+
+        Negative entries are not stored when the negative lifetime is zero. When the
+        generation the value was read at is given, the value is not stored if the
+        cache has been invalidated since, as it may predate a write. The next lookup
+        then reads it again.
+
+        Args:
+            key (K): The key to store.
+            value (Optional[V]): The value to store, or None if the key does not exist.
+            generation (Optional[int]): The generation read before the value was.
+        """
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """
+        Remove a key from the cache if it is present.
+
+        Args:
+            key (K): The key to remove.
+        """
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+
+        The hit and miss counters are kept, as they are exposed as counters that
+        only go up.
+        """
+        self.generation += 1
+        self._entries.clear()
+
+
+# Cache of product documents by ID, used when product caching is enabled.
+product_cache: TTLCache[PydanticObjectId, Product] = TTLCache(
+    max_size=SETTINGS.cache_max_size,
+    ttl=SETTINGS.cache_ttl_seconds,
+    negative_ttl=SETTINGS.cache_negative_ttl_seconds,
+)
+
+# Cache of collection statistics by category filter (None for all products).
+stats_cache: TTLCache[Optional[str], dict[str, Any]] = TTLCache(
+    max_size=SETTINGS.cache_max_size,
+    ttl=SETTINGS.stats_cache_ttl_seconds,
+)
+
+
+def _cache_lookups() -> dict[tuple[str, ...], float]:
+    # Read the counters of both caches when the metrics are rendered.
+    lookups: dict[tuple[str, ...], float] = {}
+    for name, cache in (("product", product_cache), ("stats", stats_cache)):
+        lookups[(name, "hit")] = cache.hits
+        lookups[(name, "miss")] = cache.misses
+    return lookups
+
+
+registry.register(
+    CallbackMetric(
+        "cache_lookups_total",
+        "Cache lookups, by cache and result (hit or miss).",
+        ("cache", "result"),
+        "counter",
+        _cache_lookups,
+    )
+)
+registry.register(
+    CallbackMetric(
+        "cache_entries",
+        "Entries currently held, by cache.",
+        ("cache",),
+        "gauge",
+        lambda: {("product",): len(product_cache), ("stats",): len(stats_cache)},
+    )
+)
@@ -1,5 +1,10 @@
+import asyncio
+import json
+import os
+from typing import Optional
+
+import click
 import typer
-import uvicorn
 
 from app.config import Settings, set_settings, settings
 
@@ -7,6 +12,25 @@ from app.config import Settings, set_settings, settings
 app = typer.Typer()
 
 
+def export_settings(new_settings: Settings) -> None:
+    """
+    Export settings as environment variables.
+
+    Worker and reloader processes import the application anew, so they read their
+    settings from the environment rather than from this process's memory.
+
+    Args:
+        new_settings (Settings): The settings the server processes should use.
+    """
+    for name, value in new_settings.model_dump(mode="json").items():
+        if value is None:
+            os.environ.pop(name.upper(), None)
+        elif isinstance(value, (list, dict)):
+            os.environ[name.upper()] = json.dumps(value)
+        else:
+            os.environ[name.upper()] = str(value)
+
+
 @app.command()
 def start_server(
     host: str = typer.Option(
@@ -43,11 +67,56 @@ def start_server(
         "--cors",
         help="The origins of the API.",
     ),
+    workers: int = typer.Option(
+        settings.workers,
+        "--workers",
+        "-w",
+        min=1,
+        help="The number of server processes (ignored with --reload).",
+    ),
+    loop: str = typer.Option(
+        settings.loop,
+        "--loop",
+        click_type=click.Choice(["auto", "asyncio", "uvloop"]),
+        help="The event loop implementation: auto, asyncio or uvloop.",
+    ),
+    http: str = typer.Option(
+        settings.http,
+        "--http",
+        click_type=click.Choice(["auto", "h11", "httptools"]),
+        help="The HTTP/1.1 parser implementation: auto, h11 or httptools.",
+    ),
+    backlog: int = typer.Option(
+        settings.backlog,
+        "--backlog",
+        min=1,
+        help="The largest number of pending connections the socket queues.",
+    ),
+    limit_concurrency: Optional[int] = typer.Option(
+        settings.limit_concurrency,
+        "--limit-concurrency",
+        min=1,
+        help="The number of concurrent connections per worker before 503 responses are sent.",
+    ),
+    timeout_keep_alive: int = typer.Option(
+        settings.timeout_keep_alive,
+        "--timeout-keep-alive",
+        min=0,
+        help="Seconds an idle keep-alive connection is held open.",
+    ),
+    limit_max_requests: Optional[int] = typer.Option(
+        settings.limit_max_requests,
+        "--limit-max-requests",
+        min=1,
+        help="The number of requests a worker serves before it is restarted.",
+    ),
 ) -> None:
     """
     Start the FastAPI server using uvicorn.
     This command starts the uvicorn server by referencing the FastAPI application
-    defined in the app module. It accepts parameters for host, port, reload, and a MongoDB URL.
+    defined in the app module. It accepts parameters for host, port, reload, a MongoDB URL,
+    and the process and connection options of uvicorn. Each worker process opens its own
+    MongoDB client when its application starts.
     Args:
         host (str): The hostname to bind the server to. Defaults to "localhost".
         port (int): The port on which to run the server. Defaults to 8000.
@@ -55,20 +124,281 @@ def start_server(
         mongodb_url (str): MongoDB connection string. Defaults to "mongodb://localhost:27017".
         db_name (str): The name of the database. Defaults to "test_db".
         origins (str): The origins of the API. Defaults to "*".
+        workers (int): The number of server processes. Defaults to 1.
+        loop (str): The event loop implementation. Defaults to "auto".
+        http (str): The HTTP/1.1 parser implementation. Defaults to "auto".
+        backlog (int): The largest number of pending connections. Defaults to 2048.
+        limit_concurrency (Optional[int]): The concurrency limit per worker. Defaults to None.
+        timeout_keep_alive (int): The keep-alive timeout in seconds. Defaults to 5.
+        limit_max_requests (Optional[int]): The requests served before a worker restarts.
+            Defaults to None.
     """
 
-    set_settings(
-        Settings(
-            host=host,
-            port=port,
-            reload=reload,
-            mongodb_url=mongodb_url,
-            db_name=db_name,
-            origins=origins,
-        )
+    new_settings = Settings.model_validate(
+        {
+            **settings.model_dump(),
+            "host": host,
+            "port": port,
+            "reload": reload,
+            "mongodb_url": mongodb_url,
+            "db_name": db_name,
+            "origins": origins,
+            "workers": workers,
+            "loop": loop,
+            "http": http,
+            "backlog": backlog,
+            "limit_concurrency": limit_concurrency,
+            "timeout_keep_alive": timeout_keep_alive,
+            "limit_max_requests": limit_max_requests,
+        }
     )
+    set_settings(new_settings)
+    # Worker processes rebuild their settings from the environment.
+    export_settings(new_settings)
+
+    # Import the server only when it is started, to keep the CLI quick to load.
+    import uvicorn
 
     # Start the uvicorn server with the specified parameters.
     uvicorn.run(
-        "app.app:app", reload=settings.reload, host=settings.host, port=settings.port
+        "app.app:app",
+        reload=new_settings.reload,
+        host=new_settings.host,
+        port=new_settings.port,
+        workers=new_settings.workers,
+        loop=new_settings.loop,
+        http=new_settings.http,
+        backlog=new_settings.backlog,
+        limit_concurrency=new_settings.limit_concurrency,
+        timeout_keep_alive=new_settings.timeout_keep_alive,
+        limit_max_requests=new_settings.limit_max_requests,
     )
+
+
+@app.command()
+def build_indexes(
+    mongodb_url: str = typer.Option(
+        settings.mongodb_url,
+        "--mongodb",
+        help="The URL of the MongoDB database.",
+    ),
+    db_name: str = typer.Option(
+        settings.db_name,
+        "--db-name",
+        help="The name of the database.",
+    ),
+) -> None:
+    """
+    Create the MongoDB indexes declared on the document models.
+    Run this once per deployment when the server starts with MONGODB_BUILD_INDEXES
+    disabled or in fast start mode, so no server process waits for the index build.
+    Args:
+        mongodb_url (str): MongoDB connection string. Defaults to "mongodb://localhost:27017".
+        db_name (str): The name of the database. Defaults to "test_db".
+    """
+
+    new_settings = Settings.model_validate(
+        {**settings.model_dump(), "mongodb_url": mongodb_url, "db_name": db_name}
+    )
+    set_settings(new_settings)
+    export_settings(new_settings)
+
+    # Import the database modules only after the settings are in place.
+    from app.mongo import build_indexes as build_mongo_indexes
+
+    asyncio.run(build_mongo_indexes())
+    typer.echo(f"Indexes built in database {db_name}")
+
+
+@app.command()
+def load_test(
+    url: Optional[str] = typer.Option(
+        None,
+        "--url",
+        help="The base URL of a live server; the application runs in process if omitted.",
+    ),
+    mix: Optional[str] = typer.Option(
+        None,
+        "--mix",
+        help="Operations and weights, e.g. get=5,list=3,create=1; defaults to a read-heavy mix.",
+    ),
+    concurrency: int = typer.Option(
+        10,
+        "--concurrency",
+        "-c",
+        min=1,
+        help="The number of requests sent at the same time.",
+    ),
+    duration: float = typer.Option(
+        10.0,
+        "--duration",
+        "-d",
+        min=0,
+        help="The number of seconds to send requests for.",
+    ),
+    seed: int = typer.Option(
+        0,
+        "--seed",
+        help="The seed of the random operation sequence.",
+    ),
+    products: int = typer.Option(
+        100,
+        "--products",
+        min=1,
+        help="The number of products created before the run.",
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="The file the JSON report is written to; printed if omitted.",
+    ),
+    mongodb_url: str = typer.Option(
+        settings.mongodb_url,
+        "--mongodb",
+        help="The URL of the MongoDB database, when running in process.",
+    ),
+    db_name: str = typer.Option(
+        settings.db_name,
+        "--db-name",
+        help="The name of the database, when running in process.",
+    ),
+    storage: str = typer.Option(
+        settings.storage_backend,
+        "--storage",
+        click_type=click.Choice(["mongo", "memory"]),
+        help="Where products are stored when running in process: mongo or memory.",
+    ),
+) -> None:
+    """
+    Load test the product API and report throughput and latency percentiles as JSON.
+    Every product route is driven with a weighted mix of operations by concurrent workers,
+    against a live server or against the application in process. The products the test
+    needs are created before it starts and deleted once it ends.
+    Args:
+        url (Optional[str]): The base URL of a live server. Defaults to None, in process.
+        mix (Optional[str]): The operations and their weights. Defaults to a read-heavy mix.
+        concurrency (int): The number of concurrent workers. Defaults to 10.
+        duration (float): The duration of the run in seconds. Defaults to 10.
+        seed (int): The seed of the random operation sequence. Defaults to 0.
+        products (int): The number of products created before the run. Defaults to 100.
+        output (Optional[str]): The report file. Defaults to None, printed.
+        mongodb_url (str): MongoDB connection string. Defaults to "mongodb://localhost:27017".
+        db_name (str): The name of the database. Defaults to "test_db".
+        storage (str): The storage backend, mongo or memory. Defaults to "mongo".
+    """
+
+    from app.loadtest import parse_mix, run_against_server, run_in_process
+
+    try:
+        weights = parse_mix(mix) if mix else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--mix")
+
+    options = {
+        "mix": weights,
+        "concurrency": concurrency,
+        "duration": duration,
+        "seed": seed,
+        "products": products,
+    }
+    if url:
+        report = asyncio.run(run_against_server(url, **options))
+    else:
+        new_settings = Settings.model_validate(
+            {
+                **settings.model_dump(),
+                "mongodb_url": mongodb_url,
+                "db_name": db_name,
+                "storage_backend": storage,
+            }
+        )
+        set_settings(new_settings)
+        export_settings(new_settings)
+        report = asyncio.run(run_in_process(**options))
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+    else:
+        typer.echo(text)
+
+
+@app.command()
+def benchmark(
+    select: Optional[str] = typer.Option(
+        None,
+        "--select",
+        "-k",
+        help="Only run benchmarks whose name contains this text.",
+    ),
+    repeat: int = typer.Option(
+        5,
+        "--repeat",
+        min=1,
+        help="The number of timed rounds of each benchmark.",
+    ),
+    save: Optional[str] = typer.Option(
+        None,
+        "--save",
+        help="Save the results as a baseline in this file, e.g. benchmarks/baseline.json.",
+    ),
+    compare: Optional[str] = typer.Option(
+        None,
+        "--compare",
+        help="Compare the results with the baseline in this file.",
+    ),
+    threshold: float = typer.Option(
+        0.25,
+        "--threshold",
+        min=0,
+        help="The largest allowed slowdown against the baseline, e.g. 0.25 for 25%.",
+    ),
+) -> None:
+    """
+    Run the microbenchmarks of the CPU hot paths.
+    The results are printed as JSON, saved as a baseline with --save, or compared with a
+    saved baseline with --compare, in which case the command fails when a benchmark is
+    slower than its baseline by more than the threshold.
+    Args:
+        select (Optional[str]): Only run matching benchmarks. Defaults to None, all.
+        repeat (int): The number of timed rounds of each benchmark. Defaults to 5.
+        save (Optional[str]): The baseline file to write. Defaults to None.
+        compare (Optional[str]): The baseline file to compare with. Defaults to None.
+        threshold (float): The largest allowed slowdown. Defaults to 0.25.
+    """
+
+    from app.benchmarks import compare as compare_results
+    from app.benchmarks import run_benchmarks, save_baseline
+
+    baseline = None
+    if compare:
+        with open(compare) as file:
+            baseline = json.load(file)["benchmarks"]
+
+    results = run_benchmarks(repeat=repeat, select=select)
+
+    if save:
+        save_baseline(results, save)
+        typer.echo(f"Baseline of {len(results)} benchmarks saved to {save}")
+    if baseline is None:
+        if not save:
+            typer.echo(json.dumps(results, indent=2))
+        return
+
+    rows = compare_results(results, baseline, threshold)
+    for row in rows:
+        status = "REGRESSION" if row["regression"] else "ok"
+        typer.echo(
+            f"{row['name']:<32} {row['baseline_us']:>14.3f}us "
+            f"{row['current_us']:>14.3f}us {row['ratio']:>7.2f}x  {status}"
+        )
+    regressions = [row["name"] for row in rows if row["regression"]]
+    if regressions:
+        typer.echo(
+            f"{len(regressions)} benchmarks slower than the baseline by more than "
+            f"{threshold:.0%}: {', '.join(regressions)}",
+            err=True,
+        )
+        raise typer.Exit(code=1)
@@ -1,8 +1,11 @@
 from functools import lru_cache
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.startup import startup_timer
+
 
 class Settings(BaseSettings):
     """
@@ -18,11 +21,68 @@ class Settings(BaseSettings):
         title="MongoDB URL",
         description="The URL of the MongoDB database.",
     )
+    mongodb_max_pool_size: int = Field(
+        default=100,
+        ge=0,
+        title="MongoDB Maximum Pool Size",
+        description="The largest number of connections the client keeps open per server (0 for no limit).",
+    )
+    mongodb_min_pool_size: int = Field(
+        default=0,
+        ge=0,
+        title="MongoDB Minimum Pool Size",
+        description="The number of connections the client keeps open even when idle.",
+    )
+    mongodb_max_idle_time_ms: Optional[int] = Field(
+        default=None,
+        gt=0,
+        title="MongoDB Maximum Idle Time",
+        description="Milliseconds a connection may stay idle in the pool before it is closed.",
+    )
+    mongodb_wait_queue_timeout_ms: Optional[int] = Field(
+        default=None,
+        gt=0,
+        title="MongoDB Wait Queue Timeout",
+        description="Milliseconds an operation may wait for a free connection before failing.",
+    )
+    mongodb_server_selection_timeout_ms: int = Field(
+        default=30000,
+        gt=0,
+        title="MongoDB Server Selection Timeout",
+        description="Milliseconds an operation may wait for a suitable server before failing.",
+    )
+    mongodb_build_indexes: bool = Field(
+        default=True,
+        title="MongoDB Build Indexes",
+        description="Create the declared indexes at startup (disable when they are managed separately).",
+    )
+    fast_start: bool = Field(
+        default=False,
+        title="Fast Start",
+        description="Serve requests before MongoDB is initialized and skip the index build at startup.",
+    )
+    mongodb_ping_timeout_seconds: float = Field(
+        default=2.0,
+        gt=0,
+        title="MongoDB Ping Timeout",
+        description="Seconds the readiness check waits for a ping before reporting MongoDB unavailable.",
+    )
+    mongodb_ready_timeout_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        title="MongoDB Ready Timeout",
+        description="Seconds a request waits for MongoDB initialization before a 503 response.",
+    )
     db_name: str = Field(
         default="test_db",
         title="Database Name",
         description="The name of the database.",
     )
+    storage_backend: Literal["mongo", "memory"] = Field(
+        default="mongo",
+        title="Storage Backend",
+        description="Where products are stored: mongo, or memory for an in-process store without a database.",
+    )
     origins: str = Field(
         default="*",
         title="Origins",
@@ -45,12 +105,188 @@ class Settings(BaseSettings):
         title="Reload",
         description="Enable or disable automatic reloading of the server.",
     )
+    workers: int = Field(
+        default=1,
+        ge=1,
+        title="Workers",
+        description="The number of server processes, each with its own MongoDB client (ignored with reload).",
+    )
+    loop: Literal["auto", "asyncio", "uvloop"] = Field(
+        default="auto",
+        title="Event Loop",
+        description="The event loop implementation (auto uses uvloop when installed).",
+    )
+    http: Literal["auto", "h11", "httptools"] = Field(
+        default="auto",
+        title="HTTP Protocol",
+        description="The HTTP/1.1 parser implementation (auto uses httptools when installed).",
+    )
+    backlog: int = Field(
+        default=2048,
+        gt=0,
+        title="Backlog",
+        description="The largest number of pending connections the socket queues.",
+    )
+    limit_concurrency: Optional[int] = Field(
+        default=None,
+        gt=0,
+        title="Concurrency Limit",
+        description="The number of concurrent connections and tasks per worker before 503 responses are sent.",
+    )
+    timeout_keep_alive: int = Field(
+        default=5,
+        ge=0,
+        title="Keep-Alive Timeout",
+        description="Seconds an idle keep-alive connection is held open.",
+    )
+    limit_max_requests: Optional[int] = Field(
+        default=None,
+        gt=0,
+        title="Maximum Requests",
+        description="The number of requests a worker serves before it is restarted.",
+    )
+    page_size: int = Field(
+        default=100,
+        gt=0,
+        title="Page Size",
+        description="The number of products returned per page when no limit is given.",
+    )
+    max_page_size: int = Field(
+        default=1000,
+        gt=0,
+        title="Maximum Page Size",
+        description="The largest number of products returned in a single page.",
+    )
+    export_batch_size: int = Field(
+        default=500,
+        gt=0,
+        title="Export Batch Size",
+        description="The number of products fetched per round trip when exporting.",
+    )
+    bulk_chunk_size: int = Field(
+        default=1000,
+        gt=0,
+        title="Bulk Chunk Size",
+        description="The number of products written per round trip in bulk operations.",
+    )
+    bulk_max_items: int = Field(
+        default=10000,
+        gt=0,
+        title="Bulk Maximum Items",
+        description="The largest number of products accepted by a bulk request.",
+    )
+    cache_enabled: bool = Field(
+        default=False,
+        title="Cache Enabled",
+        description="Enable or disable the in-process cache of product lookups.",
+    )
+    cache_max_size: int = Field(
+        default=10000,
+        ge=0,
+        title="Cache Maximum Size",
+        description="The largest number of products kept in the cache.",
+    )
+    cache_ttl_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        title="Cache TTL",
+        description="Seconds a cached product is served before it is read again.",
+    )
+    cache_negative_ttl_seconds: float = Field(
+        default=5.0,
+        ge=0,
+        title="Cache Negative TTL",
+        description="Seconds a lookup of a missing product is remembered.",
+    )
+    stats_cache_ttl_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        title="Statistics Cache TTL",
+        description="Seconds computed product statistics are served before they are recomputed.",
+    )
+    stats_price_buckets: list[float] = Field(
+        default=[0, 10, 50, 100, 500, 1000, 5000, 10000, 100000],
+        min_length=2,
+        title="Statistics Price Buckets",
+        description="Ascending boundaries of the price histogram ranges.",
+    )
+    fast_json_responses: bool = Field(
+        default=True,
+        title="Fast JSON Responses",
+        description="Serialize product responses directly instead of re-validating them against the response schemas.",
+    )
+    lean_reads: bool = Field(
+        default=False,
+        title="Lean Reads",
+        description="Serve product lists and exports from raw documents without building Product documents.",
+    )
+    lean_reads_validate: bool = Field(
+        default=False,
+        title="Validate Lean Reads",
+        description="Validate every raw document read in lean mode, for debugging.",
+    )
+    slow_query_ms: Optional[float] = Field(
+        default=100.0,
+        gt=0,
+        title="Slow Query Threshold",
+        description="Milliseconds after which a MongoDB command is logged as slow (unset to disable).",
+    )
+    query_profiler_enabled: bool = Field(
+        default=False,
+        title="Query Profiler",
+        description="Aggregate the time of every MongoDB command by query shape.",
+    )
+    query_profiler_max_shapes: int = Field(
+        default=1000,
+        gt=0,
+        title="Query Profiler Maximum Shapes",
+        description="The number of query shapes kept; the one with the least total time is evicted first.",
+    )
+    server_timing: bool = Field(
+        default=False,
+        title="Server-Timing Header",
+        description="Send a Server-Timing header breaking down the time spent on each request.",
+    )
+    profiler_token: Optional[str] = Field(
+        default=None,
+        title="Profiler Token",
+        description="Secret that requests send in the X-Profile header to be profiled (unset to disable).",
+    )
+    profiler_dir: str = Field(
+        default="profiles",
+        title="Profiler Directory",
+        description="The directory request profiles are written to.",
+    )
+    profiler_format: Literal["pstats", "collapsed"] = Field(
+        default="pstats",
+        title="Profiler Format",
+        description="pstats for a cProfile profile, or collapsed for sampled stacks for flame graphs.",
+    )
+    profiler_sample_interval_ms: float = Field(
+        default=1.0,
+        gt=0,
+        title="Profiler Sample Interval",
+        description="Milliseconds between two stack samples in the collapsed format.",
+    )
+    profiler_min_interval_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        title="Profiler Rate Limit",
+        description="Least number of seconds between two profiled requests.",
+    )
+    debug_endpoints: bool = Field(
+        default=False,
+        title="Debug Endpoints",
+        description="Serve the /debug endpoints, which expose internal diagnostics.",
+    )
 
     # Load settings from a .env file.
     model_config = SettingsConfigDict(env_file=".env")
 
 
+startup_timer.mark("imports")
 settings = Settings()
+startup_timer.mark("settings")
 
 
 def set_settings(new_settings: Settings) -> None:
@@ -0,0 +1,61 @@
+"""
+Module for debug endpoints.
+
+These endpoints expose internal diagnostics of the current process. They answer
+404 Not Found unless debug endpoints are enabled in the settings.
+"""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+import app.schemas as Schemas
+from app.config import get_settings
+from app.monitoring import query_profiler
+
+# Retrieve application settings which include the debug endpoint switch.
+SETTINGS = get_settings()
+
+
+async def debug_enabled_dependency() -> None:
+    """
+    Hide the debug endpoints unless they are enabled.
+
+    Raises:
+        HTTPException: A 404 error when debug endpoints are disabled.
+    """
+    if not SETTINGS.debug_endpoints:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+router = APIRouter(dependencies=[Depends(debug_enabled_dependency)])
+
+
+@router.get("/query-shapes", response_model=Schemas.QueryShapesResponse)
+async def get_query_shapes(
+    limit: int = Query(20, ge=1, description="The number of query shapes to return."),
+) -> dict[str, Any]:
+    """
+    Retrieve the MongoDB query shapes that took the most total time.
+
+    Shapes are collected while the query profiler is enabled. Every value from the
+    commands is redacted, leaving the command, collection, operators and fields.
+
+    Args:
+        limit (int): The number of query shapes to return.
+
+    Returns:
+        Schemas.QueryShapesResponse: The slowest query shapes and whether the profiler is on.
+    """
+    return {
+        "profiler_enabled": SETTINGS.query_profiler_enabled,
+        "shapes": query_profiler.top(limit),
+    }
+
+
+@router.delete("/query-shapes", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_shapes() -> None:
+    """
+    Forget the collected query shapes, for example before a load test.
+    """
+    query_profiler.reset()
@@ -4,8 +4,16 @@ from functools import wraps
 from beanie import PydanticObjectId
 from fastapi import HTTPException
 
+from app.cache import product_cache
+from app.config import get_settings
 from app.documents import Product
-from app.exceptions import APIException, ProductNotFound
+from app.exceptions import APIException, ProductNotFound, ServiceUnavailable
+from app.mongo import wait_mongo_ready
+from app.repository import get_repository
+from app.timing import timed
+
+# Retrieve application settings which include the cache configuration.
+SETTINGS = get_settings()
 
 
 @typing.no_type_check
@@ -43,6 +51,8 @@ async def product_dependency(product_id: PydanticObjectId) -> Product:
     This dependency function is used in route dependency injection to ensure that the
     product exists before further processing. If the product is not found, it raises a
     ProductNotFound exception, which is then converted to an HTTPException by the decorator.
+    When caching is enabled, found and missing products are answered from the in-process
+    cache until their entry expires or a write action invalidates it.
 
     Args:
         product_id (PydanticObjectId): The unique identifier for the product.
@@ -53,9 +63,61 @@ async def product_dependency(product_id: PydanticObjectId) -> Product:
     Returns:
         Product: The retrieved product document.
     """
-    product: Product | None = await Product.get(product_id)
+    product: Product | None
+    # Report the lookup as the fetch time of the Server-Timing header.
+    with timed("fetch"):
+        if SETTINGS.cache_enabled:
+            cached, product = product_cache.get(product_id)
+            if not cached:
+                # A write landing during the read must not leave it cached.
+                generation = product_cache.generation
+                product = await get_repository().get(product_id)
+                product_cache.set(product_id, product, generation)
+        else:
+            product = await get_repository().get(product_id)
 
     if not product:
         raise ProductNotFound(product_id)
 
     return product
+
+
+@http_request_dependency
+async def product_id_dependency(product_id: PydanticObjectId) -> PydanticObjectId:
+    """
+    Return a validated product ID without loading the product.
+
+    This is the lightweight counterpart of product_dependency for routes that act on a
+    product by ID alone, such as atomic updates and deletes. Those routes report a
+    missing product themselves from the result of their single database operation,
+    which saves the round trip spent fetching a document they would not use.
+
+    Args:
+        product_id (PydanticObjectId): The unique identifier for the product.
+
+    Returns:
+        PydanticObjectId: The validated product ID.
+    """
+    return product_id
+
+
+@http_request_dependency
+async def mongo_ready_dependency() -> None:
+    """
+    Wait for MongoDB to be initialized before handling a request.
+
+    This is the readiness gate of fast start mode, where MongoDB is initialized in the
+    background after the server starts. Requests arriving before the initialization
+    finishes wait for it, up to the configured timeout. Without fast start, or with
+    the in-memory storage backend, it returns immediately.
+
+    Raises:
+        ServiceUnavailable: If MongoDB is not ready within the timeout.
+    """
+    if SETTINGS.storage_backend == "memory":
+        return
+
+    try:
+        await wait_mongo_ready(SETTINGS.mongodb_ready_timeout_seconds)
+    except Exception:
+        raise ServiceUnavailable("Database is not ready")
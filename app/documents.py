@@ -6,6 +6,7 @@ to define the schema of documents stored in the MongoDB collection.
 """
 
 from beanie import Document
+from pymongo import ASCENDING, TEXT, IndexModel
 
 from app.models import Product as ProductModel
 
@@ -22,7 +23,36 @@ class Product(Document, ProductModel):
         """
         Beanie settings for the Product document.
 
-        Specifies the MongoDB collection name where Product documents are stored.
+        Specifies the MongoDB collection name where Product documents are stored,
+        and the indexes backing the filtered and sorted product listings. Each sort
+        index ends with _id, the tie-breaker of keyset pagination, so every page is
+        read with a single index range scan. The weighted text index backs product
+        search and ranks matches in the name above the descriptions.
         """
 
         name = "products"
+        indexes = [
+            IndexModel(
+                [("category.name", ASCENDING), ("_id", ASCENDING)],
+                name="category_name",
+            ),
+            IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price"),
+            IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name"),
+            IndexModel(
+                [
+                    ("category.name", ASCENDING),
+                    ("price", ASCENDING),
+                    ("_id", ASCENDING),
+                ],
+                name="category_name_price",
+            ),
+            IndexModel(
+                [
+                    ("name", TEXT),
+                    ("description", TEXT),
+                    ("category.description", TEXT),
+                ],
+                weights={"name": 10, "description": 3, "category.description": 1},
+                name="product_text",
+            ),
+        ]
@@ -53,3 +53,60 @@ class ProductNotFound(APIException):
             code=status.HTTP_404_NOT_FOUND,
             detail=f"Product with ID {product_id} not found",
         )
+
+
+class InvalidCursor(APIException):
+    """
+    Exception raised when a pagination cursor cannot be decoded (HTTP 400).
+
+    Inherits from APIException and provides a message including the rejected cursor.
+    """
+
+    def __init__(self, cursor: str):
+        # Initialize with HTTP 400 status code and a message specifying the bad cursor.
+        super().__init__(
+            code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor {cursor}",
+        )
+
+
+class NotAcceptable(APIException):
+    """
+    Exception raised when no supported media type satisfies the Accept header (HTTP 406).
+
+    Inherits from APIException and lists the media types the endpoint can produce.
+    """
+
+    def __init__(self, accept: str, supported: list[str]):
+        # Initialize with HTTP 406 status code and a message listing the supported types.
+        super().__init__(
+            code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Cannot produce {accept}, supported types: {', '.join(supported)}",
+        )
+
+
+class InvalidFields(APIException):
+    """
+    Exception raised when a sparse fieldset names unknown fields (HTTP 400).
+
+    Inherits from APIException and lists the fields that may be requested.
+    """
+
+    def __init__(self, fields: list[str], allowed: list[str]):
+        # Initialize with HTTP 400 status code and a message listing the allowed fields.
+        super().__init__(
+            code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {', '.join(fields)}, allowed fields: {', '.join(allowed)}",
+        )
+
+
+class ServiceUnavailable(APIException):
+    """
+    Exception raised when a required service is not ready yet (HTTP 503).
+
+    Inherits from APIException and provides a message describing what is unavailable.
+    """
+
+    def __init__(self, detail: str):
+        # Initialize with HTTP 503 status code and the provided message.
+        super().__init__(code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
@@ -0,0 +1,116 @@
+"""
+Module for streaming product exports.
+
+This module turns an asynchronous stream of product payloads into NDJSON or CSV
+text, one line per product, so a full catalog export can be written to the client
+as it is read from MongoDB without ever holding the whole collection in memory.
+Payloads are JSON compatible dictionaries shaped like the product response schema,
+built either from Product documents or directly from raw documents.
+"""
+
+import csv
+import io
+from typing import Any, AsyncIterator
+
+import pydantic_core
+
+from app.exceptions import NotAcceptable
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Column order of the CSV export.
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "description",
+    "price",
+    "category_name",
+    "category_description",
+]
+
+
+def negotiate_export_format(accept: str | None) -> str:
+    """
+    Choose the export media type from the Accept header.
+
+    NDJSON is used when the client does not state a preference.
+
+    Args:
+        accept (str | None): The value of the request's Accept header.
+
+    Raises:
+        NotAcceptable: If the client accepts neither NDJSON nor CSV.
+
+    Returns:
+        str: The media type of the export.
+    """
+    if not accept:
+        return NDJSON_MEDIA_TYPE
+
+    # Keep only the media ranges, dropping parameters such as q-values.
+    media_ranges = [part.split(";")[0].strip() for part in accept.split(",")]
+    for media_range in media_ranges:
+        if media_range in (NDJSON_MEDIA_TYPE, "application/json"):
+            return NDJSON_MEDIA_TYPE
+        if media_range == CSV_MEDIA_TYPE:
+            return CSV_MEDIA_TYPE
+        if media_range in ("*/*", "application/*"):
+            return NDJSON_MEDIA_TYPE
+        if media_range == "text/*":
+            return CSV_MEDIA_TYPE
+
+    raise NotAcceptable(accept, [NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE])
+
+
+async def ndjson_lines(
+    products: AsyncIterator[dict[str, Any]],
+) -> AsyncIterator[str]:
+    """
+    Serialize each product as one line of JSON.
+
+    Args:
+        products (AsyncIterator[dict[str, Any]]): The product payloads to serialize.
+
+    Yields:
+        str: One newline terminated JSON object per product.
+    """
+    async for product in products:
+        yield pydantic_core.to_json(product).decode() + "\n"
+
+
+async def csv_lines(products: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Serialize each product as one CSV row, preceded by a header row.
+
+    Args:
+        products (AsyncIterator[dict[str, Any]]): The product payloads to serialize.
+
+    Yields:
+        str: The header row followed by one row per product.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        # Hand back what the writer produced and reset the buffer for the next row.
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+
+    async for product in products:
+        writer.writerow(
+            [
+                product["id"],
+                product["name"],
+                product["description"],
+                product["price"],
+                product["category"]["name"],
+                product["category"]["description"],
+            ]
+        )
+        yield flush()
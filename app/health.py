@@ -0,0 +1,84 @@
+"""
+Module for the liveness and readiness endpoints.
+
+These endpoints are meant for orchestrators. They are mounted outside the product
+routes, so they skip the readiness gate and never touch the product collection.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+import app.schemas as Schemas
+from app.config import get_settings
+from app.monitoring import pool_stats
+from app.mongo import get_client, mongo_ready
+
+# Retrieve application settings which include the ping timeout.
+SETTINGS = get_settings()
+
+router = APIRouter()
+
+
+@router.get("/healthz", response_model=Schemas.HealthResponse)
+async def healthz() -> dict[str, str]:
+    """
+    Report that the process is alive.
+
+    This endpoint does no I/O, so it answers as long as the event loop runs.
+
+    Returns:
+        Schemas.HealthResponse: The status 'ok'.
+    """
+    return {"status": "ok"}
+
+
+@router.get(
+    "/readyz",
+    response_model=Schemas.ReadinessResponse,
+    responses={503: {"model": Schemas.ReadinessResponse}},
+)
+async def readyz() -> dict[str, Any] | JSONResponse:
+    """
+    Report whether the application can serve requests.
+
+    The application is ready once MongoDB is initialized and answers a ping within
+    the configured timeout. The ping's round trip time and the connection pool counts
+    are reported either way, so a slow database can be told apart from a dead one.
+    With the in-memory storage backend the application is always ready.
+
+    Returns:
+        Schemas.ReadinessResponse: The readiness, with status code 503 when not ready.
+    """
+    pool = {"max_size": SETTINGS.mongodb_max_pool_size, **pool_stats.snapshot()}
+    if SETTINGS.storage_backend == "memory":
+        # Products are kept in process, so there is no database to wait for.
+        return {"status": "ok", "ping_ms": None, "pool": pool, "error": None}
+    if not mongo_ready():
+        return JSONResponse(
+            {"status": "starting", "ping_ms": None, "pool": pool, "error": None},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            get_client().admin.command("ping"), SETTINGS.mongodb_ping_timeout_seconds
+        )
+    except Exception as e:
+        # Report the failure instead of raising, so the body explains it.
+        return JSONResponse(
+            {
+                "status": "unavailable",
+                "ping_ms": None,
+                "pool": pool,
+                "error": str(e) or type(e).__name__,
+            },
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    ping_ms = (time.perf_counter() - started) * 1000
+
+    return {"status": "ok", "ping_ms": round(ping_ms, 3), "pool": pool, "error": None}
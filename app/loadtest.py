@@ -0,0 +1,458 @@
+"""
+Module for load testing the product API.
+
+The load test drives every product route with a weighted mix of operations from a
+number of concurrent workers for a fixed duration, and reports the throughput,
+error rate and latency percentiles of each route as JSON. It runs against a live
+server over HTTP, or in process through httpx's ASGI transport, in which case no
+network or server is needed besides the configured database.
+
+Every worker draws its operations from its own random generator, seeded from the
+run's seed, so two runs with the same seed send the same sequence of operations
+from each worker. The products the run needs are created before it starts and
+deleted once it ends.
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+# Categories of the products created by the load test.
+CATEGORIES = ("Phones", "Accessories", "Laptops", "Tablets")
+
+# Operations and their weights when no mix is given, mostly reads.
+DEFAULT_MIX: dict[str, float] = {
+    "get": 40,
+    "list": 20,
+    "search": 5,
+    "stats": 5,
+    "export": 1,
+    "create": 10,
+    "update": 10,
+    "delete": 5,
+    "bulk_create": 2,
+    "bulk_update": 1,
+    "bulk_delete": 1,
+}
+
+# Number of products sent in each bulk request.
+BULK_SIZE = 10
+
+
+class LoadTestState:
+    """
+    The products a load test works on.
+
+    Seeded products are read and updated but never deleted during the run. Products
+    created during the run are the ones deleted by the delete operations.
+    """
+
+    def __init__(self) -> None:
+        self.seeded: list[str] = []
+        self.created: list[str] = []
+        self.names: list[str] = []
+
+
+def product_payload(rng: random.Random) -> dict[str, Any]:
+    """
+    Build a valid random product.
+
+    Args:
+        rng (random.Random): The random generator of the worker.
+
+    Returns:
+        dict[str, Any]: The product creation payload.
+    """
+    return {
+        "name": f"lt-{rng.randrange(10**8)}",
+        "description": "Load test product",
+        "price": rng.randrange(1, 1000) + 0.99,
+        "category": {"name": rng.choice(CATEGORIES)},
+    }
+
+
+def _created_ids(response: httpx.Response) -> list[str]:
+    # IDs of the products a single or bulk create response reports.
+    if response.status_code >= 400:
+        return []
+    body = response.json()
+    if "results" in body:
+        return [result["id"] for result in body["results"] if result.get("id")]
+    return [body["id"]]
+
+
+async def _take_created(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random, count: int
+) -> list[str]:
+    # Products to delete, created first when the run has not created enough yet.
+    while len(state.created) < count:
+        response = await client.post(
+            "/products/bulk",
+            json=[product_payload(rng) for _ in range(count - len(state.created))],
+        )
+        response.raise_for_status()
+        state.created.extend(_created_ids(response))
+    taken = state.created[-count:]
+    del state.created[-count:]
+    return taken
+
+
+# Builds the request of an operation. Setup requests it sends are not measured.
+RequestBuilder = Callable[
+    [httpx.AsyncClient, LoadTestState, random.Random], Awaitable[httpx.Request]
+]
+
+
+class Operation:
+    """
+    One kind of request sent by the load test.
+    """
+
+    def __init__(
+        self,
+        route: str,
+        build: RequestBuilder,
+        creates: bool = False,
+    ):
+        # Method and route template the results are reported under.
+        self.route = route
+        # Coroutine function that builds the request to send.
+        self.build = build
+        # Whether the products the response reports were created by the request.
+        self.creates = creates
+
+
+async def _get(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    return client.build_request("GET", f"/products/{rng.choice(state.seeded)}")
+
+
+async def _list(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    params: dict[str, Any] = {
+        "limit": 20,
+        "sort": rng.choice(["id", "price", "-price", "name"]),
+    }
+    if rng.random() < 0.5:
+        params["category"] = rng.choice(CATEGORIES)
+    return client.build_request("GET", "/products/", params=params)
+
+
+async def _search(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    params: dict[str, Any] = {"q": rng.choice(state.names), "limit": 20}
+    return client.build_request("GET", "/products/search", params=params)
+
+
+async def _stats(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    return client.build_request("GET", "/products/stats")
+
+
+async def _export(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    return client.build_request("GET", "/products/export")
+
+
+async def _create(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    return client.build_request("POST", "/products/", json=product_payload(rng))
+
+
+async def _update(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    body = {"price": rng.randrange(1, 1000) + 0.99}
+    return client.build_request(
+        "PATCH", f"/products/{rng.choice(state.seeded)}", json=body
+    )
+
+
+async def _delete(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    (product_id,) = await _take_created(client, state, rng, 1)
+    return client.build_request("DELETE", f"/products/{product_id}")
+
+
+async def _bulk_create(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    body = [product_payload(rng) for _ in range(BULK_SIZE)]
+    return client.build_request("POST", "/products/bulk", json=body)
+
+
+async def _bulk_update(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    body = [
+        {"id": product_id, "price": rng.randrange(1, 1000) + 0.99}
+        for product_id in rng.sample(state.seeded, min(BULK_SIZE, len(state.seeded)))
+    ]
+    return client.build_request("PATCH", "/products/bulk", json=body)
+
+
+async def _bulk_delete(
+    client: httpx.AsyncClient, state: LoadTestState, rng: random.Random
+) -> httpx.Request:
+    body = await _take_created(client, state, rng, BULK_SIZE)
+    return client.build_request("DELETE", "/products/bulk", json=body)
+
+
+# Operations by the name used in a mix.
+OPERATIONS = {
+    "get": Operation("GET /products/{product_id}", _get),
+    "list": Operation("GET /products/", _list),
+    "search": Operation("GET /products/search", _search),
+    "stats": Operation("GET /products/stats", _stats),
+    "export": Operation("GET /products/export", _export),
+    "create": Operation("POST /products/", _create, creates=True),
+    "update": Operation("PATCH /products/{product_id}", _update),
+    "delete": Operation("DELETE /products/{product_id}", _delete),
+    "bulk_create": Operation("POST /products/bulk", _bulk_create, creates=True),
+    "bulk_update": Operation("PATCH /products/bulk", _bulk_update),
+    "bulk_delete": Operation("DELETE /products/bulk", _bulk_delete),
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """
+    Parse an operation mix such as 'get=5,list=3,create=1'.
+
+    Args:
+        mix (str): Comma separated operation names and weights.
+
+    Raises:
+        ValueError: If an operation is unknown or a weight is not a positive number.
+
+    Returns:
+        dict[str, float]: The weight of each operation.
+    """
+    weights: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(
+                f"Unknown operation {name}, operations: {', '.join(OPERATIONS)}"
+            )
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight {weight} for operation {name}")
+        if not weights[name] > 0:
+            raise ValueError(f"Invalid weight {weight} for operation {name}")
+    if not weights:
+        raise ValueError("The mix names no operation")
+    return weights
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Return a percentile of sorted values with the nearest-rank method.
+
+    Args:
+        values (list[float]): The values, sorted in ascending order.
+        q (float): The percentile, from 0 to 100.
+
+    Returns:
+        float: The smallest value at or above q percent of the values, or 0 if there
+            are none.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class RouteResult:
+    """
+    The outcome of the requests sent to one route.
+    """
+
+    def __init__(self) -> None:
+        # Requests sent, including those that failed before a response arrived.
+        self.attempts = 0
+        # Latency of every request that received a response, in seconds.
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        """
+        Summarize the requests of the route.
+
+        Requests that failed without a response count towards the request count
+        and error rate, but have no latency.
+
+        Args:
+            elapsed (float): The duration of the run, in seconds.
+
+        Returns:
+            dict[str, Any]: The request count, throughput, error rate and latency
+                percentiles in milliseconds.
+        """
+        latencies = sorted(self.latencies)
+        requests = self.attempts
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "error_rate": self.errors / requests if requests else 0.0,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p50": percentile(latencies, 50) * 1000,
+                "p95": percentile(latencies, 95) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": latencies[-1] * 1000 if latencies else 0.0,
+            },
+        }
+
+
+async def _delete_all(client: httpx.AsyncClient, product_ids: list[str]) -> None:
+    # Remove the products of the run in bulk requests.
+    for start in range(0, len(product_ids), 1000):
+        await client.request(
+            "DELETE", "/products/bulk", json=product_ids[start : start + 1000]
+        )
+
+
+async def run_load_test(
+    client: httpx.AsyncClient,
+    mix: Optional[dict[str, float]] = None,
+    concurrency: int = 10,
+    duration: float = 10.0,
+    seed: int = 0,
+    products: int = 100,
+) -> dict[str, Any]:
+    """
+    Run a load test with an HTTP client.
+
+    Args:
+        client (httpx.AsyncClient): The client, with the server as its base URL.
+        mix (Optional[dict[str, float]]): The weight of each operation, or None for
+            the default mix.
+        concurrency (int): The number of workers sending requests at the same time.
+        duration (float): The number of seconds workers start new requests for.
+        seed (int): The seed of the random generators.
+        products (int): The number of products created before the run.
+
+    Raises:
+        httpx.HTTPStatusError: If the products of the run cannot be created.
+
+    Returns:
+        dict[str, Any]: The report, with the totals and the results of every route.
+    """
+    mix = mix or DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    rng = random.Random(seed)
+    state = LoadTestState()
+
+    # Create the products the run reads and updates.
+    seeds = [product_payload(rng) for _ in range(max(products, 1))]
+    for start in range(0, len(seeds), 1000):
+        response = await client.post("/products/bulk", json=seeds[start : start + 1000])
+        response.raise_for_status()
+        state.seeded.extend(_created_ids(response))
+    state.names = [product["name"] for product in seeds]
+
+    results = {OPERATIONS[name].route: RouteResult() for name in names}
+    total = RouteResult()
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        worker_rng = random.Random(f"{seed}-{index}")
+        while time.perf_counter() < deadline:
+            operation = OPERATIONS[worker_rng.choices(names, weights)[0]]
+            request = await operation.build(client, state, worker_rng)
+            result = results[operation.route]
+            result.attempts += 1
+            total.attempts += 1
+            started = time.perf_counter()
+            try:
+                response = await client.send(request)
+            except httpx.HTTPError:
+                result.errors += 1
+                total.errors += 1
+                continue
+            latency = time.perf_counter() - started
+            result.latencies.append(latency)
+            total.latencies.append(latency)
+            if response.status_code >= 400:
+                result.errors += 1
+                total.errors += 1
+            elif operation.creates:
+                state.created.extend(_created_ids(response))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    await _delete_all(client, state.seeded + state.created)
+
+    return {
+        "seed": seed,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "mix": mix,
+        "total": total.report(elapsed),
+        "routes": {route: result.report(elapsed) for route, result in results.items()},
+    }
+
+
+async def run_in_process(**options: Any) -> dict[str, Any]:
+    """
+    Run a load test against the application in this process.
+
+    Requests go through httpx's ASGI transport, so no server is started. The
+    application connects to the database in the current settings, unless products
+    are stored in memory, which measures everything but the database.
+
+    Args:
+        **options (Any): The options of run_load_test.
+
+    Returns:
+        dict[str, Any]: The report of run_load_test.
+    """
+    # Import the application only once the settings are in place.
+    from app.app import SETTINGS, app
+    from app.mongo import close_mongo, init_mongo
+
+    use_mongo = SETTINGS.storage_backend == "mongo"
+    if use_mongo:
+        await init_mongo()
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest"
+        ) as client:
+            return await run_load_test(client, **options)
+    finally:
+        if use_mongo:
+            await close_mongo()
+
+
+async def run_against_server(url: str, **options: Any) -> dict[str, Any]:
+    """
+    Run a load test against a live server.
+
+    Args:
+        url (str): The base URL of the server, such as http://localhost:8000.
+        **options (Any): The options of run_load_test.
+
+    Returns:
+        dict[str, Any]: The report of run_load_test.
+    """
+    concurrency = options.get("concurrency", 10)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_load_test(client, **options)
@@ -0,0 +1,350 @@
+"""
+Module for the in-memory product repository.
+
+Products are kept in this process as raw documents, shaped as MongoDB stores them,
+in a dictionary by ID. Every field products can be sorted by has a sorted index of
+(value, ID) pairs, so a page is found by a binary search for the position of the
+previous page followed by a scan in index order, like an index range scan in
+MongoDB. Documents are copied on the way in and out, so callers never share them
+with the store.
+
+Text search scans every product and ranks matches by weighted word counts, which
+approximates MongoDB's text index without its stemming and stop words.
+Nothing is persisted, and each process has its own products, so this backend is
+meant for load tests of the layers above the database and for tests.
+"""
+
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from copy import deepcopy
+from itertools import islice
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from beanie import PydanticObjectId
+
+from app.documents import Product
+from app.models import Category
+from app.models import Product as ProductModel
+from app.repository import (
+    SORT_KEYS,
+    Projection,
+    ProductQuery,
+    ProductRepository,
+    RawDocument,
+)
+
+# Weights of the searched fields, as in the text index declared on Product.
+SEARCH_WEIGHTS: dict[str, int] = {
+    "name": 10,
+    "description": 3,
+    "category.description": 1,
+}
+
+# An ID above every other, used to bound index ranges by value alone.
+_MAX_ID = PydanticObjectId("f" * 24)
+
+
+def _value(document: RawDocument, path: str) -> Any:
+    # Read a possibly nested field, such as category.name.
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _words(text: Any) -> list[str]:
+    return re.findall(r"\w+", text.lower()) if isinstance(text, str) else []
+
+
+def project(document: RawDocument, projection: Projection) -> RawDocument:
+    """
+    Copy the fields of a document selected by a MongoDB inclusion projection.
+
+    Args:
+        document (RawDocument): The stored document.
+        projection (Projection): The fields to copy, or None for every field. The ID
+            is always copied.
+
+    Returns:
+        RawDocument: The copied fields.
+    """
+    if projection is None:
+        return deepcopy(document)
+
+    projected: RawDocument = {"_id": document["_id"]}
+    for path in projection:
+        head, _, rest = path.partition(".")
+        if head not in document:
+            continue
+        if not rest:
+            projected[head] = deepcopy(document[head])
+        elif isinstance(document[head], dict) and rest in document[head]:
+            projected.setdefault(head, {})[rest] = deepcopy(document[head][rest])
+    return projected
+
+
+def to_product(document: RawDocument) -> Product:
+    """
+    Build a Product document from a stored document.
+
+    Stored documents were validated when they were written, so the Product is
+    constructed without validating it again, as Beanie is not initialized.
+
+    Args:
+        document (RawDocument): The stored document.
+
+    Returns:
+        Product: The product.
+    """
+    fields = {key: value for key, value in document.items() if key != "_id"}
+    if isinstance(fields.get("category"), dict):
+        fields["category"] = Category.model_construct(**fields["category"])
+    return Product.model_construct(id=document["_id"], **fields)
+
+
+class MemoryProductRepository(ProductRepository):
+    """
+    Products stored in this process, with sorted indexes for listings.
+    """
+
+    def __init__(self) -> None:
+        # Documents by ID.
+        self._documents: dict[PydanticObjectId, RawDocument] = {}
+        # Sorted (value, ID) pairs of each sortable field.
+        self._indexes: dict[str, list[tuple[Any, PydanticObjectId]]] = {
+            field: [] for field in SORT_KEYS
+        }
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _index(self, document: RawDocument) -> None:
+        for field, path in SORT_KEYS.items():
+            insort(self._indexes[field], (_value(document, path), document["_id"]))
+
+    def _unindex(self, document: RawDocument) -> None:
+        for field, path in SORT_KEYS.items():
+            index = self._indexes[field]
+            position = bisect_left(index, (_value(document, path), document["_id"]))
+            del index[position]
+
+    def _store(self, product_id: PydanticObjectId, product: ProductModel) -> None:
+        document: RawDocument = {"_id": product_id, **product.model_dump()}
+        self._documents[product_id] = document
+        self._index(document)
+
+    def _matches(self, document: RawDocument, query: ProductQuery) -> bool:
+        if query.category is not None and (
+            _value(document, "category.name") != query.category
+        ):
+            return False
+        price = document.get("price")
+        if query.min_price is not None and not (
+            price is not None and price >= query.min_price
+        ):
+            return False
+        if query.max_price is not None and not (
+            price is not None and price <= query.max_price
+        ):
+            return False
+        return True
+
+    def _select(self, query: ProductQuery, limit: int) -> Iterator[RawDocument]:
+        """
+        Find the documents of a query in index order.
+
+        Args:
+            query (ProductQuery): The selection, sort order and position.
+            limit (int): The largest number of documents to find.
+
+        Yields:
+            RawDocument: The stored documents, not copied.
+        """
+        index = self._indexes[query.sort]
+        start, end = 0, len(index)
+
+        # Skip to the position of the previous page.
+        if query.after is not None:
+            if query.descending:
+                end = bisect_left(index, query.after)
+            else:
+                start = bisect_right(index, query.after)
+
+        # A price range sorted by price is itself a range of the index.
+        if query.sort == "price":
+            if query.min_price is not None:
+                start = max(start, bisect_left(index, (query.min_price,)))
+            if query.max_price is not None:
+                end = min(end, bisect_right(index, (query.max_price, _MAX_ID)))
+
+        positions = (
+            range(end - 1, start - 1, -1) if query.descending else range(start, end)
+        )
+        found = (self._documents[index[position][1]] for position in positions)
+        yield from islice(
+            (document for document in found if self._matches(document, query)), limit
+        )
+
+    async def get(self, product_id: PydanticObjectId) -> Optional[Product]:
+        document = self._documents.get(product_id)
+        return to_product(document) if document is not None else None
+
+    async def get_document(
+        self, product_id: PydanticObjectId, projection: Projection
+    ) -> Optional[RawDocument]:
+        document = self._documents.get(product_id)
+        return project(document, projection) if document is not None else None
+
+    async def find(self, query: ProductQuery, limit: int) -> list[Product]:
+        return [to_product(document) for document in self._select(query, limit)]
+
+    async def find_documents(
+        self, query: ProductQuery, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        return [
+            project(document, projection) for document in self._select(query, limit)
+        ]
+
+    async def search(
+        self, text: str, offset: int, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        terms = set(_words(text))
+        scored = []
+        for document in self._documents.values():
+            score = 0
+            for path, weight in SEARCH_WEIGHTS.items():
+                counts = Counter(_words(_value(document, path)))
+                score += weight * sum(counts[term] for term in terms)
+            if score:
+                scored.append((-score, document["_id"], document))
+        scored.sort(key=lambda match: match[:2])
+        return [
+            project(document, projection)
+            for _, _, document in scored[offset : offset + limit]
+        ]
+
+    async def summarize(
+        self, category: Optional[str], boundaries: Sequence[float]
+    ) -> tuple[list[dict[str, Any]], dict[Any, int]]:
+        groups: dict[str, dict[str, Any]] = {}
+        buckets: dict[Any, int] = {}
+        for document in self._documents.values():
+            name = _value(document, "category.name")
+            if category is not None and name != category:
+                continue
+            price = document["price"]
+
+            group = groups.setdefault(
+                name,
+                {"name": name, "count": 0, "min_price": price, "max_price": price},
+            )
+            group["count"] += 1
+            group["total"] = group.get("total", 0.0) + price
+            group["min_price"] = min(group["min_price"], price)
+            group["max_price"] = max(group["max_price"], price)
+
+            # A range includes its lower bound and excludes its upper bound.
+            position = bisect_right(boundaries, price) - 1
+            bucket = (
+                boundaries[position] if 0 <= position < len(boundaries) - 1 else "other"
+            )
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+
+        categories = [
+            {
+                "name": group["name"],
+                "count": group["count"],
+                "min_price": group["min_price"],
+                "avg_price": group["total"] / group["count"],
+                "max_price": group["max_price"],
+            }
+            for _, group in sorted(groups.items())
+        ]
+        return categories, buckets
+
+    async def stream(self, batch_size: int) -> AsyncIterator[Product]:
+        async for document in self.stream_documents(batch_size):
+            yield to_product(document)
+
+    async def stream_documents(self, batch_size: int) -> AsyncIterator[RawDocument]:
+        # Resume each batch after the last ID read, so concurrent writes are safe.
+        query = ProductQuery()
+        while True:
+            batch = [deepcopy(document) for document in self._select(query, batch_size)]
+            for document in batch:
+                yield document
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1]["_id"]
+            query = ProductQuery(after=(last_id, last_id))
+
+    async def insert(self, product: ProductModel) -> Product:
+        product_id = PydanticObjectId()
+        self._store(product_id, product)
+        return to_product(self._documents[product_id])
+
+    async def insert_many(
+        self, products: Sequence[ProductModel]
+    ) -> list[tuple[Optional[PydanticObjectId], Optional[str]]]:
+        results: list[tuple[Optional[PydanticObjectId], Optional[str]]] = []
+        for product in products:
+            product_id = PydanticObjectId()
+            self._store(product_id, product)
+            results.append((product_id, None))
+        return results
+
+    def _set(
+        self, product_id: PydanticObjectId, changes: dict[str, Any]
+    ) -> Optional[bool]:
+        """
+        Set top level fields of a stored document, keeping the indexes in step.
+
+        Args:
+            product_id (PydanticObjectId): The ID of the product.
+            changes (dict[str, Any]): The fields to set and their new values.
+
+        Returns:
+            Optional[bool]: None if the product does not exist, otherwise whether the
+                document changed.
+        """
+        document = self._documents.get(product_id)
+        if document is None:
+            return None
+        updated = {**document, **deepcopy(changes)}
+        if updated == document:
+            return False
+        self._unindex(document)
+        self._documents[product_id] = updated
+        self._index(updated)
+        return True
+
+    async def update(
+        self, product_id: PydanticObjectId, changes: dict[str, Any]
+    ) -> Optional[Product]:
+        if self._set(product_id, changes) is None:
+            return None
+        return to_product(self._documents[product_id])
+
+    async def update_many(
+        self, updates: Sequence[tuple[PydanticObjectId, dict[str, Any]]]
+    ) -> tuple[int, int]:
+        changed = [self._set(product_id, fields) for product_id, fields in updates]
+        matched_count = sum(1 for outcome in changed if outcome is not None)
+        modified_count = sum(1 for outcome in changed if outcome)
+        return matched_count, modified_count
+
+    async def delete(self, product_id: PydanticObjectId) -> bool:
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return False
+        self._unindex(document)
+        return True
+
+    async def delete_many(self, product_ids: Sequence[PydanticObjectId]) -> int:
+        deleted = 0
+        for product_id in set(product_ids):
+            deleted += await self.delete(product_id)
+        return deleted
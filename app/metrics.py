@@ -0,0 +1,424 @@
+"""
+Module for Prometheus metrics.
+
+This module keeps counters, gauges and histograms in process and renders them in the
+Prometheus text exposition format on GET /metrics. HTTP metrics are recorded by an
+ASGI middleware and labelled with the route template, such as
+/products/{product_id}, so the number of series does not grow with the number of
+products. MongoDB command and pool metrics are recorded by the driver listeners in
+app.monitoring, which run on the driver's threads, so every metric holds a lock.
+With several workers, each process reports its own metrics.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Media type of the Prometheus text exposition format.
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket boundaries, in seconds, for request and command durations.
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Bucket boundaries, in bytes, for response sizes.
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    # Escape a label value as required by the exposition format.
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """
+    Base class of a metric family with a fixed set of label names.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, values: LabelValues) -> LabelValues:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}")
+        return values
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """
+        Render the samples of every label combination.
+
+        Returns:
+            list[str]: One exposition line per sample.
+        """
+
+    def render(self) -> str:
+        """
+        Render the metric family with its help and type lines.
+
+        Returns:
+            str: The metric family in the text exposition format.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """
+    A value that only goes up, such as a number of requests.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        """
+        Increase the counter of a label combination.
+
+        Args:
+            *values (str): The label values, in label name order.
+            amount (float): The amount to add.
+        """
+        key = self._key(values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *values: str) -> float:
+        with self._lock:
+            return self._values.get(values, 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """
+    A value that goes up and down, such as a number of requests in flight.
+    """
+
+    kind = "gauge"
+
+    def dec(self, *values: str, amount: float = 1.0) -> None:
+        """
+        Decrease the gauge of a label combination.
+
+        Args:
+            *values (str): The label values, in label name order.
+            amount (float): The amount to subtract.
+        """
+        self.inc(*values, amount=-amount)
+
+    def set(self, *values: str, value: float) -> None:
+        """
+        Set the gauge of a label combination.
+
+        Args:
+            *values (str): The label values, in label name order.
+            value (float): The new value.
+        """
+        key = self._key(values)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, counted in cumulative buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # Per label combination: the count of each bucket, then the sum of values.
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, *values: str, value: float) -> None:
+        """
+        Record one observation for a label combination.
+
+        Args:
+            *values (str): The label values, in label name order.
+            value (float): The observed value.
+        """
+        key = self._key(values)
+        # The last slot counts values above every boundary.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, *values: str) -> int:
+        with self._lock:
+            return sum(self._counts.get(values, []))
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, list(c), self._sums[key]) for key, c in self._counts.items()
+            )
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for boundary, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.labels, "le"), (*key, _format_value(boundary))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    A metric whose values are read from elsewhere each time the metrics are rendered.
+
+    This exposes counts kept by other parts of the application, such as the hits of
+    a cache, without updating a second copy of them on every change.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...],
+        kind: str,
+        read: Callable[[], dict[LabelValues, float]],
+    ):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        # Returns the current value of every label combination.
+        self.read = read
+
+    def samples(self) -> list[str]:
+        items = sorted(self.read().items())
+        return [
+            f"{self.name}{_format_labels(self.labels, self._key(key))} "
+            f"{_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Registry:
+    """
+    A collection of metric families rendered together.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register[M: Metric](self, metric: M) -> M:
+        """
+        Add a metric family to the registry.
+
+        Args:
+            metric (M): The metric family.
+
+        Returns:
+            M: The same metric family, for assignment.
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric family.
+
+        Returns:
+            str: The metrics in the text exposition format.
+        """
+        return "".join(metric.render() for metric in self.metrics)
+
+
+# Metrics of the current process.
+registry = Registry()
+
+http_requests = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests handled, by method, route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from receiving an HTTP request to sending the end of its response.",
+        ("method", "route"),
+    )
+)
+http_response_size = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Size of HTTP response bodies.",
+        ("method", "route"),
+        buckets=SIZE_BUCKETS,
+    )
+)
+http_requests_in_progress = registry.register(
+    Gauge(
+        "http_requests_in_progress",
+        "HTTP requests currently being handled, by method.",
+        ("method",),
+    )
+)
+mongodb_command_duration = registry.register(
+    Histogram(
+        "mongodb_command_duration_seconds",
+        "Time MongoDB commands took, as measured by the driver, by command name.",
+        ("command",),
+    )
+)
+mongodb_command_errors = registry.register(
+    Counter(
+        "mongodb_command_errors_total",
+        "MongoDB commands that failed, by command name.",
+        ("command",),
+    )
+)
+mongodb_pool_wait = registry.register(
+    Histogram(
+        "mongodb_pool_wait_seconds",
+        "Time operations waited to check out a pooled connection.",
+    )
+)
+mongodb_pool_connections = registry.register(
+    Gauge(
+        "mongodb_pool_connections",
+        "Connections of the MongoDB client's pools, by state.",
+        ("state",),
+    )
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the route template that handled a request.
+
+    Args:
+        scope (Scope): The ASGI scope of the request, after routing.
+
+    Returns:
+        str: The route path template, or 'unmatched' when no route matched, so unknown
+            paths do not each create a series.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Record the count, duration and response size of every HTTP request.
+
+    Requests are labelled with the route template once routing has run, so all
+    requests for /products/{product_id} share one series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+        started = time.perf_counter()
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_requests_in_progress.dec(method)
+            route = route_template(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(
+                method, route, value=time.perf_counter() - started
+            )
+            http_response_size.observe(method, route, value=size)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Expose the metrics of this process in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: The rendered metrics.
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
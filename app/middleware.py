@@ -0,0 +1,158 @@
+"""
+Module for ASGI middleware used by the application.
+
+The middleware in this module wraps the whole application rather than individual
+routes, so it applies uniformly to every endpoint without changing route code.
+"""
+
+import hashlib
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Scope of the HTTP request being handled by the current task, if any.
+request_scope: ContextVar[Optional[Scope]] = ContextVar("request_scope", default=None)
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Compute a strong entity tag for a response body.
+
+    Args:
+        body (bytes): The encoded response body.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def document_etag(*values: Any) -> str:
+    """
+    Compute a strong entity tag from data read before a response is serialized.
+
+    Routes use it to answer a revalidation without building the response body. The
+    representation of the values is hashed, so the tag is the same in every process.
+
+    Args:
+        *values (Any): The data the response is built from.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    return compute_etag(repr(values).encode())
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+
+    If-None-Match uses the weak comparison, so a W/ prefix on either side is ignored.
+
+    Args:
+        if_none_match (str): The value of the If-None-Match request header.
+        etag (str): The entity tag of the current representation.
+
+    Returns:
+        bool: True if the client already has the current representation.
+    """
+    if if_none_match.strip() == "*":
+        return True
+
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ETagMiddleware:
+    """
+    Add entity tags to JSON GET responses and answer revalidations with 304.
+
+    The tag is a hash of the response body, so it changes whenever the content does,
+    no matter which process or client made the change. Only bandwidth is saved this
+    way, since the body has already been built. A route may set its own ETag header,
+    in which case it is used as is, and may answer a revalidation with 304 itself
+    before serializing anything. When the request's If-None-Match header matches,
+    the body is dropped and 304 Not Modified is sent instead.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message = {}
+        body_parts: list[bytes] = []
+        passthrough = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if message["status"] != 200 or not content_type.startswith(
+                    "application/json"
+                ):
+                    # Streams and errors are sent untouched and never buffered.
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            headers = MutableHeaders(raw=start_message["headers"])
+            etag = headers.get("etag") or compute_etag(body)
+            headers["ETag"] = etag
+
+            if if_none_match and etag_matches(if_none_match, etag):
+                # The client's copy is current, so skip sending the body.
+                start_message["status"] = 304
+                del headers["content-length"]
+                del headers["content-type"]
+                body = b""
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
+
+
+class RequestContextMiddleware:
+    """
+    Make the scope of the current HTTP request available through request_scope.
+
+    The scope is shared, not copied, so code running later in the request, such as
+    MongoDB event listeners, sees the route once it has been matched. Motor copies
+    the context into the threads that run driver operations.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
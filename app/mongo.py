@@ -2,39 +2,160 @@
 Module for initializing MongoDB connection and configuring Beanie ODM.
 
 This module sets up the connection to the MongoDB database using Motor and initializes
-Beanie with the application's document models.
+Beanie with the application's document models. A single Motor client, and therefore a
+single connection pool, is shared by the whole process. In fast start mode the
+initialization runs in the background while the server already accepts requests,
+which wait for it through a readiness gate.
 """
 
+import asyncio
+from typing import Optional
+
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.config import get_settings
 from app.documents import Product
+from app.monitoring import command_metrics, pool_stats, query_profiler
+from app.startup import startup_timer
 
 # Retrieve application settings which include MongoDB connection details.
 SETTINGS = get_settings()
 
+# The process-wide Motor client, created on first use and released by close_mongo().
+_client: Optional[AsyncIOMotorClient] = None
+
+# The background initialization started by start_mongo(), if any.
+_init_task: Optional[asyncio.Task[None]] = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Return the shared Motor client, creating it on first use.
+
+    The client owns the connection pool, so every caller in the process reuses the
+    same connections. Pool sizing and timeouts are taken from the settings, and pool
+    and command events are recorded for the health and metrics endpoints and the
+    slow query log.
+
+    Returns:
+        AsyncIOMotorClient: The process-wide Motor client.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            SETTINGS.mongodb_url,
+            maxPoolSize=SETTINGS.mongodb_max_pool_size,
+            minPoolSize=SETTINGS.mongodb_min_pool_size,
+            maxIdleTimeMS=SETTINGS.mongodb_max_idle_time_ms,
+            waitQueueTimeoutMS=SETTINGS.mongodb_wait_queue_timeout_ms,
+            serverSelectionTimeoutMS=SETTINGS.mongodb_server_selection_timeout_ms,
+            event_listeners=[pool_stats, command_metrics, query_profiler],
+        )
+    return _client
+
 
 async def init_mongo() -> None:
     """
     Initialize the MongoDB connection and configure Beanie ODM.
 
-    This function creates a Motor client using the MongoDB URL from the settings,
-    selects the database specified in settings, and initializes Beanie with the document
-    models (currently only the Product document). It should be called during application startup.
+    This function selects the database specified in settings on the shared Motor client
+    and initializes Beanie with the document models (currently only the Product document).
+    It should be called during application startup.
 
     Raises:
         Exception: If unable to connect to MongoDB or initialize Beanie.
     """
 
-    # Create a Motor client to interact with MongoDB.
-    client: AsyncIOMotorClient = AsyncIOMotorClient(SETTINGS.mongodb_url)
-
     # Access the database using the name provided in the settings.
-    db = client[SETTINGS.db_name]
+    db = get_client()[SETTINGS.db_name]
+    startup_timer.mark("client")
+
+    # Initialize Beanie with the database and the list of document models,
+    # creating their indexes unless that is handled outside the application.
+    await init_beanie(
+        database=db,
+        document_models=[Product],
+        skip_indexes=SETTINGS.fast_start or not SETTINGS.mongodb_build_indexes,
+    )
+    startup_timer.mark("beanie")
+
+
+def start_mongo() -> None:
+    """
+    Start initializing MongoDB in the background.
+
+    The server can accept requests right away; they wait for the initialization
+    through wait_mongo_ready(). It must be called from a running event loop.
+    """
+    global _init_task
+    _init_task = asyncio.create_task(init_mongo())
+    _init_task.add_done_callback(_report_mongo_ready)
+
+
+def _report_mongo_ready(task: asyncio.Task[None]) -> None:
+    # Log the complete startup timings once the background initialization succeeds.
+    if not task.cancelled() and task.exception() is None:
+        startup_timer.report("mongo ready")
 
-    # Initialize Beanie with the database and the list of document models.
-    await init_beanie(database=db, document_models=[Product])
+
+def mongo_ready() -> bool:
+    """
+    Check whether MongoDB has been initialized.
+
+    Returns:
+        bool: True once the client is available and Beanie is initialized.
+    """
+    if _init_task is None:
+        return _client is not None
+    return (
+        _init_task.done()
+        and not _init_task.cancelled()
+        and _init_task.exception() is None
+    )
+
+
+async def wait_mongo_ready(timeout: float) -> None:
+    """
+    Wait until MongoDB has been initialized.
+
+    Returns at once unless the initialization runs in the background and has not
+    succeeded yet, so requests after startup do not wait on anything. A failed
+    background initialization is started again, so the application recovers once
+    the database becomes reachable.
+
+    Args:
+        timeout (float): The number of seconds to wait.
+
+    Raises:
+        TimeoutError: If the initialization does not finish in time.
+        Exception: If the initialization fails.
+    """
+    global _init_task
+    if _init_task is None:
+        return
+
+    if _init_task.done():
+        if not _init_task.cancelled() and _init_task.exception() is None:
+            return
+        start_mongo()
+    # Shield the shared task so a request giving up does not cancel it.
+    await asyncio.wait_for(asyncio.shield(_init_task), timeout)
+
+
+async def build_indexes() -> None:
+    """
+    Create the indexes declared on the document models.
+
+    This is the separate index build step used when the application starts without
+    building indexes. The client is closed afterwards.
+    """
+    try:
+        await init_beanie(
+            database=get_client()[SETTINGS.db_name], document_models=[Product]
+        )
+    finally:
+        await close_mongo()
 
 
 async def drop_database() -> None:
@@ -47,15 +168,21 @@ async def drop_database() -> None:
     Raises:
         Exception: If unable to drop the database.
     """
-    client: AsyncIOMotorClient = AsyncIOMotorClient(SETTINGS.mongodb_url)
-    await client.drop_database(SETTINGS.db_name)
+    await get_client().drop_database(SETTINGS.db_name)
 
 
 async def close_mongo() -> None:
     """
     Close the MongoDB connection.
 
-    This function closes the MongoDB connection when the application is shutting down.
+    This function closes the shared client and every pooled connection when the
+    application is shutting down. It is safe to call more than once.
     """
-    client: AsyncIOMotorClient = AsyncIOMotorClient(SETTINGS.mongodb_url)
-    client.close()
+    global _client, _init_task
+    if _init_task is not None:
+        # Stop a background initialization that is still running.
+        _init_task.cancel()
+        _init_task = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,287 @@
+"""
+Module for the MongoDB product repository.
+
+Products are stored in the products collection through Beanie, and read raw through
+Motor where building Product documents is not needed. Listings are index range
+scans on the indexes declared on the Product document, search uses its text index
+and statistics are computed by a single aggregation in the database.
+"""
+
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from beanie import PydanticObjectId, SortDirection
+from beanie.odm.queries.update import UpdateResponse
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.documents import Product
+from app.models import Product as ProductModel
+from app.repository import (
+    SORT_KEYS,
+    Projection,
+    ProductQuery,
+    ProductRepository,
+    RawDocument,
+)
+
+# Retrieve application settings which include the bulk write chunk size.
+SETTINGS = get_settings()
+
+
+def _find_args(
+    query: ProductQuery,
+) -> tuple[dict[str, Any], list[tuple[str, SortDirection]]]:
+    """
+    Build the MongoDB filter and sort order of a product query.
+
+    Together with the indexes declared on Product, every page is a single index range
+    scan, starting after the position of the previous page.
+
+    Args:
+        query (ProductQuery): The selection, sort order and position.
+
+    Returns:
+        tuple[dict[str, Any], list[tuple[str, SortDirection]]]: The filter and sort
+            order.
+    """
+    key = SORT_KEYS[query.sort]
+    direction = (
+        SortDirection.DESCENDING if query.descending else SortDirection.ASCENDING
+    )
+
+    conditions: list[dict[str, Any]] = []
+    if query.category is not None:
+        conditions.append({"category.name": query.category})
+    price_range = {
+        operator: bound
+        for operator, bound in (("$gte", query.min_price), ("$lte", query.max_price))
+        if bound is not None
+    }
+    if price_range:
+        conditions.append({"price": price_range})
+
+    if query.after is not None:
+        after = "$lt" if query.descending else "$gt"
+        last_value, last_id = query.after
+        if key == "_id":
+            conditions.append({"_id": {after: last_id}})
+        else:
+            conditions.append(
+                {
+                    "$or": [
+                        {key: {after: last_value}},
+                        {key: last_value, "_id": {after: last_id}},
+                    ]
+                }
+            )
+
+    mongo_filter: dict[str, Any] = {}
+    if len(conditions) == 1:
+        mongo_filter = conditions[0]
+    elif conditions:
+        mongo_filter = {"$and": conditions}
+
+    sort_order = [(key, direction)]
+    if key != "_id":
+        sort_order.append(("_id", direction))
+
+    return mongo_filter, sort_order
+
+
+class MongoProductRepository(ProductRepository):
+    """
+    Products stored in MongoDB.
+    """
+
+    async def get(self, product_id: PydanticObjectId) -> Optional[Product]:
+        return await Product.get(product_id)
+
+    async def get_document(
+        self, product_id: PydanticObjectId, projection: Projection
+    ) -> Optional[RawDocument]:
+        document: Optional[RawDocument] = await Product.get_motor_collection().find_one(
+            {"_id": product_id}, projection
+        )
+        return document
+
+    async def find(self, query: ProductQuery, limit: int) -> list[Product]:
+        mongo_filter, sort_order = _find_args(query)
+        return await Product.find(mongo_filter, sort=sort_order).limit(limit).to_list()
+
+    async def find_documents(
+        self, query: ProductQuery, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        mongo_filter, sort_order = _find_args(query)
+        documents: list[RawDocument] = (
+            await Product.get_motor_collection()
+            .find(mongo_filter, projection, sort=sort_order)
+            .limit(limit)
+            .to_list(None)
+        )
+        return documents
+
+    async def search(
+        self, text: str, offset: int, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        # MongoDB scores every match, so pages are read by their offset.
+        documents: list[RawDocument] = (
+            await Product.get_motor_collection()
+            .find({"$text": {"$search": text}}, projection)
+            .sort([("score", {"$meta": "textScore"}), ("_id", SortDirection.ASCENDING)])
+            .skip(offset)
+            .limit(limit)
+            .to_list(None)
+        )
+        return documents
+
+    async def summarize(
+        self, category: Optional[str], boundaries: Sequence[float]
+    ) -> tuple[list[dict[str, Any]], dict[Any, int]]:
+        # Group by category and bucket prices in one $facet pipeline, so only the
+        # summary leaves the database.
+        pipeline: list[dict[str, Any]] = [
+            {"$match": {"category.name": category} if category is not None else {}},
+            {
+                "$facet": {
+                    "categories": [
+                        {
+                            "$group": {
+                                "_id": "$category.name",
+                                "count": {"$sum": 1},
+                                "min_price": {"$min": "$price"},
+                                "avg_price": {"$avg": "$price"},
+                                "max_price": {"$max": "$price"},
+                            }
+                        },
+                        {"$sort": {"_id": 1}},
+                    ],
+                    "price_histogram": [
+                        {
+                            "$bucket": {
+                                "groupBy": "$price",
+                                "boundaries": list(boundaries),
+                                "default": "other",
+                                "output": {"count": {"$sum": 1}},
+                            }
+                        }
+                    ],
+                }
+            },
+        ]
+        results = await Product.get_motor_collection().aggregate(pipeline).to_list(None)
+        facets = results[0] if results else {"categories": [], "price_histogram": []}
+
+        categories = [
+            {
+                "name": group["_id"],
+                "count": group["count"],
+                "min_price": group["min_price"],
+                "avg_price": group["avg_price"],
+                "max_price": group["max_price"],
+            }
+            for group in facets["categories"]
+        ]
+        buckets = {
+            bucket["_id"]: bucket["count"] for bucket in facets["price_histogram"]
+        }
+        return categories, buckets
+
+    async def stream(self, batch_size: int) -> AsyncIterator[Product]:
+        # A single cursor fetches batch_size documents per round trip.
+        async for product in Product.find(batch_size=batch_size).sort("_id"):
+            yield product
+
+    async def stream_documents(self, batch_size: int) -> AsyncIterator[RawDocument]:
+        cursor = Product.get_motor_collection().find(
+            {}, sort=[("_id", SortDirection.ASCENDING)], batch_size=batch_size
+        )
+        async for document in cursor:
+            yield document
+
+    async def insert(self, product: ProductModel) -> Product:
+        return await Product(**product.model_dump()).insert()
+
+    async def insert_many(
+        self, products: Sequence[ProductModel]
+    ) -> list[tuple[Optional[PydanticObjectId], Optional[str]]]:
+        # The products are already validated, so the documents are constructed
+        # without validating them again. IDs are assigned before the insert so each
+        # result can be reported against its position.
+        product_ids = [PydanticObjectId() for _ in products]
+        documents: list[Product] = [
+            Product.model_construct(
+                id=product_id,
+                **{
+                    field: getattr(product, field)
+                    for field in ProductModel.model_fields
+                },
+            )
+            for product_id, product in zip(product_ids, products)
+        ]
+        results: list[tuple[Optional[PydanticObjectId], Optional[str]]] = [
+            (product_id, None) for product_id in product_ids
+        ]
+
+        chunk_size = SETTINGS.bulk_chunk_size
+        for start in range(0, len(documents), chunk_size):
+            chunk = documents[start : start + chunk_size]
+            try:
+                # Unordered inserts keep going past individual failures.
+                await Product.insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    results[start + error["index"]] = (None, error["errmsg"])
+            except Exception as e:
+                # The whole chunk failed, e.g. because the database is unreachable.
+                for index in range(start, start + len(chunk)):
+                    results[index] = (None, str(e))
+
+        return results
+
+    async def update(
+        self, product_id: PydanticObjectId, changes: dict[str, Any]
+    ) -> Optional[Product]:
+        if not changes:
+            # An empty $set is rejected by MongoDB, so there is nothing to write.
+            return await Product.get(product_id)
+
+        # Only the given fields are written, in one atomic round trip.
+        product: Optional[Product] = await Product.find_one(
+            Product.id == product_id
+        ).update({"$set": changes}, response_type=UpdateResponse.NEW_DOCUMENT)
+        return product
+
+    async def update_many(
+        self, updates: Sequence[tuple[PydanticObjectId, dict[str, Any]]]
+    ) -> tuple[int, int]:
+        operations = [
+            UpdateOne({"_id": product_id}, {"$set": fields})
+            for product_id, fields in updates
+            if fields
+        ]
+        # An empty $set is rejected by MongoDB, so products without changes are
+        # only counted as matched.
+        unchanged = list({product_id for product_id, fields in updates if not fields})
+
+        matched_count, modified_count = 0, 0
+        collection = Product.get_motor_collection()
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            matched_count, modified_count = result.matched_count, result.modified_count
+        if unchanged:
+            matched_count += await collection.count_documents(
+                {"_id": {"$in": unchanged}}
+            )
+        return matched_count, modified_count
+
+    async def delete(self, product_id: PydanticObjectId) -> bool:
+        result = await Product.find_one(Product.id == product_id).delete()
+        return bool(result and result.deleted_count)
+
+    async def delete_many(self, product_ids: Sequence[PydanticObjectId]) -> int:
+        result = await Product.get_motor_collection().delete_many(
+            {"_id": {"$in": list(product_ids)}}
+        )
+        deleted_count: int = result.deleted_count
+        return deleted_count
@@ -0,0 +1,385 @@
+"""
+Module for monitoring the MongoDB driver.
+
+PyMongo reports driver events to registered listeners. The listeners in this module
+are passed to the Motor client. They keep running pool counts, which the health
+endpoints report, record command and pool metrics for Prometheus, and log slow
+commands with their query shape. The driver calls them from its own threads, so
+every update holds a lock.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from pymongo import monitoring
+
+from app.config import get_settings
+from app.metrics import (
+    mongodb_command_duration,
+    mongodb_command_errors,
+    mongodb_pool_connections,
+    mongodb_pool_wait,
+    route_template,
+)
+from app.middleware import request_scope
+from app.timing import add_timing
+
+logger = logging.getLogger("uvicorn.error")
+
+# Retrieve application settings which include the slow query threshold.
+SETTINGS = get_settings()
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Track the connections of the client's pools, summed over all servers.
+
+    Counts open connections, connections checked out by operations, and operations
+    waiting for a connection to become available. The counts are mirrored in the
+    pool gauge, and the time each check out waited is recorded in a histogram.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Connections created and not yet closed.
+        self.open = 0
+        # Connections currently in use by an operation.
+        self.checked_out = 0
+        # Operations currently waiting to check out a connection.
+        self.waiting = 0
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Return the current counts.
+
+        Returns:
+            dict[str, int]: The open, checked out and waiting counts.
+        """
+        with self._lock:
+            return {
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+            }
+
+    def _change(self, open: int = 0, checked_out: int = 0, waiting: int = 0) -> None:
+        # Apply count changes and publish the new counts to the pool gauge.
+        with self._lock:
+            self.open += open
+            self.checked_out += checked_out
+            self.waiting += waiting
+            # Published under the lock so concurrent changes reach the gauge in order.
+            mongodb_pool_connections.set("open", value=self.open)
+            mongodb_pool_connections.set("checked_out", value=self.checked_out)
+            mongodb_pool_connections.set("waiting", value=self.waiting)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._change(open=1)
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._change(open=-1)
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        self._change(waiting=1)
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        self._change(waiting=-1)
+        _observe_wait(event)
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        self._change(waiting=-1, checked_out=1)
+        _observe_wait(event)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._change(checked_out=-1)
+
+    # Pool lifecycle events do not change the counts.
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+
+def _observe_wait(
+    event: monitoring.ConnectionCheckedOutEvent
+    | monitoring.ConnectionCheckOutFailedEvent,
+) -> None:
+    # The driver reports how long the check out took, in seconds.
+    duration = getattr(event, "duration", None)
+    if duration is not None:
+        mongodb_pool_wait.observe(value=duration)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Record the duration of every MongoDB command and count failed commands.
+
+    Durations are measured by the driver, from sending the command to receiving its
+    reply, and labelled with the command name, such as find or update.
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event.command_name, event.duration_micros / 1_000_000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event.command_name, event.duration_micros / 1_000_000)
+        mongodb_command_errors.inc(event.command_name)
+
+    def _observe(self, command_name: str, seconds: float) -> None:
+        mongodb_command_duration.observe(command_name, value=seconds)
+        # Also count the command in the Server-Timing header of the current request.
+        add_timing("db", seconds)
+
+
+# Command fields that hold query structure rather than data, kept as they are.
+STRUCTURE_FIELDS = ("sort", "projection")
+
+# Command fields that hold filters, pipelines or changes, reduced to their shape.
+QUERY_FIELDS = ("filter", "query", "pipeline", "updates", "deletes", "update")
+
+
+def redact(value: Any) -> Any:
+    """
+    Reduce a value to its shape by replacing every scalar with '?'.
+
+    Keys and operators are kept. Lists are reduced to their distinct element shapes,
+    so an $in over any number of IDs has a single shape.
+
+    Args:
+        value (Any): Part of a MongoDB command.
+
+    Returns:
+        Any: The shape of the value.
+    """
+    if isinstance(value, Mapping):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes: list[Any] = []
+        for item in value:
+            shape = redact(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def query_shape(command_name: str, command: Mapping[str, Any]) -> str:
+    """
+    Describe a command by its name, collection and redacted query.
+
+    Commands that differ only in the values they filter on or write have the same
+    shape, so their statistics add up.
+
+    Args:
+        command_name (str): The name of the command, such as find.
+        command (Mapping[str, Any]): The command document sent to the server.
+
+    Returns:
+        str: The query shape, free of any value from the command.
+    """
+    parts: dict[str, Any] = {}
+    for field in QUERY_FIELDS:
+        if field in command:
+            parts[field] = redact(command[field])
+    for field in STRUCTURE_FIELDS:
+        if field in command:
+            parts[field] = command[field]
+    collection = command.get(command_name)
+    target = [collection] if isinstance(collection, str) else []
+    return " ".join([command_name, *target, json.dumps(parts, default=str)])
+
+
+def documents_returned(command_name: str, reply: Mapping[str, Any]) -> Optional[int]:
+    """
+    Count the documents a command returned or changed, where its reply says so.
+
+    The server does not report examined documents outside of explain and the
+    profiler, so only returned and written counts are available here.
+
+    Args:
+        command_name (str): The name of the command.
+        reply (Mapping[str, Any]): The server's reply.
+
+    Returns:
+        Optional[int]: The number of documents, or None if the reply does not say.
+    """
+    cursor = reply.get("cursor")
+    if isinstance(cursor, Mapping):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if isinstance(batch, list):
+            return len(batch)
+    n = reply.get("n")
+    return n if isinstance(n, int) else None
+
+
+class QueryShapeStats:
+    """
+    Running totals of the commands sharing one query shape.
+    """
+
+    def __init__(self, shape: str, command_name: str) -> None:
+        self.shape = shape
+        self.command = command_name
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        # Route of the most recent request that issued this shape.
+        self.last_route: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "shape": self.shape,
+            "command": self.command,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_route": self.last_route,
+        }
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """
+    Log slow MongoDB commands and aggregate command time by query shape.
+
+    A command slower than the configured threshold is logged with its query shape,
+    duration, document count and the route of the request that issued it. When the
+    profiler is enabled, every command is also added to the totals of its shape.
+    """
+
+    def __init__(self, max_shapes: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self.max_shapes = max_shapes
+        # Commands in flight, by connection and request ID, with their issuing route.
+        self._pending: dict[
+            tuple[Any, int], tuple[Mapping[str, Any], Optional[str]]
+        ] = {}
+        # Totals by query shape.
+        self._shapes: dict[str, QueryShapeStats] = {}
+
+    def _enabled(self) -> bool:
+        return SETTINGS.slow_query_ms is not None or SETTINGS.query_profiler_enabled
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if not self._enabled():
+            return
+        scope = request_scope.get()
+        route = f"{scope['method']} {route_template(scope)}" if scope else None
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.command,
+                route,
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, documents_returned(event.command_name, event.reply))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, None, failed=True)
+
+    def _finish(
+        self,
+        event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent,
+        documents: Optional[int],
+        failed: bool = False,
+    ) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+
+        command, route = pending
+        duration_ms = event.duration_micros / 1000
+        slow = (
+            SETTINGS.slow_query_ms is not None and duration_ms >= SETTINGS.slow_query_ms
+        )
+        if not slow and not SETTINGS.query_profiler_enabled:
+            return
+
+        shape = query_shape(event.command_name, command)
+        if slow:
+            logger.warning(
+                f"Slow MongoDB command: {duration_ms:.1f}ms"
+                f" documents={'-' if documents is None else documents}"
+                f" route={route or '-'}"
+                f"{' failed' if failed else ''} {shape}"
+            )
+        if SETTINGS.query_profiler_enabled:
+            self._record(shape, event.command_name, duration_ms, route, failed)
+
+    def _record(
+        self,
+        shape: str,
+        command_name: str,
+        duration_ms: float,
+        route: Optional[str],
+        failed: bool,
+    ) -> None:
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Make room by dropping the shape that matters least.
+                    least = min(self._shapes.values(), key=lambda s: s.total_ms)
+                    del self._shapes[least.shape]
+                stats = self._shapes[shape] = QueryShapeStats(shape, command_name)
+            stats.count += 1
+            stats.errors += failed
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_route = route or stats.last_route
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """
+        Return the query shapes that took the most total time.
+
+        Args:
+            limit (int): The number of shapes to return.
+
+        Returns:
+            list[dict[str, Any]]: The statistics of each shape, slowest first.
+        """
+        with self._lock:
+            shapes = sorted(self._shapes.values(), key=lambda s: -s.total_ms)
+            return [stats.as_dict() for stats in shapes[:limit]]
+
+    def reset(self) -> None:
+        """
+        Forget every aggregated query shape.
+        """
+        with self._lock:
+            self._shapes.clear()
+
+
+# Connection pool counts of the process-wide client.
+pool_stats = PoolStats()
+
+# Command metrics of the process-wide client.
+command_metrics = CommandMetrics()
+
+# Slow query log and query shape totals of the process-wide client.
+query_profiler = QueryProfiler(max_shapes=SETTINGS.query_profiler_max_shapes)
@@ -0,0 +1,56 @@
+"""
+Module for encoding and decoding keyset pagination cursors.
+
+List endpoints page through the products collection by remembering where the
+previous page stopped (the `_id` of its last document) instead of skipping over
+every document that came before it. The position is handed to clients as an
+opaque, URL-safe token so the cursor format can change without breaking them.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from app.exceptions import InvalidCursor
+
+
+def encode_cursor(position: dict[str, Any]) -> str:
+    """
+    Encode a page position into an opaque cursor token.
+
+    Args:
+        position (dict[str, Any]): JSON serializable values identifying the last
+                                   document of the current page.
+
+    Returns:
+        str: A URL-safe token that can be passed back as the `next` parameter.
+    """
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict[str, Any]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token (str): The opaque cursor token received from the client.
+
+    Raises:
+        InvalidCursor: If the token is malformed or was not produced by this API.
+
+    Returns:
+        dict[str, Any]: The page position stored in the token.
+    """
+    try:
+        # Restore the padding stripped by encode_cursor before decoding.
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor(token)
+
+    if not isinstance(position, dict):
+        raise InvalidCursor(token)
+
+    return position
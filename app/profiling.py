@@ -0,0 +1,251 @@
+"""
+Module for profiling single requests on demand.
+
+When a profiler token is configured, a request sent with the X-Profile header set to
+that token is profiled and the profile is written to the profiler directory. Two
+formats are supported:
+
+- pstats: a deterministic cProfile profile, for python -m pstats, snakeviz or
+  similar tools.
+- collapsed: stacks of the event loop thread sampled at a fixed interval, one
+  "frame;frame;frame count" line per stack, for flamegraph.pl or speedscope.
+
+Both profilers follow the event loop thread, so every coroutine step of the request,
+in app.api and app.actions, is captured. Coroutines of other requests served at the
+same time are captured too, and MongoDB I/O, which runs on the driver's threads,
+shows up as the loop waiting. At most one request is profiled at a time, and no more
+than one per rate limit interval. Without a token the middleware does nothing but
+pass requests on.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial
+from types import FrameType
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+# Retrieve application settings which include the profiler token and output options.
+SETTINGS = get_settings()
+
+# Request header that carries the profiler token.
+PROFILE_HEADER = "x-profile"
+
+# File extension of each profile format.
+EXTENSIONS = {"pstats": "prof", "collapsed": "collapsed"}
+
+
+class ProfileRateLimiter:
+    """
+    Allow one profile at a time, and no more than one per interval.
+    """
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic):
+        # Least number of seconds between the starts of two profiles.
+        self.interval = interval
+        # Source of the current time, replaceable in tests.
+        self.clock = clock
+        self._last: Optional[float] = None
+        self._active = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """
+        Claim the right to profile a request.
+
+        Returns:
+            bool: True if the request may be profiled, in which case release must be
+                called once it is done.
+        """
+        with self._lock:
+            now = self.clock()
+            if self._active or (
+                self._last is not None and now - self._last < self.interval
+            ):
+                return False
+            self._active = True
+            self._last = now
+            return True
+
+    def release(self) -> None:
+        """
+        Mark the current profile as done.
+        """
+        with self._lock:
+            self._active = False
+
+
+def frame_name(frame: FrameType) -> str:
+    """
+    Name a stack frame by its function, file and first line.
+
+    Args:
+        frame (FrameType): The frame to name.
+
+    Returns:
+        str: The frame name, without the separators of the collapsed format.
+    """
+    code = frame.f_code
+    name = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":")
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """
+    Render the stack ending at a frame in the collapsed format.
+
+    Args:
+        frame (Optional[FrameType]): The innermost frame of the stack.
+
+    Returns:
+        str: The frame names from the outermost to the innermost, joined by ';'.
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread from a background thread at a fixed interval.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        # Identifier of the sampled thread.
+        self.thread_id = thread_id
+        # Seconds between two samples.
+        self.interval = interval
+        # Number of samples of each collapsed stack.
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def render(self) -> str:
+        """
+        Render the samples in the collapsed format.
+
+        Returns:
+            str: One "stack count" line per distinct stack.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def profile_path(scope: Scope, started: datetime, profile_format: str) -> str:
+    """
+    Build the path of the profile of a request.
+
+    Args:
+        scope (Scope): The ASGI scope of the request.
+        started (datetime): When the request started.
+        profile_format (str): The profile format, pstats or collapsed.
+
+    Returns:
+        str: The path in the profiler directory, named after the time and the request.
+    """
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    name = f"{started:%Y%m%dT%H%M%S%f}-{scope['method']}-{path}.{EXTENSIONS[profile_format]}"
+    return os.path.join(SETTINGS.profiler_dir, name)
+
+
+# Rate limiter shared by every request of this process.
+rate_limiter = ProfileRateLimiter(SETTINGS.profiler_min_interval_seconds)
+
+
+class ProfilerMiddleware:
+    """
+    Profile requests that carry the profiler token and write the profile to disk.
+
+    The response carries an X-Profile-File header naming the written profile. Requests
+    with a wrong token, or sent while the rate limit is in effect, are served
+    normally without a profile.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = SETTINGS.profiler_token
+        if scope["type"] != "http" or not token:
+            await self.app(scope, receive, send)
+            return
+
+        header = Headers(scope=scope).get(PROFILE_HEADER)
+        if (
+            header is None
+            or not hmac.compare_digest(header.encode(), token.encode())
+            or not rate_limiter.acquire()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            rate_limiter.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile_format = SETTINGS.profiler_format
+        path = profile_path(scope, datetime.now(timezone.utc), profile_format)
+
+        async def send_with_path(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-File", os.path.basename(path))
+            await send(message)
+
+        if profile_format == "pstats":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_path)
+            finally:
+                profiler.disable()
+            write: Callable[[], None] = partial(profiler.dump_stats, path)
+        else:
+            sampler = StackSampler(
+                threading.get_ident(), SETTINGS.profiler_sample_interval_ms / 1000
+            )
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_with_path)
+            finally:
+                sampler.stop()
+            write = partial(_write_text, path, sampler.render())
+
+        # Write the profile without blocking the event loop.
+        os.makedirs(SETTINGS.profiler_dir, exist_ok=True)
+        await asyncio.to_thread(write)
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w") as file:
+        file.write(text)
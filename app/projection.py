@@ -0,0 +1,94 @@
+"""
+Module for sparse fieldsets on product reads.
+
+Clients may ask for a subset of product fields with the `fields` query parameter.
+This module turns that parameter into a MongoDB projection, so unrequested fields
+are never read from the database, and shapes the raw documents MongoDB returns into
+response payloads with the same field names and order as the response schemas.
+"""
+
+from typing import Any, Optional
+
+from app.exceptions import InvalidFields
+from app.models import Category
+from app.schemas import GetProductResponse
+
+# Top-level fields of a product response, in response order.
+PRODUCT_FIELDS: list[str] = list(GetProductResponse.model_fields)
+
+# Every field path a client may request, including nested category fields.
+SELECTABLE_FIELDS: set[str] = set(PRODUCT_FIELDS) | {
+    f"category.{field}" for field in Category.model_fields
+}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[dict[str, int]]:
+    """
+    Translate a comma separated list of fields into a MongoDB projection.
+
+    The ID is always projected since it is needed to page through results.
+
+    Args:
+        fields (Optional[str]): The value of the `fields` query parameter.
+
+    Raises:
+        InvalidFields: If a requested field does not exist.
+
+    Returns:
+        Optional[dict[str, int]]: The projection, or None to read whole documents.
+    """
+    if not fields:
+        return None
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in SELECTABLE_FIELDS]
+    if unknown or not requested:
+        raise InvalidFields(unknown or [fields], sorted(SELECTABLE_FIELDS))
+
+    projection = {"_id": 1}
+    for field in requested:
+        if field != "id":
+            projection[field] = 1
+
+    # Drop nested paths already covered by their whole parent object.
+    return {
+        path: 1
+        for path in projection
+        if not ("." in path and path.split(".")[0] in projection)
+    }
+
+
+def shape_product(document: dict[str, Any], include_id: bool = True) -> dict[str, Any]:
+    """
+    Shape a raw product document into a response payload.
+
+    Fields are emitted in response schema order and the ObjectId is rendered as a string.
+
+    Args:
+        document (dict[str, Any]): The raw document read from MongoDB.
+        include_id (bool): Whether the payload should contain the product ID.
+
+    Returns:
+        dict[str, Any]: The JSON serializable product payload.
+    """
+    payload: dict[str, Any] = {}
+    for field in PRODUCT_FIELDS:
+        if field == "id":
+            if include_id:
+                payload["id"] = str(document["_id"])
+        elif field in document:
+            payload[field] = document[field]
+    return payload
+
+
+def includes_id(fields: Optional[str]) -> bool:
+    """
+    Check whether the ID was requested.
+
+    Args:
+        fields (Optional[str]): The value of the `fields` query parameter.
+
+    Returns:
+        bool: True if the payload should contain the product ID.
+    """
+    return not fields or "id" in (field.strip() for field in fields.split(","))
@@ -0,0 +1,295 @@
+"""
+Module for the product storage interface.
+
+Actions and dependencies read and write products through a ProductRepository
+instead of calling Beanie or Motor themselves, so the storage can be swapped. Two
+backends exist, chosen with the STORAGE_BACKEND setting:
+
+- mongo: MongoDB through Beanie and Motor (app.mongo_repository), the default.
+- memory: an in-process store (app.memory_repository), to load test the HTTP and
+  serialization layers without a database and to run tests without MongoDB.
+
+Every backend returns products as Product documents, or as raw documents shaped as
+MongoDB returns them, with the ID under _id, so the code above the repository does
+not depend on the backend.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from beanie import PydanticObjectId
+
+from app.config import get_settings
+from app.documents import Product
+from app.models import Product as ProductModel
+
+# Retrieve application settings which include the storage backend.
+SETTINGS = get_settings()
+
+# A raw product document, and the fields to read of one (None for every field).
+RawDocument = dict[str, Any]
+Projection = Optional[dict[str, int]]
+
+# Document paths of the fields products can be sorted by.
+SORT_KEYS: dict[str, str] = {"id": "_id", "price": "price", "name": "name"}
+
+
+class ProductQuery:
+    """
+    A filtered and sorted selection of products, read one page at a time.
+
+    Pages continue after a position, the sort value and ID of the last product of
+    the previous page. The ID breaks ties between equal sort values.
+    """
+
+    def __init__(
+        self,
+        sort: str = "id",
+        descending: bool = False,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        after: Optional[tuple[Any, PydanticObjectId]] = None,
+    ):
+        # Field the products are sorted by: id, price or name.
+        self.sort = sort
+        self.descending = descending
+        # Only select products in this category and price range.
+        self.category = category
+        self.min_price = min_price
+        self.max_price = max_price
+        # Sort value and ID of the last product of the previous page, if any.
+        self.after = after
+
+
+class ProductRepository(ABC):
+    """
+    The operations the application performs on the stored products.
+    """
+
+    @abstractmethod
+    async def get(self, product_id: PydanticObjectId) -> Optional[Product]:
+        """
+        Get a product by ID.
+
+        Args:
+            product_id (PydanticObjectId): The ID of the product.
+
+        Returns:
+            Optional[Product]: The product, or None if it does not exist.
+        """
+
+    @abstractmethod
+    async def get_document(
+        self, product_id: PydanticObjectId, projection: Projection
+    ) -> Optional[RawDocument]:
+        """
+        Get a raw product document by ID.
+
+        Args:
+            product_id (PydanticObjectId): The ID of the product.
+            projection (Projection): The fields to read, or None for every field.
+
+        Returns:
+            Optional[RawDocument]: The document, or None if it does not exist.
+        """
+
+    @abstractmethod
+    async def find(self, query: ProductQuery, limit: int) -> list[Product]:
+        """
+        List the products of a query.
+
+        Args:
+            query (ProductQuery): The selection, sort order and position.
+            limit (int): The largest number of products to return.
+
+        Returns:
+            list[Product]: The products, in sort order.
+        """
+
+    @abstractmethod
+    async def find_documents(
+        self, query: ProductQuery, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        """
+        List the raw product documents of a query.
+
+        Args:
+            query (ProductQuery): The selection, sort order and position.
+            limit (int): The largest number of documents to return.
+            projection (Projection): The fields to read, or None for every field.
+
+        Returns:
+            list[RawDocument]: The documents, in sort order.
+        """
+
+    @abstractmethod
+    async def search(
+        self, text: str, offset: int, limit: int, projection: Projection
+    ) -> list[RawDocument]:
+        """
+        Search products by text, most relevant first.
+
+        Args:
+            text (str): The words to search for.
+            offset (int): The number of matches to skip.
+            limit (int): The largest number of documents to return.
+            projection (Projection): The fields to read, or None for every field.
+
+        Returns:
+            list[RawDocument]: The matching documents, by relevance, then ID.
+        """
+
+    @abstractmethod
+    async def summarize(
+        self, category: Optional[str], boundaries: Sequence[float]
+    ) -> tuple[list[dict[str, Any]], dict[Any, int]]:
+        """
+        Count products and summarize their prices per category and price range.
+
+        Args:
+            category (Optional[str]): Only summarize products in this category.
+            boundaries (Sequence[float]): The ascending bounds of the price ranges.
+
+        Returns:
+            tuple[list[dict[str, Any]], dict[Any, int]]: The count and the lowest, mean
+                and highest price of each category, sorted by name, and the number
+                of products in each price range, by its lower bound, or under
+                'other' for prices outside every range.
+        """
+
+    @abstractmethod
+    def stream(self, batch_size: int) -> AsyncIterator[Product]:
+        """
+        Stream every product, ordered by ID.
+
+        Args:
+            batch_size (int): The number of products read at a time.
+
+        Returns:
+            AsyncIterator[Product]: The products.
+        """
+
+    @abstractmethod
+    def stream_documents(self, batch_size: int) -> AsyncIterator[RawDocument]:
+        """
+        Stream every raw product document, ordered by ID.
+
+        Args:
+            batch_size (int): The number of documents read at a time.
+
+        Returns:
+            AsyncIterator[RawDocument]: The documents.
+        """
+
+    @abstractmethod
+    async def insert(self, product: ProductModel) -> Product:
+        """
+        Store a new product.
+
+        Args:
+            product (ProductModel): The validated product.
+
+        Returns:
+            Product: The stored product, with its new ID.
+        """
+
+    @abstractmethod
+    async def insert_many(
+        self, products: Sequence[ProductModel]
+    ) -> list[tuple[Optional[PydanticObjectId], Optional[str]]]:
+        """
+        Store many new products, carrying on past products that fail.
+
+        Args:
+            products (Sequence[ProductModel]): The validated products.
+
+        Returns:
+            list[tuple[Optional[PydanticObjectId], Optional[str]]]: For each product,
+                in order, its new ID or the reason it was not stored.
+        """
+
+    @abstractmethod
+    async def update(
+        self, product_id: PydanticObjectId, changes: dict[str, Any]
+    ) -> Optional[Product]:
+        """
+        Set some fields of a product.
+
+        Args:
+            product_id (PydanticObjectId): The ID of the product.
+            changes (dict[str, Any]): The fields to set and their new values.
+
+        Returns:
+            Optional[Product]: The product after the update, or None if it does not
+                exist.
+        """
+
+    @abstractmethod
+    async def update_many(
+        self, updates: Sequence[tuple[PydanticObjectId, dict[str, Any]]]
+    ) -> tuple[int, int]:
+        """
+        Set some fields of many products.
+
+        A product given without fields is not written, but is counted as found if it
+        exists.
+
+        Args:
+            updates (Sequence[tuple[PydanticObjectId, dict[str, Any]]]): The ID of
+                each product and the fields to set on it.
+
+        Returns:
+            tuple[int, int]: The number of products found and actually changed.
+        """
+
+    @abstractmethod
+    async def delete(self, product_id: PydanticObjectId) -> bool:
+        """
+        Delete a product.
+
+        Args:
+            product_id (PydanticObjectId): The ID of the product.
+
+        Returns:
+            bool: Whether the product existed.
+        """
+
+    @abstractmethod
+    async def delete_many(self, product_ids: Sequence[PydanticObjectId]) -> int:
+        """
+        Delete many products.
+
+        Args:
+            product_ids (Sequence[PydanticObjectId]): The IDs of the products.
+
+        Returns:
+            int: The number of products deleted.
+        """
+
+
+# Repository of each backend, created on first use.
+_repositories: dict[str, ProductRepository] = {}
+
+
+def get_repository() -> ProductRepository:
+    """
+    Return the repository of the configured storage backend.
+
+    Returns:
+        ProductRepository: The process-wide repository of the backend.
+    """
+    backend = SETTINGS.storage_backend
+    repository = _repositories.get(backend)
+    if repository is None:
+        # Import the backends on first use, as each depends on this module.
+        if backend == "memory":
+            from app.memory_repository import MemoryProductRepository
+
+            repository = MemoryProductRepository()
+        else:
+            from app.mongo_repository import MongoProductRepository
+
+            repository = MongoProductRepository()
+        _repositories[backend] = repository
+    return repository
@@ -0,0 +1,128 @@
+"""
+Module for fast JSON responses.
+
+By default FastAPI validates the value a route returns against the route's response
+model, rebuilding every product as a response schema, and then encodes the result
+with its generic JSON encoder. Products read from the database are already valid,
+so this module serializes them directly with pydantic-core, keeping only the fields
+of the response model. Routes still declare their response model, so the OpenAPI
+schema does not change, and the bytes sent are the same as the default path.
+"""
+
+from functools import cache
+from typing import Any, Optional, TypeGuard, TypeVar, get_args, get_origin
+
+import pydantic_core
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.timing import timed
+
+T = TypeVar("T")
+
+# Retrieve application settings which include the response serialization mode.
+SETTINGS = get_settings()
+
+
+def _fallback(value: Any) -> Any:
+    """
+    Serialize values pydantic-core does not know about.
+
+    Args:
+        value (Any): The value to serialize.
+
+    Raises:
+        TypeError: If the value cannot be serialized.
+
+    Returns:
+        Any: A JSON serializable replacement for the value.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@cache
+def response_include(response_model: type[BaseModel]) -> dict[str, Any]:
+    """
+    Build the pydantic include filter that matches a response model.
+
+    Nested models and lists of models are filtered recursively, so fields that only
+    exist on the database documents, such as the revision ID, are left out.
+
+    Args:
+        response_model (type[BaseModel]): The response model of a route.
+
+    Returns:
+        dict[str, Any]: The include filter for pydantic_core.to_json.
+    """
+    include: dict[str, Any] = {}
+    for name, field in response_model.model_fields.items():
+        annotation = field.annotation
+        item = (get_args(annotation) or (None,))[0]
+        if get_origin(annotation) is list and _is_model(item):
+            include[name] = {"__all__": response_include(item)}
+        elif _is_model(annotation):
+            include[name] = response_include(annotation)
+        else:
+            include[name] = True
+    return include
+
+
+def _is_model(annotation: Any) -> TypeGuard[type[BaseModel]]:
+    # Only plain model classes are filtered, anything else is kept whole.
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    A JSON response rendered by pydantic-core.
+
+    Models, ObjectIds and plain values are serialized in one pass without building
+    intermediate dictionaries. An include filter restricts the serialized fields.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        include: Optional[dict[str, Any]] = None,
+    ) -> None:
+        # Fields to serialize, set before the parent class renders the content.
+        self.include = include
+        super().__init__(content, status_code=status_code)
+
+    def render(self, content: Any) -> bytes:
+        with timed("encode"):
+            return pydantic_core.to_json(
+                content, include=self.include, by_alias=False, fallback=_fallback
+            )
+
+
+def model_response(
+    response_model: type[BaseModel], content: T, status_code: int = 200
+) -> T | Response:
+    """
+    Return route content serialized directly as its response model.
+
+    FastAPI sends a returned response as is, so the content is not validated again.
+    When fast JSON responses are disabled the content is returned unchanged and
+    FastAPI validates and encodes it as usual.
+
+    Args:
+        response_model (type[BaseModel]): The response model declared by the route.
+        content (T): The documents or values to return.
+        status_code (int): The HTTP status code of the response.
+
+    Returns:
+        T | Response: The response, or the content itself when fast responses are
+            disabled.
+    """
+    if not SETTINGS.fast_json_responses:
+        return content
+
+    return FastJSONResponse(
+        content, status_code=status_code, include=response_include(response_model)
+    )
@@ -6,13 +6,16 @@ used in various API endpoints, such as creating, retrieving, and updating produc
 These schemas help with data validation and serialization between the client and server.
 """
 
-from typing import Optional
+from typing import Literal, Optional
 
 from beanie import PydanticObjectId
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 from app.models import Category, Product
 
+# Orders in which products can be listed; a leading '-' sorts in descending order.
+ProductSort = Literal["id", "-id", "price", "-price", "name", "-name"]
+
 
 class GetProductResponse(Product, BaseModel):
     """
@@ -29,11 +32,13 @@ class GetAllProductsResponse(BaseModel):
     """
     Schema for returning all products.
 
-    Contains a list of products represented by GetProductResponse.
+    Contains one page of products represented by GetProductResponse and the
+    cursor for the following page.
     This schema is used for the response of the GET Products endpoint.
     """
 
     products: list[GetProductResponse]  # List of product responses
+    next: Optional[str] = None  # Cursor for the next page, None on the last page
 
 
 class CreateProductRequest(Product, BaseModel):
@@ -58,6 +63,31 @@ class CreateProductResponse(GetProductResponse, BaseModel):
     pass
 
 
+class BulkCreateProductResult(BaseModel):
+    """
+    Schema for the outcome of one product in a bulk create request.
+
+    Exactly one of 'id' and 'error' is set.
+    This schema is used inside the response of the POST Products/bulk endpoint.
+    """
+
+    index: int  # Position of the product in the request payload
+    id: Optional[PydanticObjectId] = None  # Identifier of the created product
+    error: Optional[str] = None  # Reason the product was not created
+
+
+class BulkCreateProductsResponse(BaseModel):
+    """
+    Schema for returning the outcome of a bulk create request.
+
+    Contains the number of created products and one result per requested product.
+    This schema is used for the response of the POST Products/bulk endpoint.
+    """
+
+    inserted_count: int  # Number of products created
+    results: list[BulkCreateProductResult]  # Per-product results, in request order
+
+
 class UpdateProductRequest(Product, BaseModel):
     """
     Schema for updating an existing product.
@@ -71,12 +101,53 @@ class UpdateProductRequest(Product, BaseModel):
     # We are overriding the fields from the Product model to make them optional
     # Due to the original fields being required, making them optional raises a mypy error
     # Hence, we use the 'type: ignore' comment to suppress the error
+    # The constraints of the Product fields are repeated, as the values sent are
+    # written to the database as they are.
 
-    name: Optional[str] = None  # type: ignore
-    description: Optional[str] = None  # type: ignore
-    price: Optional[float] = None  # type: ignore
+    name: Optional[str] = Field(  # type: ignore
+        default=None,
+        title="Name",
+        description="Name of the product",
+        max_length=20,
+        min_length=2,
+        pattern=r"^[\w-]+$",
+    )
+    description: Optional[str] = Field(  # type: ignore
+        default=None,
+        title="Description",
+        description="Description of the product",
+        max_length=100,
+    )
+    price: Optional[float] = Field(  # type: ignore
+        default=None,
+        title="Price",
+        description="Price of the product",
+        gt=0,
+        lt=100000,
+        allow_inf_nan=False,
+    )
     category: Optional[Category] = None  # type: ignore
 
+    @field_validator("price", mode="after")
+    @classmethod
+    def price_ends_with_99(  # type: ignore[override]
+        cls, v: Optional[float]
+    ) -> Optional[float]:
+        """
+        Validator to ensure a new price ends with '0.99'.
+
+        Args:
+            v (Optional[float]): The price value to validate, or None when not changed.
+
+        Raises:
+            ValueError: If the price does not end with 0.99.
+
+        Returns:
+            Optional[float]: The validated price, or None.
+        """
+        # A null price is ignored like a missing one, so there is nothing to check.
+        return v if v is None else Product.price_ends_with_99(v)
+
 
 class UpdateProductResponse(GetProductResponse, BaseModel):
     """
@@ -87,3 +158,147 @@ class UpdateProductResponse(GetProductResponse, BaseModel):
     """
 
     pass
+
+
+class BulkUpdateProductRequest(UpdateProductRequest, BaseModel):
+    """
+    Schema for one partial update in a bulk update request.
+
+    Inherits the optional fields of UpdateProductRequest and adds the 'id' of the
+    product to update. Only the fields present in the payload are written.
+    This schema is used for the request payload of the PATCH Products/bulk endpoint.
+    """
+
+    id: PydanticObjectId  # Identifier of the product to update
+
+
+class BulkUpdateProductsResponse(BaseModel):
+    """
+    Schema for returning the outcome of a bulk update request.
+
+    This schema is used for the response of the PATCH Products/bulk endpoint.
+    """
+
+    matched_count: int  # Number of requested products that exist
+    modified_count: int  # Number of products whose values changed
+
+
+class BulkDeleteProductsResponse(BaseModel):
+    """
+    Schema for returning the outcome of a bulk delete request.
+
+    This schema is used for the response of the DELETE Products/bulk endpoint.
+    """
+
+    deleted_count: int  # Number of products deleted
+
+
+class CategoryStats(BaseModel):
+    """
+    Schema for the statistics of one product category.
+
+    This schema is used inside the response of the GET Products/stats endpoint.
+    """
+
+    name: str  # Name of the category
+    count: int  # Number of products in the category
+    min_price: float  # Lowest price in the category
+    avg_price: float  # Mean price in the category
+    max_price: float  # Highest price in the category
+
+
+class PriceBucket(BaseModel):
+    """
+    Schema for one range of the price histogram.
+
+    The range includes 'min_price' and excludes 'max_price'. Prices outside every
+    configured range are counted in a final bucket without bounds.
+    This schema is used inside the response of the GET Products/stats endpoint.
+    """
+
+    min_price: Optional[float]  # Lower bound of the range (inclusive)
+    max_price: Optional[float]  # Upper bound of the range (exclusive)
+    count: int  # Number of products priced in the range
+
+
+class GetProductStatsResponse(BaseModel):
+    """
+    Schema for returning product statistics.
+
+    Contains the overall product count and prices, the same figures per category,
+    and a histogram of prices.
+    This schema is used for the response of the GET Products/stats endpoint.
+    """
+
+    count: int  # Number of products
+    min_price: Optional[float]  # Lowest price, None when there are no products
+    avg_price: Optional[float]  # Mean price, None when there are no products
+    max_price: Optional[float]  # Highest price, None when there are no products
+    categories: list[CategoryStats]  # Statistics per category, ordered by name
+    price_histogram: list[PriceBucket]  # Product counts per price range
+
+
+class HealthResponse(BaseModel):
+    """
+    Schema for reporting that the process is alive.
+
+    This schema is used for the response of the GET healthz endpoint.
+    """
+
+    status: str  # Always 'ok' while the process can answer
+
+
+class PoolStatsResponse(BaseModel):
+    """
+    Schema for the connection counts of the MongoDB client's pools.
+
+    This schema is used inside the response of the GET readyz endpoint.
+    """
+
+    max_size: int  # Largest number of connections per server (0 for no limit)
+    open: int  # Connections created and not yet closed
+    checked_out: int  # Connections currently in use by an operation
+    waiting: int  # Operations currently waiting for a connection
+
+
+class ReadinessResponse(BaseModel):
+    """
+    Schema for reporting whether the application can serve requests.
+
+    The status is 'ok' when MongoDB is initialized and answers a ping in time,
+    'starting' while it is being initialized, and 'unavailable' otherwise.
+    This schema is used for the responses of the GET readyz endpoint.
+    """
+
+    status: Literal["ok", "starting", "unavailable"]  # Overall readiness
+    ping_ms: Optional[float] = None  # Round trip time of the MongoDB ping
+    pool: PoolStatsResponse  # Connection counts of the MongoDB client
+    error: Optional[str] = None  # Reason MongoDB is unavailable
+
+
+class QueryShapeStats(BaseModel):
+    """
+    Schema for the aggregated statistics of one MongoDB query shape.
+
+    This schema is used inside the response of the GET debug/query-shapes endpoint.
+    """
+
+    shape: str  # Command, collection and query with every value redacted
+    command: str  # Name of the command, such as find or update
+    count: int  # Number of commands with this shape
+    errors: int  # Number of those commands that failed
+    total_ms: float  # Total time spent in those commands
+    mean_ms: float  # Mean time per command
+    max_ms: float  # Longest time of a single command
+    last_route: Optional[str]  # Route of the latest request that issued the shape
+
+
+class QueryShapesResponse(BaseModel):
+    """
+    Schema for returning the query shapes that took the most total time.
+
+    This schema is used for the response of the GET debug/query-shapes endpoint.
+    """
+
+    profiler_enabled: bool  # Whether shapes are currently being collected
+    shapes: list[QueryShapeStats]  # Query shapes, by total time, largest first
@@ -0,0 +1,70 @@
+"""
+Module for measuring application startup.
+
+Startup is split into phases, such as importing modules, loading settings and
+initializing MongoDB. Each phase is timed from the end of the previous one and the
+breakdown is logged at boot, so slow cold starts can be traced to their cause.
+"""
+
+import logging
+import time
+from typing import Callable
+
+from app import IMPORT_STARTED
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupTimer:
+    """
+    Record the duration of consecutive startup phases.
+
+    Time spent in a phase that is marked more than once is added up.
+    """
+
+    def __init__(
+        self, started: float, clock: Callable[[], float] = time.perf_counter
+    ) -> None:
+        # Source of the current time, replaceable in tests.
+        self.clock = clock
+        # End of the last recorded phase.
+        self._last = started
+        # Seconds spent in each phase, in the order the phases were first recorded.
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """
+        End a phase at the current time.
+
+        Args:
+            phase (str): The name of the phase that just ended.
+        """
+        now = self.clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def summary(self) -> str:
+        """
+        Describe the recorded phases.
+
+        Returns:
+            str: The duration of every phase and their total, in milliseconds.
+        """
+        parts = [
+            f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.phases.items()
+        ]
+        total = sum(self.phases.values())
+        return " ".join([*parts, f"total={total * 1000:.1f}ms"])
+
+    def report(self, stage: str) -> None:
+        """
+        Log the recorded phases.
+
+        Args:
+            stage (str): The startup stage that was reached.
+        """
+        logger.info(f"Startup timings ({stage}): {self.summary()}")
+
+
+# Timer of the current process, started when the application package is imported.
+startup_timer = StartupTimer(IMPORT_STARTED)
@@ -0,0 +1,218 @@
+"""
+Module for the Server-Timing response header.
+
+When enabled in the settings, every HTTP response carries a Server-Timing header
+that breaks down where the server spent its time on the request, so the split is
+visible in the browser's developer tools or with curl -i:
+
+- fetch: loading the product a route acts on, in product_dependency.
+- db: MongoDB commands, as measured by the driver.
+- action: the body of the action the route called, including its database time.
+- validate: validating and encoding the value a route returned against its response
+  model, which FastAPI does after the route returns.
+- encode: rendering fast JSON responses with pydantic-core.
+- total: from receiving the request to starting the response.
+
+Durations are collected in a context variable, so hooks anywhere in the request,
+including MongoDB listeners running on the driver's threads, add to the same request.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+# Retrieve application settings which include whether the header is sent.
+SETTINGS = get_settings()
+
+# Order of the metrics in the header; any other metric follows in recording order.
+METRIC_ORDER = ("fetch", "db", "action", "validate", "encode")
+
+
+class RequestTimings:
+    """
+    The durations spent in each part of one request, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        # MongoDB listeners add durations from the driver's threads.
+        self._lock = threading.Lock()
+
+    def add(self, metric: str, seconds: float) -> None:
+        """
+        Add time spent in a part of the request.
+
+        Args:
+            metric (str): The name of the part, such as db.
+            seconds (float): The time spent.
+        """
+        with self._lock:
+            self.durations[metric] = self.durations.get(metric, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        """
+        Render the durations as a Server-Timing header value.
+
+        Args:
+            total (float): The time spent on the whole request so far, in seconds.
+
+        Returns:
+            str: The header value, with durations in milliseconds.
+        """
+        with self._lock:
+            durations = dict(self.durations)
+        names = [name for name in METRIC_ORDER if name in durations]
+        names += [name for name in durations if name not in METRIC_ORDER]
+        entries = [f"{name};dur={durations[name] * 1000:.3f}" for name in names]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
+
+
+# Timings of the HTTP request being handled, or None when the header is disabled.
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def add_timing(metric: str, seconds: float) -> None:
+    """
+    Add time spent in a part of the current request, if its timings are collected.
+
+    Args:
+        metric (str): The name of the part, such as db.
+        seconds (float): The time spent.
+    """
+    timings = request_timings.get()
+    if timings is not None:
+        timings.add(metric, seconds)
+
+
+class _Timer:
+    """
+    Measure the time spent in a block and add it to a request's timings.
+    """
+
+    __slots__ = ("timings", "metric", "started")
+
+    def __init__(self, timings: RequestTimings, metric: str):
+        self.timings = timings
+        self.metric = metric
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.timings.add(self.metric, time.perf_counter() - self.started)
+
+
+# Context manager used when timings are not collected, shared to avoid allocations.
+_NOT_TIMED = nullcontext()
+
+
+def timed(metric: str) -> AbstractContextManager[None]:
+    """
+    Measure the time spent in a block and add it to the current request.
+
+    Outside a request with collected timings, this returns a shared no-op context
+    manager, so the hooks cost almost nothing while the header is disabled.
+
+    Args:
+        metric (str): The name of the part, such as fetch.
+
+    Returns:
+        AbstractContextManager[None]: The context manager measuring the block.
+    """
+    timings = request_timings.get()
+    if timings is None:
+        return _NOT_TIMED
+    return _Timer(timings, metric)
+
+
+class TimedRoute(APIRoute):
+    """
+    A route that reports the time FastAPI spends on its response model.
+
+    FastAPI validates and encodes the value a route returns after the route function
+    has returned, out of reach of the route's own code. This route class records when
+    the route function returns and counts the rest of the handler as validation.
+    Routes that return a response themselves skip the validation, so their time is
+    close to zero.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        endpoint = self.dependant.call
+        finished: ContextVar[Optional[float]] = ContextVar(
+            "endpoint_finished", default=None
+        )
+
+        if asyncio.iscoroutinefunction(endpoint):
+
+            @wraps(endpoint)
+            async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    finished.set(time.perf_counter())
+
+            self.dependant.call = timed_endpoint
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            token = finished.set(None)
+            try:
+                response = await handler(request)
+                ended = finished.get()
+                if ended is not None:
+                    add_timing("validate", time.perf_counter() - ended)
+                return response
+            finally:
+                finished.reset(token)
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    """
+    Collect the timings of every HTTP request and send them in a Server-Timing header.
+
+    The header is added when the response starts, so streamed responses report the
+    time until their first chunk.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not SETTINGS.server_timing:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", timings.header(time.perf_counter() - started)
+                )
+            await send(message)
+
+        token = request_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
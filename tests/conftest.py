@@ -9,6 +9,7 @@ from asgi_lifespan import LifespanManager
 from httpx import ASGITransport, AsyncClient
 
 from app.app import app
+from app.memory_repository import MemoryProductRepository
 
 
 @pytest.fixture()
@@ -30,3 +31,29 @@ async def client_test():
             follow_redirects=True,
         ) as ac:
             yield ac
+
+
+@pytest.fixture()
+def memory_storage(monkeypatch: pytest.MonkeyPatch) -> MemoryProductRepository:
+    """
+    Store products in a new, empty in-memory repository for the duration of a test.
+
+    The storage backend is switched on the settings each module read at import,
+    rather than on the current settings, which other tests may have replaced.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Restores the settings after the test.
+
+    Returns:
+        MemoryProductRepository: The repository the application uses during the test.
+    """
+    import app.app
+    import app.dependencies
+    import app.health
+    import app.repository
+
+    for module in (app.app, app.dependencies, app.health, app.repository):
+        monkeypatch.setattr(module.SETTINGS, "storage_backend", "memory")
+    repository = MemoryProductRepository()
+    monkeypatch.setitem(app.repository._repositories, "memory", repository)
+    return repository
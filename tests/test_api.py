@@ -5,17 +5,41 @@ This module includes tests for creating, retrieving, updating, and deleting prod
 Each test function interacts with the API endpoints and asserts the expected responses.
 """
 
+import csv
+import io
+import json
+from pathlib import Path
+
 import pytest
 from faker import Faker
 from httpx import AsyncClient
 from pydantic import BaseModel
 from rich import print
 
+from app.memory_repository import MemoryProductRepository
+
 fake = Faker()
 
 pytestmark = pytest.mark.asyncio
 
 
+# Create a random name for testing
+@pytest.mark.skip()
+def random_name() -> str:
+    """
+    Create a random word that is a valid product or category name.
+
+    Names need at least two characters, which words such as 'a' do not have.
+
+    Returns:
+        str: A random word of two or more characters.
+    """
+    name = fake.word()
+    while len(name) < 2:
+        name = fake.word()
+    return name
+
+
 # Test Category model using Pydantic
 @pytest.mark.skip()
 class TestCategory(BaseModel):
@@ -27,7 +51,7 @@ class TestCategory(BaseModel):
         description (str): A description of the category.
     """
 
-    name: str = fake.word()
+    name: str = random_name()
     description: str = fake.sentence()
 
 
@@ -46,7 +70,7 @@ class TestProduct(BaseModel):
     """
 
     id: str | None = None
-    name: str = fake.word()
+    name: str = random_name()
     price: float = float(fake.random_number(2)) + 0.99
     description: str = fake.sentence()
     category: TestCategory = TestCategory()
@@ -62,7 +86,7 @@ def create_random_product() -> TestProduct:
     Returns:
         TestProduct: A new product instance with random data.
     """
-    name: str = fake.word()
+    name: str = random_name()
     price: float = float(fake.random_number(2)) + 0.99
     description: str = fake.sentence()
     category: TestCategory = TestCategory()
@@ -74,6 +98,7 @@ def create_random_product() -> TestProduct:
 # Create a list of random products for testing
 products = [create_random_product() for i in range(5)]
 new_product = products[0]
+bulk_products = [create_random_product() for i in range(3)]
 
 
 async def test_create_product(
@@ -149,7 +174,7 @@ async def test_update_product(
     print("\n")
     print("Updating product: ", new_product.name)
     # Generate new data for the update
-    new_name = fake.word()
+    new_name = random_name()
     new_description = fake.sentence()
     new_price = fake.random_number(2) + 0.99
     # Send PATCH request to update the product
@@ -176,6 +201,241 @@ async def test_update_product(
     return new_product
 
 
+async def test_update_product_partial(
+    client_test: AsyncClient, new_product: TestProduct = new_product
+) -> TestProduct:
+    """
+    Test for updating a single field of a product to an empty value.
+
+    This test clears only the description with a PATCH request.
+    It asserts that the empty value is stored and the other fields are unchanged.
+
+    Returns:
+        TestProduct: The updated product.
+    """
+    print("\n")
+    print("Clearing description of product: ", new_product.name)
+    response = await client_test.patch(
+        f"/products/{new_product.id}", json={"description": ""}
+    )
+    assert response.status_code == 200
+    response = response.json()
+    assert response.get("description") == ""
+    assert response.get("name") == new_product.name
+    assert response.get("price") == new_product.price
+    new_product.description = ""
+    print("Product description has been cleared: ", new_product.name)
+    return new_product
+
+
+async def test_update_product_category_partial(
+    client_test: AsyncClient, new_product: TestProduct = new_product
+) -> TestProduct:
+    """
+    Test for updating a product's category with only some of its fields.
+
+    The category is replaced as a whole, so the fields left out take their
+    defaults rather than disappearing, and the CSV export still has every column.
+
+    Returns:
+        TestProduct: The updated product.
+    """
+    print("\n")
+    print("Renaming category of product: ", new_product.name)
+    category = {"name": new_product.category.name}
+    response = await client_test.patch(
+        f"/products/{new_product.id}", json={"category": category}
+    )
+    assert response.status_code == 200
+    assert response.json().get("category") == {**category, "description": ""}
+
+    response = await client_test.get("/products/export", headers={"Accept": "text/csv"})
+    assert response.status_code == 200
+
+    # Restore the shared category so later tests see the same one
+    response = await client_test.patch(
+        f"/products/{new_product.id}",
+        json={"category": new_product.category.model_dump()},
+    )
+    assert response.status_code == 200
+    print("Category has been renamed: ", new_product.name)
+    return new_product
+
+
+async def test_get_product_cached(
+    client_test: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    new_product: TestProduct = new_product,
+) -> None:
+    """
+    Test for retrieving a product with the product cache enabled.
+
+    This test reads the product twice, updates it, and reads it again.
+    It asserts that the second read is a cache hit and that the update invalidates it.
+    """
+    from app.cache import product_cache
+    from app.dependencies import SETTINGS
+
+    print("\n")
+    print("Getting cached product: ", new_product.name)
+    monkeypatch.setattr(SETTINGS, "cache_enabled", True)
+    product_cache.clear()
+    hits = product_cache.hits
+
+    for _ in range(2):
+        response = await client_test.get(f"/products/{new_product.id}")
+        assert response.status_code == 200
+        assert response.json().get("name") == new_product.name
+    assert product_cache.hits == hits + 1
+
+    new_name = random_name()
+    response = await client_test.patch(
+        f"/products/{new_product.id}", json={"name": new_name}
+    )
+    assert response.status_code == 200
+    new_product.name = new_name
+
+    response = await client_test.get(f"/products/{new_product.id}")
+    assert response.json().get("name") == new_name
+    product_cache.clear()
+    print("Cached product has been invalidated: ", new_product.name)
+
+
+async def test_get_product_not_modified(
+    client_test: AsyncClient, new_product: TestProduct = new_product
+) -> None:
+    """
+    Test for revalidating a product with its ETag.
+
+    This test repeats a GET request with If-None-Match set to the returned ETag and
+    expects 304 with no body, then changes the product and expects a new ETag.
+    """
+    print("\n")
+    print("Revalidating product: ", new_product.name)
+    response = await client_test.get(f"/products/{new_product.id}")
+    assert response.status_code == 200
+    etag = response.headers.get("etag")
+    assert etag is not None
+
+    response = await client_test.get(
+        f"/products/{new_product.id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers.get("etag") == etag
+
+    new_name = random_name()
+    response = await client_test.patch(
+        f"/products/{new_product.id}", json={"name": new_name}
+    )
+    assert response.status_code == 200
+    new_product.name = new_name
+
+    response = await client_test.get(
+        f"/products/{new_product.id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers.get("etag") != etag
+    print("Product has been revalidated: ", new_product.name)
+
+
+async def test_get_product_not_modified_before_serialization(
+    client_test: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    new_product: TestProduct = new_product,
+) -> None:
+    """
+    Test that a product revalidation is answered before the product is serialized.
+
+    This test fetches the ETags of the full and the projected product, then breaks
+    serialization and expects the revalidations to return 304 all the same.
+    """
+    import app.api
+    from app.responses import SETTINGS
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("the product was serialized")
+
+    print("\n")
+    print("Revalidating product before serialization: ", new_product.name)
+    urls = [
+        f"/products/{new_product.id}",
+        f"/products/{new_product.id}?fields=id,name",
+    ]
+    etags = []
+    for url in urls:
+        response = await client_test.get(url)
+        assert response.status_code == 200
+        etags.append(response.headers["etag"])
+    assert etags[0] != etags[1]
+
+    # The route sets the same tag whether or not fast JSON responses are enabled.
+    monkeypatch.setattr(SETTINGS, "fast_json_responses", False)
+    response = await client_test.get(urls[0])
+    assert response.headers["etag"] == etags[0]
+
+    monkeypatch.setattr(app.api, "model_response", fail)
+    monkeypatch.setattr(app.api, "shape_product", fail)
+    for url, etag in zip(urls, etags):
+        response = await client_test.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    print("Product has been revalidated before serialization: ", new_product.name)
+
+
+async def test_fast_json_responses(
+    client_test: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    new_product: TestProduct = new_product,
+) -> None:
+    """
+    Test that fast JSON responses match the validated responses byte for byte.
+
+    This test requests the same product, product list and update with fast JSON
+    responses enabled and disabled and compares the response bodies.
+    """
+    from app.responses import SETTINGS
+
+    print("\n")
+    print("Comparing fast and validated responses: ", new_product.name)
+    requests = [
+        ("GET", f"/products/{new_product.id}", None),
+        ("GET", "/products/", None),
+        ("PATCH", f"/products/{new_product.id}", {"name": new_product.name}),
+    ]
+    for method, url, body in requests:
+        bodies = []
+        for fast in (True, False):
+            monkeypatch.setattr(SETTINGS, "fast_json_responses", fast)
+            response = await client_test.request(method, url, json=body)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            bodies.append(response.content)
+        assert bodies[0] == bodies[1]
+
+    # The documented response schemas are unchanged
+    response = await client_test.get("/openapi.json")
+    schema = response.json()["paths"]["/products/"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/GetAllProductsResponse"
+    }
+    print("Fast and validated responses are identical")
+
+
+async def test_get_products_not_modified(client_test: AsyncClient) -> None:
+    """
+    Test for revalidating the product list with its ETag.
+
+    Expects 304 when the list has not changed since it was fetched.
+    """
+    response = await client_test.get("/products/")
+    assert response.status_code == 200
+    etag = response.headers.get("etag")
+
+    response = await client_test.get("/products/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
 async def test_create_product_invalid_price_low(
     client_test: AsyncClient,
 ) -> None:
@@ -274,6 +534,32 @@ async def test_update_product_invalid_price_not_ending_in_99(
     assert response.status_code == 422
 
 
+async def test_update_product_invalid_single_field(
+    client_test: AsyncClient, new_product: TestProduct = new_product
+) -> None:
+    """
+    Test for updating one field of a product with an invalid value.
+
+    Each update sends a single invalid field, so the other fields cannot be the
+    reason for the rejection. Expects a 422 status code and an unchanged product.
+    """
+    for invalid_update in [
+        {"name": ""},  # Invalid: name too short
+        {"name": "a name with spaces longer than twenty"},  # Invalid: pattern, length
+        {"price": -1.01},  # Invalid: negative price
+        {"description": "x" * 101},  # Invalid: description too long
+    ]:
+        response = await client_test.patch(
+            f"/products/{new_product.id}", json=invalid_update
+        )
+        assert response.status_code == 422, invalid_update
+
+    response = await client_test.get(f"/products/{new_product.id}")
+    assert response.status_code == 200
+    assert response.json().get("name") == new_product.name
+    assert response.json().get("price") == new_product.price
+
+
 async def test_delete_product(
     client_test: AsyncClient, new_product: TestProduct = new_product
 ) -> TestProduct:
@@ -371,6 +657,154 @@ async def test_create_multiple_products(
     return created_products
 
 
+async def test_bulk_create_products(
+    client_test: AsyncClient, bulk_products: list[TestProduct] = bulk_products
+) -> None:
+    """
+    Test for creating several products in one request.
+
+    This test sends a single POST request with a list of products.
+    It asserts that every product gets an ID and can then be retrieved.
+    """
+    print("\n")
+    print("Bulk creating products")
+    response = await client_test.post(
+        "/products/bulk", json=[p.model_dump(exclude={"id"}) for p in bulk_products]
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body.get("inserted_count") == len(bulk_products)
+    for index, (product, result) in enumerate(zip(bulk_products, body.get("results"))):
+        assert result.get("index") == index
+        assert result.get("error") is None
+        response = await client_test.get(f"/products/{result.get('id')}")
+        assert response.status_code == 200
+        assert response.json().get("name") == product.name
+        product.id = result.get("id")
+    print("Products have been bulk created")
+
+
+async def test_bulk_create_products_invalid_item(client_test: AsyncClient) -> None:
+    """
+    Test for bulk creating products when one of them is invalid.
+
+    Expects a 422 status code that points at the invalid item.
+    """
+    invalid_product = create_random_product().model_dump(exclude={"id"})
+    invalid_product["price"] = 999.00  # Invalid: price does not end with 0.99
+    response = await client_test.post(
+        "/products/bulk",
+        json=[create_random_product().model_dump(exclude={"id"}), invalid_product],
+    )
+    assert response.status_code == 422
+    assert 1 in [error["loc"][1] for error in response.json()["detail"]]
+
+
+async def test_bulk_update_products(
+    client_test: AsyncClient, bulk_products: list[TestProduct] = bulk_products
+) -> None:
+    """
+    Test for updating several products in one request.
+
+    This test changes the price of every bulk created product with one PATCH request
+    and asserts that only the price changed.
+    """
+    print("\n")
+    print("Bulk updating products")
+    new_prices = [fake.random_number(2) + 0.99 for _ in bulk_products]
+    response = await client_test.patch(
+        "/products/bulk",
+        json=[
+            {"id": product.id, "price": price}
+            for product, price in zip(bulk_products, new_prices)
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json().get("matched_count") == len(bulk_products)
+    for product, price in zip(bulk_products, new_prices):
+        response = await client_test.get(f"/products/{product.id}")
+        assert response.json().get("price") == price
+        assert response.json().get("name") == product.name
+        product.price = price
+    print("Products have been bulk updated")
+
+
+async def test_bulk_update_products_partial_items(
+    client_test: AsyncClient, bulk_products: list[TestProduct] = bulk_products
+) -> None:
+    """
+    Test for a bulk update with a partial category and an item without fields.
+
+    The category is written whole, with the defaults of the fields left out, and
+    the product without fields is counted as matched but not modified.
+    """
+    product = bulk_products[0]
+    category = {"name": product.category.name}
+    response = await client_test.patch(
+        "/products/bulk",
+        json=[{"id": product.id, "category": category}, {"id": bulk_products[1].id}],
+    )
+    assert response.status_code == 200
+    assert response.json().get("matched_count") == 2
+    assert response.json().get("modified_count") == 1
+
+    response = await client_test.get(f"/products/{product.id}")
+    assert response.json().get("category") == {**category, "description": ""}
+
+    # Restore the shared category so later tests see the same one
+    response = await client_test.patch(
+        "/products/bulk",
+        json=[{"id": product.id, "category": product.category.model_dump()}],
+    )
+    assert response.status_code == 200
+
+
+async def test_bulk_update_products_invalid_item(
+    client_test: AsyncClient, bulk_products: list[TestProduct] = bulk_products
+) -> None:
+    """
+    Test for a bulk update with one invalid item.
+
+    The whole request is rejected with a 422 status code before any product is
+    written, so the valid items are not applied either.
+    """
+    response = await client_test.patch(
+        "/products/bulk",
+        json=[
+            {"id": bulk_products[0].id, "price": 1.99},
+            {"id": bulk_products[1].id, "price": -1.01},  # Invalid: negative price
+            {"id": bulk_products[2].id, "name": "not a valid name"},  # Invalid: spaces
+        ],
+    )
+    assert response.status_code == 422
+    response = await client_test.get(f"/products/{bulk_products[0].id}")
+    assert response.json().get("price") == bulk_products[0].price
+
+
+async def test_bulk_delete_products(
+    client_test: AsyncClient, bulk_products: list[TestProduct] = bulk_products
+) -> None:
+    """
+    Test for deleting several products in one request.
+
+    This test deletes every bulk created product plus one non-existent ID
+    and asserts that only the existing products were counted.
+    """
+    print("\n")
+    print("Bulk deleting products")
+    response = await client_test.request(
+        "DELETE",
+        "/products/bulk",
+        json=[product.id for product in bulk_products] + ["123456789012345678901234"],
+    )
+    assert response.status_code == 200
+    assert response.json().get("deleted_count") == len(bulk_products)
+    for product in bulk_products:
+        response = await client_test.get(f"/products/{product.id}")
+        assert response.status_code == 404
+    print("Products have been bulk deleted")
+
+
 async def test_get_all_products(
     client_test: AsyncClient, test_products: list[TestProduct] = products
 ) -> None:
@@ -390,6 +824,612 @@ async def test_get_all_products(
     print("All products have been retrieved")
 
 
+async def test_get_all_products_paginated(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for paging through all products.
+
+    This test follows the 'next' cursor with a small page size until the last page.
+    It validates that every product is returned exactly once.
+    """
+    print("\n")
+    print("Paging through all products")
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params: dict[str, str | int] = {"limit": 2}
+        if cursor:
+            params["next"] = cursor
+        response = await client_test.get("/products/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page.get("products")) <= 2
+        seen.extend(p.get("id") for p in page.get("products"))
+        cursor = page.get("next")
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen))
+    for p in test_products:
+        assert p.id in seen
+    print("All pages have been retrieved")
+
+
+async def test_get_all_products_invalid_cursor(client_test: AsyncClient) -> None:
+    """
+    Test for retrieving products with a malformed cursor.
+
+    Expects a 400 status code since the cursor cannot be decoded.
+    """
+    response = await client_test.get("/products/", params={"next": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_get_all_products_filtered_sorted(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for paging through products filtered by category and sorted by price.
+
+    This test follows the 'next' cursor with a small page size and validates
+    that the prices are in descending order and every product is returned once.
+    """
+    print("\n")
+    print("Paging through products by descending price")
+    params: dict[str, str | int | float] = {
+        "category": test_products[0].category.name,
+        "min_price": 0,
+        "sort": "-price",
+        "limit": 2,
+    }
+    seen: list[tuple[float, str]] = []
+    while True:
+        response = await client_test.get("/products/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend((p.get("price"), p.get("id")) for p in page.get("products"))
+        if page.get("next") is None:
+            break
+        params["next"] = page.get("next")
+
+    prices = [price for price, _ in seen]
+    assert prices == sorted(prices, reverse=True)
+    assert len({product_id for _, product_id in seen}) == len(seen)
+    for p in test_products:
+        assert (p.price, p.id) in seen
+
+    # A cursor cannot be reused with another sort order
+    params["sort"] = "price"
+    response = await client_test.get("/products/", params=params)
+    assert response.status_code == 400
+
+    # Products above the maximum price are filtered out
+    cheapest = min(prices)
+    response = await client_test.get("/products/", params={"max_price": cheapest})
+    assert response.status_code == 200
+    assert all(p.get("price") <= cheapest for p in response.json().get("products"))
+    print("Products have been paged by descending price")
+
+
+async def test_get_all_products_descending_id(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for paging through products in descending ID order.
+
+    This test follows the 'next' cursor one product at a time, with whole and
+    sparse products, and validates that the IDs are in descending order and every
+    product is returned once.
+    """
+    print("\n")
+    print("Paging through products by descending ID")
+    for fields in (None, "id,name"):
+        params: dict[str, str | int] = {"sort": "-id", "limit": 1}
+        if fields:
+            params["fields"] = fields
+        seen: list[str] = []
+        while True:
+            response = await client_test.get("/products/", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            seen.extend(p.get("id") for p in page.get("products"))
+            if page.get("next") is None:
+                break
+            params["next"] = page.get("next")
+
+        assert seen == sorted(seen, reverse=True)
+        assert len(set(seen)) == len(seen)
+        for p in test_products:
+            assert p.id in seen
+    print("Products have been paged by descending ID")
+
+
+async def test_get_all_products_sparse_fields(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for retrieving products with a sparse fieldset.
+
+    This test requests only the id, name and price of every product
+    and validates that no other fields are returned.
+    """
+    print("\n")
+    print("Getting sparse products")
+    response = await client_test.get("/products/", params={"fields": "id,name,price"})
+    assert response.status_code == 200
+    sparse = {p["id"]: p for p in response.json().get("products")}
+    for p in test_products:
+        assert sparse[p.id] == {"name": p.name, "price": p.price, "id": p.id}
+    print("Sparse products have been retrieved")
+
+
+async def test_get_product_sparse_fields(
+    client_test: AsyncClient, new_product: TestProduct = new_product
+) -> None:
+    """
+    Test for retrieving a single product with a sparse fieldset.
+
+    This test requests the product name and category name without the id.
+    """
+    response = await client_test.get(
+        f"/products/{new_product.id}", params={"fields": "name,category.name"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "name": new_product.name,
+        "category": {"name": new_product.category.name},
+    }
+
+
+async def test_get_products_invalid_fields(client_test: AsyncClient) -> None:
+    """
+    Test for retrieving products with an unknown field.
+
+    Expects a 400 status code since the field cannot be projected.
+    """
+    response = await client_test.get("/products/", params={"fields": "id,secret"})
+    assert response.status_code == 400
+
+
+async def test_search_products(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test for searching products by name.
+
+    This test creates a product with a unique name, searches for that name
+    and expects the product to be the most relevant match.
+    """
+    from app.timing import SETTINGS
+
+    print("\n")
+    target = create_random_product()
+    target.name = f"Searchable{fake.random_number(8, fix_len=True)}"
+    print("Searching for product: ", target.name)
+    response = await client_test.post("/products/", json=target.model_dump())
+    assert response.status_code == 201
+    target.id = response.json().get("id")
+
+    # Projected results are encoded by pydantic-core, which Server-Timing reports.
+    monkeypatch.setattr(SETTINGS, "server_timing", True)
+    response = await client_test.get(
+        "/products/search", params={"q": target.name, "fields": "id,name"}
+    )
+    assert response.status_code == 200
+    results = response.json().get("products")
+    assert results[0] == {"name": target.name, "id": target.id}
+    metrics = [
+        entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")
+    ]
+    assert "encode" in metrics
+
+    # Remove the product so later tests see only the shared test products
+    response = await client_test.delete(f"/products/{target.id}")
+    assert response.status_code == 204
+    print("Product has been found: ", target.name)
+
+
+async def test_export_products_ndjson(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for exporting all products as NDJSON.
+
+    This test streams the export with a small batch size and validates that
+    every product is returned as one JSON object per line.
+    """
+    print("\n")
+    print("Exporting products as NDJSON")
+    response = await client_test.get(
+        "/products/export",
+        params={"batch_size": 2},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [TestProduct(**json.loads(line)) for line in response.text.splitlines()]
+    for p in test_products:
+        assert p in exported
+    print("Products have been exported")
+
+
+async def test_export_products_csv(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for exporting all products as CSV.
+
+    This test validates the header row and that every product has a row.
+    """
+    response = await client_test.get("/products/export", headers={"Accept": "text/csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    exported_ids = [row["id"] for row in rows]
+    for p in test_products:
+        assert p.id in exported_ids
+
+
+async def test_lean_reads(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that lean reads return the same data as hydrated reads.
+
+    This test lists and exports the products with lean reads enabled, with and
+    without validation, and compares the bodies with those of hydrated reads.
+    """
+    from app.actions import SETTINGS
+
+    print("\n")
+    print("Comparing lean and hydrated reads")
+    requests = [
+        ("/products/", {"sort": "-price", "limit": 3}, {}),
+        ("/products/export", {}, {"Accept": "application/x-ndjson"}),
+        ("/products/export", {}, {"Accept": "text/csv"}),
+    ]
+    for url, params, headers in requests:
+        bodies = []
+        for lean, validate in ((False, False), (True, False), (True, True)):
+            monkeypatch.setattr(SETTINGS, "lean_reads", lean)
+            monkeypatch.setattr(SETTINGS, "lean_reads_validate", validate)
+            response = await client_test.get(url, params=params, headers=headers)
+            assert response.status_code == 200
+            bodies.append(response.content)
+        assert bodies[0] == bodies[1] == bodies[2]
+    print("Lean and hydrated reads are identical")
+
+
+async def test_export_products_not_acceptable(client_test: AsyncClient) -> None:
+    """
+    Test for exporting products in an unsupported format.
+
+    Expects a 406 status code since only NDJSON and CSV are produced.
+    """
+    response = await client_test.get(
+        "/products/export", headers={"Accept": "application/xml"}
+    )
+    assert response.status_code == 406
+
+
+async def test_get_product_stats(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for retrieving product statistics.
+
+    This test validates the counts and prices of a category against the created
+    products, and that creating a product invalidates the cached statistics.
+    """
+    print("\n")
+    print("Retrieving product statistics")
+    category = test_products[0].category.name
+    in_category = [p for p in test_products if p.category.name == category]
+
+    response = await client_test.get("/products/stats", params={"category": category})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats.get("count") == len(in_category)
+    assert stats.get("min_price") == min(p.price for p in in_category)
+    assert stats.get("max_price") == max(p.price for p in in_category)
+    assert [c.get("name") for c in stats.get("categories")] == [category]
+    assert sum(b.get("count") for b in stats.get("price_histogram")) == len(in_category)
+
+    # A new product in the category is counted right away
+    new_product = create_random_product()
+    new_product.category = in_category[0].category
+    response = await client_test.post("/products/", json=new_product.model_dump())
+    assert response.status_code == 201
+    new_product.id = response.json().get("id")
+
+    response = await client_test.get("/products/stats", params={"category": category})
+    assert response.status_code == 200
+    assert response.json().get("count") == len(in_category) + 1
+
+    response = await client_test.delete(f"/products/{new_product.id}")
+    assert response.status_code == 204
+
+    # Overall statistics cover every category
+    response = await client_test.get("/products/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats.get("count") == sum(c.get("count") for c in stats.get("categories"))
+    print("Product statistics have been retrieved")
+
+
+async def test_health(client_test: AsyncClient) -> None:
+    """
+    Test for the liveness and readiness endpoints.
+
+    This test checks that the process reports itself alive and ready, with the
+    MongoDB ping latency and pool counts, and not ready once MongoDB is closed.
+    """
+    from app.health import SETTINGS
+    from app.mongo import close_mongo
+
+    print("\n")
+    print("Testing health endpoints")
+    response = await client_test.get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+    response = await client_test.get("/readyz")
+    assert response.status_code == 200
+    readiness = response.json()
+    assert readiness.get("status") == "ok"
+    assert set(readiness.get("pool")) == {"max_size", "open", "checked_out", "waiting"}
+
+    if SETTINGS.storage_backend == "memory":
+        # Without a database there is nothing to ping or wait for
+        assert readiness.get("ping_ms") is None
+        await close_mongo()
+        response = await client_test.get("/readyz")
+        assert response.status_code == 200
+    else:
+        assert readiness.get("ping_ms") >= 0
+        await close_mongo()
+        response = await client_test.get("/readyz")
+        assert response.status_code == 503
+        assert response.json().get("status") == "starting"
+    print("Health endpoints have answered")
+
+
+async def test_metrics(
+    client_test: AsyncClient, test_products: list[TestProduct] = products
+) -> None:
+    """
+    Test for the Prometheus metrics endpoint.
+
+    This test requests a product and checks that the request is counted under its
+    route template rather than its path.
+    """
+    print("\n")
+    print("Testing metrics endpoint")
+    response = await client_test.get(f"/products/{test_products[0].id}")
+    assert response.status_code == 200
+
+    response = await client_test.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_requests_total{method="GET",route="/products/{product_id}",status="200"}'
+        in response.text
+    )
+    assert test_products[0].id not in response.text
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "http_response_size_bytes_count" in response.text
+    assert 'cache_lookups_total{cache="product",result="hit"}' in response.text
+    print("Metrics have been exposed")
+
+
+async def test_debug_query_shapes(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test for the query shapes debug endpoint.
+
+    Expects a 404 status code while debug endpoints are disabled, and the
+    profiler state once they are enabled.
+    """
+    from app.debug import SETTINGS
+
+    response = await client_test.get("/debug/query-shapes")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(SETTINGS, "debug_endpoints", True)
+    response = await client_test.get("/debug/query-shapes", params={"limit": 5})
+    assert response.status_code == 200
+    assert response.json().get("profiler_enabled") is False
+    assert isinstance(response.json().get("shapes"), list)
+
+    response = await client_test.delete("/debug/query-shapes")
+    assert response.status_code == 204
+
+
+async def test_server_timing(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test for the Server-Timing header.
+
+    Expects no header while it is disabled, and a breakdown of the fetch, action
+    and encoding time of a product request once it is enabled.
+    """
+    from app.timing import SETTINGS
+
+    print("\n")
+    print("Testing Server-Timing header")
+    response = await client_test.get("/products/", params={"limit": 1})
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    product_id = response.json()["products"][0]["id"]
+
+    monkeypatch.setattr(SETTINGS, "server_timing", True)
+    response = await client_test.get(f"/products/{product_id}")
+    assert response.status_code == 200
+    metrics = [
+        entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")
+    ]
+    assert "fetch" in metrics
+    assert "validate" in metrics
+    assert metrics[-1] == "total"
+
+    response = await client_test.get("/products/", params={"limit": 1})
+    metrics = [
+        entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")
+    ]
+    assert "action" in metrics
+    print("Server-Timing header: ", response.headers["server-timing"])
+
+
+async def test_request_profiler(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    Test for profiling a request on demand.
+
+    Expects a profile file only for requests that carry the profiler token, in
+    both formats, and no profile while the rate limit is in effect.
+    """
+    import pstats
+
+    from app.profiling import SETTINGS, rate_limiter
+
+    print("\n")
+    print("Testing request profiler")
+    monkeypatch.setattr(SETTINGS, "profiler_token", "secret")
+    monkeypatch.setattr(SETTINGS, "profiler_dir", str(tmp_path))
+    monkeypatch.setattr(rate_limiter, "interval", 0.0)
+
+    # A wrong token does not profile the request
+    response = await client_test.get("/products/", headers={"X-Profile": "wrong"})
+    assert response.status_code == 200
+    assert "x-profile-file" not in response.headers
+
+    response = await client_test.get("/products/", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    profile = tmp_path / response.headers["x-profile-file"]
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+    monkeypatch.setattr(SETTINGS, "profiler_format", "collapsed")
+    monkeypatch.setattr(SETTINGS, "profiler_sample_interval_ms", 0.1)
+    response = await client_test.get("/products/", headers={"X-Profile": "secret"})
+    assert response.headers["x-profile-file"].endswith(".collapsed")
+
+    # A second profile within the rate limit interval is refused
+    monkeypatch.setattr(rate_limiter, "interval", 3600.0)
+    response = await client_test.get("/products/", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "x-profile-file" not in response.headers
+    print("Request profiles have been written")
+
+
+async def test_load_test(client_test: AsyncClient) -> None:
+    """
+    Test for the load test harness.
+
+    This test runs a short load test in process and checks that every route of
+    the mix is reported with its latency percentiles and without errors.
+    """
+    from app.loadtest import DEFAULT_MIX, run_load_test
+
+    print("\n")
+    print("Running a short load test")
+    # The text search needs the text index of a real MongoDB server.
+    mix = {name: weight for name, weight in DEFAULT_MIX.items() if name != "search"}
+    report = await run_load_test(
+        client_test, mix=mix, concurrency=2, duration=0.2, products=10
+    )
+
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert len(report["routes"]) == len(mix)
+    for result in report["routes"].values():
+        assert set(result["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+    print("Load test report: ", report["total"])
+
+
+async def test_memory_storage(
+    client_test: AsyncClient,
+    memory_storage: MemoryProductRepository,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test for the in-memory storage backend.
+
+    This test switches the products to the in-memory store, checks that products
+    created there are read back through the API, and runs a short load test over
+    every route of the mix without errors.
+    """
+    from app.actions import SETTINGS
+    from app.loadtest import DEFAULT_MIX, run_load_test
+
+    print("\n")
+    print("Testing the in-memory storage backend")
+
+    product = create_random_product()
+    response = await client_test.post("/products/", json=product.model_dump())
+    assert response.status_code == 201
+    product_id = response.json()["id"]
+
+    response = await client_test.get(f"/products/{product_id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == product.name
+    assert len(memory_storage) == 1
+
+    response = await client_test.get("/products/", params={"limit": 10})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["products"]] == [product_id]
+
+    # Validated lean reads do not need the Beanie document to be initialized
+    monkeypatch.setattr(SETTINGS, "lean_reads", True)
+    monkeypatch.setattr(SETTINGS, "lean_reads_validate", True)
+    response = await client_test.get("/products/export")
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[0])["id"] == product_id
+    monkeypatch.setattr(SETTINGS, "lean_reads", False)
+
+    response = await client_test.get("/readyz")
+    assert response.json()["status"] == "ok"
+
+    report = await run_load_test(
+        client_test, mix=DEFAULT_MIX, concurrency=2, duration=0.2, products=10
+    )
+    assert report["total"]["errors"] == 0
+    assert len(report["routes"]) == len(DEFAULT_MIX)
+    print("In-memory load test report: ", report["total"])
+
+    response = await client_test.delete(f"/products/{product_id}")
+    assert response.status_code == 204
+    assert len(memory_storage) == 0
+
+
+async def test_fast_start(
+    client_test: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test for serving requests in fast start mode.
+
+    This test restarts the application with MongoDB initialized in the background
+    and checks that the first request waits at the readiness gate and succeeds.
+    """
+    from asgi_lifespan import LifespanManager
+
+    from app.app import SETTINGS, app
+    from app.mongo import close_mongo, mongo_ready
+
+    print("\n")
+    print("Testing fast start")
+    await close_mongo()
+    monkeypatch.setattr(SETTINGS, "fast_start", True)
+    async with LifespanManager(app):
+        response = await client_test.get("/products/", params={"limit": 1})
+        assert response.status_code == 200
+        # Products stored in memory never need MongoDB
+        assert mongo_ready() == (SETTINGS.storage_backend == "mongo")
+    print("Fast start has served a request")
+
+
 async def test_internal_server_error(
     client_test: AsyncClient, new_product: TestProduct = new_product
 ) -> None:
@@ -399,13 +1439,17 @@ async def test_internal_server_error(
     This test manually disconnects the database connection
     and sends a request that triggers an internal server error.
     """
-    print("\n")
-    print("Testing internal server error")
-
     from motor.motor_asyncio import AsyncIOMotorClient
 
     from app.config import get_settings
     from app.mongo import close_mongo, drop_database
+    from app.repository import SETTINGS
+
+    if SETTINGS.storage_backend == "memory":
+        pytest.skip("Corrupts and drops the MongoDB collection")
+
+    print("\n")
+    print("Testing internal server error")
 
     # Connect to the database
     client: AsyncIOMotorClient = AsyncIOMotorClient(get_settings().mongodb_url)
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from app.benchmarks import compare, run_benchmarks
+from app.cli import app as cli
+
+
+def test_compare() -> None:
+    baseline = {"a": {"min_us": 1.0}, "b": {"min_us": 2.0}, "gone": {"min_us": 1.0}}
+    results = {"a": {"min_us": 1.2}, "b": {"min_us": 2.6}, "new": {"min_us": 1.0}}
+
+    rows = compare(results, baseline, threshold=0.25)
+
+    # Only benchmarks in both are compared
+    assert [row["name"] for row in rows] == ["a", "b"]
+    assert rows[0]["regression"] is False
+    assert rows[1]["regression"] is True
+    assert rows[1]["ratio"] == 1.3
+
+
+def test_run_benchmarks() -> None:
+    results = run_benchmarks(repeat=1, select="price_ends_with_99")
+
+    assert list(results) == ["price_ends_with_99"]
+    assert 0 < results["price_ends_with_99"]["min_us"]
+
+
+def test_benchmark_compare_fails_on_regression(tmp_path: Path) -> None:
+    baseline = tmp_path / "baseline.json"
+    benchmarks = {"price_ends_with_99": {"min_us": 1e-6, "median_us": 1e-6, "ops": 1}}
+    baseline.write_text(json.dumps({"benchmarks": benchmarks}))
+
+    result = CliRunner().invoke(
+        cli,
+        ["benchmark", "-k", "price_ends_with_99", "--repeat", "1"]
+        + ["--compare", str(baseline)],
+    )
+
+    assert result.exit_code == 1
+    assert "REGRESSION" in result.output
@@ -0,0 +1,131 @@
+from typing import Any, Optional, Sequence
+
+import pytest
+
+from app.actions import get_product_stats
+from app.cache import TTLCache, stats_cache
+from app.memory_repository import MemoryProductRepository
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_hit_and_miss() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=10)
+
+    # A lookup before the key is stored is a miss
+    assert cache.get("a") == (False, None)
+
+    cache.set("a", 1)
+
+    # A lookup after the key is stored is a hit
+    assert cache.get("a") == (True, 1)
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_expires_entries() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    # The entry is served until its lifetime has passed
+    clock.now = 9.9
+    assert cache.get("a") == (True, 1)
+    clock.now = 10.0
+    assert cache.get("a") == (False, None)
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+
+def test_cache_negative_entries() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(
+        max_size=10, ttl=10, negative_ttl=1, clock=clock
+    )
+    cache.set("missing", None)
+
+    # A negative entry is a hit with no value, and uses the shorter lifetime
+    assert cache.get("missing") == (True, None)
+    clock.now = 1.0
+    assert cache.get("missing") == (False, None)
+
+    # Negative entries are not stored when their lifetime is zero
+    cache = TTLCache(max_size=10, ttl=10)
+    cache.set("missing", None)
+    assert len(cache) == 0
+
+
+def test_cache_invalidate() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=10)
+    cache.set("a", 1)
+    cache.invalidate("a")
+
+    # Invalidating removes the entry, and invalidating a missing key is harmless
+    assert cache.get("a") == (False, None)
+    cache.invalidate("a")
+
+
+def test_cache_skips_values_read_before_an_invalidation() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=10)
+
+    # A write invalidates the key while its old value is being read
+    generation = cache.generation
+    cache.invalidate("a")
+    cache.set("a", 1, generation)
+    assert cache.get("a") == (False, None)
+
+    # A value read without an invalidation in between is stored
+    generation = cache.generation
+    cache.set("a", 2, generation)
+    assert cache.get("a") == (True, 2)
+
+
+def test_cache_clear_keeps_counters() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    # Counters only go up, as they are exposed to Prometheus
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_stats_written_during_aggregation_are_not_cached(
+    memory_storage: MemoryProductRepository, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    summarize = memory_storage.summarize
+
+    async def summarize_during_write(
+        category: Optional[str], boundaries: Sequence[float]
+    ) -> tuple[list[dict[str, Any]], dict[Any, int]]:
+        # A write action invalidates the statistics while they are computed
+        result = await summarize(category, boundaries)
+        stats_cache.clear()
+        return result
+
+    monkeypatch.setattr(memory_storage, "summarize", summarize_during_write)
+    stats_cache.clear()
+
+    await get_product_stats()
+    assert stats_cache.get(None) == (False, None)
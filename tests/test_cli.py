@@ -0,0 +1,91 @@
+import os
+
+import pytest
+import uvicorn
+from typer.testing import CliRunner
+
+import app.config
+from app.cli import app as cli
+
+
+def test_start_server_options(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Keep the environment and settings of the test process untouched
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+    monkeypatch.setattr(app.config, "settings", app.config.settings)
+
+    # Capture the uvicorn configuration instead of starting a server
+    calls: list[dict] = []
+    monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: calls.append(kwargs))
+
+    result = CliRunner().invoke(
+        cli,
+        [
+            "start-server",
+            "--workers",
+            "4",
+            "--loop",
+            "asyncio",
+            "--http",
+            "h11",
+            "--backlog",
+            "128",
+            "--limit-concurrency",
+            "500",
+            "--timeout-keep-alive",
+            "10",
+            "--limit-max-requests",
+            "10000",
+            "--db-name",
+            "cli_db",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    # The options are passed to uvicorn
+    assert calls[0]["workers"] == 4
+    assert calls[0]["loop"] == "asyncio"
+    assert calls[0]["http"] == "h11"
+    assert calls[0]["backlog"] == 128
+    assert calls[0]["limit_concurrency"] == 500
+    assert calls[0]["timeout_keep_alive"] == 10
+    assert calls[0]["limit_max_requests"] == 10000
+
+    # Worker processes inherit the settings through the environment
+    assert os.environ["DB_NAME"] == "cli_db"
+    assert os.environ["WORKERS"] == "4"
+    assert app.config.Settings().limit_concurrency == 500
+
+
+def test_start_server_invalid_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+    monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: None)
+
+    # Unknown event loops are rejected before the server starts
+    result = CliRunner().invoke(cli, ["start-server", "--loop", "trio"])
+    assert result.exit_code == 2
+    assert "trio" in result.output
+
+
+def test_build_indexes(monkeypatch: pytest.MonkeyPatch) -> None:
+    import app.mongo
+
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+    monkeypatch.setattr(app.config, "settings", app.config.settings)
+
+    # Record the index build instead of connecting to MongoDB
+    calls: list[str] = []
+
+    async def build_indexes() -> None:
+        calls.append("build")
+
+    monkeypatch.setattr(app.mongo, "build_indexes", build_indexes)
+
+    result = CliRunner().invoke(cli, ["build-indexes", "--db-name", "cli_db"])
+    assert result.exit_code == 0, result.output
+    assert calls == ["build"]
+    assert "cli_db" in result.output
+
+
+def test_load_test_invalid_mix() -> None:
+    result = CliRunner().invoke(cli, ["load-test", "--mix", "get=1,fetch=2"])
+    assert result.exit_code == 2
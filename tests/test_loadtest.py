@@ -0,0 +1,55 @@
+import pytest
+
+from app.loadtest import RouteResult, parse_mix, percentile, run_in_process
+from app.memory_repository import MemoryProductRepository
+
+
+def test_parse_mix() -> None:
+    assert parse_mix("get=5, list=2.5,create") == {
+        "get": 5.0,
+        "list": 2.5,
+        "create": 1.0,
+    }
+
+    with pytest.raises(ValueError, match="Unknown operation"):
+        parse_mix("get=1,fetch=2")
+    with pytest.raises(ValueError, match="Invalid weight"):
+        parse_mix("get=0")
+    with pytest.raises(ValueError, match="Invalid weight"):
+        parse_mix("get=often")
+
+
+def test_percentile() -> None:
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_route_result_counts_failed_attempts() -> None:
+    result = RouteResult()
+    result.attempts = 4
+    result.latencies = [0.001, 0.003]
+    # One error response and two requests that never got a response
+    result.errors = 3
+
+    report = result.report(elapsed=2.0)
+    assert report["requests"] == 4
+    assert report["error_rate"] == 0.75
+    assert report["rps"] == 2.0
+    assert report["latency_ms"]["mean"] == 2.0
+
+
+async def test_run_in_process_memory(
+    memory_storage: MemoryProductRepository,
+) -> None:
+    # Products stored in memory need no database
+    report = await run_in_process(concurrency=2, duration=0.1, products=5)
+
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    # The products of the run are deleted once it ends
+    assert len(memory_storage) == 0
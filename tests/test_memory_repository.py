@@ -0,0 +1,144 @@
+from app.memory_repository import MemoryProductRepository, project
+from app.models import Category, Product
+from app.repository import ProductQuery
+
+PHONES = Category(name="Phones", description="Mobile phones")
+LAPTOPS = Category(name="Laptops", description="Portable computers")
+
+
+async def _repository() -> MemoryProductRepository:
+    repository = MemoryProductRepository()
+    await repository.insert_many(
+        [
+            Product(name="b-phone", price=199.99, category=PHONES),
+            Product(name="a-phone", price=99.99, category=PHONES),
+            Product(name="c-phone", price=99.99, category=PHONES),
+            Product(name="laptop", price=999.99, category=LAPTOPS),
+        ]
+    )
+    return repository
+
+
+async def _pages(
+    repository: MemoryProductRepository, query: ProductQuery, size: int
+) -> list[str]:
+    # Read every page, continuing after the last product of the previous one.
+    names = []
+    while True:
+        page = await repository.find_documents(query, size, None)
+        names += [document["name"] for document in page]
+        if len(page) < size:
+            return names
+        last = page[-1]
+        value = last["_id"] if query.sort == "id" else last[query.sort]
+        query.after = (value, last["_id"])
+
+
+async def test_find_pages() -> None:
+    repository = await _repository()
+
+    assert await _pages(repository, ProductQuery(sort="name"), 1) == [
+        "a-phone",
+        "b-phone",
+        "c-phone",
+        "laptop",
+    ]
+    assert await _pages(repository, ProductQuery(sort="name", descending=True), 3) == [
+        "laptop",
+        "c-phone",
+        "b-phone",
+        "a-phone",
+    ]
+    # Equal prices are ordered by ID, so no product is skipped or repeated.
+    by_price = await _pages(repository, ProductQuery(sort="price"), 1)
+    assert sorted(by_price[:2]) == ["a-phone", "c-phone"]
+    assert by_price[2:] == ["b-phone", "laptop"]
+    assert len(await _pages(repository, ProductQuery(), 2)) == 4
+
+
+async def test_find_filters() -> None:
+    repository = await _repository()
+
+    query = ProductQuery(sort="price", min_price=100, max_price=999.99)
+    assert await _pages(repository, query, 10) == ["b-phone", "laptop"]
+    query = ProductQuery(sort="name", category="Phones", max_price=99.99)
+    assert await _pages(repository, query, 10) == ["a-phone", "c-phone"]
+
+    products = await repository.find(ProductQuery(category="Laptops"), 10)
+    assert [product.name for product in products] == ["laptop"]
+    assert products[0].category.name == "Laptops"
+
+
+async def test_update_and_delete() -> None:
+    repository = await _repository()
+    documents = await repository.find_documents(ProductQuery(sort="name"), 10, None)
+    ids = [document["_id"] for document in documents]
+
+    product = await repository.update(ids[0], {"name": "z-phone"})
+    assert product is not None and product.name == "z-phone"
+    names = await _pages(repository, ProductQuery(sort="name"), 10)
+    assert names == ["b-phone", "c-phone", "laptop", "z-phone"]
+
+    # An unchanged product is matched but not modified.
+    assert await repository.update_many(
+        [(ids[0], {"name": "z-phone"}), (ids[1], {"price": 9.99}), (ids[2], {})]
+    ) == (3, 1)
+
+    assert await repository.delete(ids[0]) is True
+    assert await repository.delete(ids[0]) is False
+    assert await repository.update(ids[0], {"name": "gone"}) is None
+    assert await repository.delete_many(ids) == 3
+    assert len(repository) == 0
+    assert await repository.find(ProductQuery(sort="price"), 10) == []
+
+
+async def test_search() -> None:
+    repository = await _repository()
+
+    # A match in the name outweighs one in the category description.
+    documents = await repository.search("laptop computers", 0, 10, {"name": 1})
+    assert [document["name"] for document in documents] == ["laptop"]
+    assert set(documents[0]) == {"_id", "name"}
+    assert len(await repository.search("phone", 0, 10, None)) == 3
+    assert await repository.search("tablet", 0, 10, None) == []
+    assert len(await repository.search("mobile", 1, 10, None)) == 2
+
+
+async def test_summarize() -> None:
+    repository = await _repository()
+
+    categories, buckets = await repository.summarize(None, [0, 100, 500])
+    assert [group["name"] for group in categories] == ["Laptops", "Phones"]
+    assert categories[1]["count"] == 3
+    assert categories[1]["avg_price"] == (199.99 + 99.99 + 99.99) / 3
+    assert buckets == {0: 2, 100: 1, "other": 1}
+
+    categories, _ = await repository.summarize("Laptops", [0, 100])
+    assert len(categories) == 1 and categories[0]["max_price"] == 999.99
+
+
+async def test_stream_documents() -> None:
+    repository = await _repository()
+
+    streamed = [document async for document in repository.stream_documents(3)]
+    assert len(streamed) == 4
+    assert [document["_id"] for document in streamed] == sorted(
+        document["_id"] for document in streamed
+    )
+
+
+def test_project() -> None:
+    document = {
+        "_id": 1,
+        "name": "a-phone",
+        "category": {"name": "Phones", "description": "Mobile phones"},
+    }
+
+    assert project(document, {"name": 1, "category.name": 1}) == {
+        "_id": 1,
+        "name": "a-phone",
+        "category": {"name": "Phones"},
+    }
+    copied = project(document, None)
+    copied["category"]["name"] = "Changed"
+    assert document["category"]["name"] == "Phones"
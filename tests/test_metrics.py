@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from typing import Any
+
+from app.metrics import (
+    CallbackMetric,
+    Counter,
+    Histogram,
+    Registry,
+    mongodb_command_errors,
+)
+from app.monitoring import CommandMetrics
+
+
+def test_counter_render() -> None:
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("route",)))
+
+    requests.inc("/a")
+    requests.inc("/a")
+    requests.inc('/b"c')
+
+    # Every label combination is one sample, with quotes escaped
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a"} 2\n'
+        'requests_total{route="/b\\"c"} 1\n'
+    )
+
+
+def test_callback_metric_render() -> None:
+    counts = {"hits": 0}
+    lookups = CallbackMetric(
+        "lookups_total",
+        "Lookups.",
+        ("result",),
+        "counter",
+        lambda: {("hit",): counts["hits"], ("miss",): 2},
+    )
+
+    # Values are read when rendering, so later changes are included
+    counts["hits"] = 3
+    assert lookups.render() == (
+        "# HELP lookups_total Lookups.\n"
+        "# TYPE lookups_total counter\n"
+        'lookups_total{result="hit"} 3\n'
+        'lookups_total{result="miss"} 2\n'
+    )
+
+
+def test_histogram_render() -> None:
+    duration = Histogram("duration_seconds", "Durations.", buckets=(0.1, 1.0))
+
+    duration.observe(value=0.1)
+    duration.observe(value=0.5)
+    duration.observe(value=3.0)
+
+    # Buckets are cumulative and include values equal to their bound
+    assert duration.samples() == [
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="1"} 2',
+        'duration_seconds_bucket{le="+Inf"} 3',
+        "duration_seconds_sum 3.6",
+        "duration_seconds_count 3",
+    ]
+
+
+def test_command_metrics() -> None:
+    listener = CommandMetrics()
+    event: Any = SimpleNamespace(command_name="testFailure", duration_micros=1500)
+
+    # Failed commands are timed and counted as errors
+    listener.failed(event)
+    listener.failed(event)
+    assert mongodb_command_errors.value("testFailure") == 2
@@ -0,0 +1,116 @@
+import logging
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+
+from app.monitoring import PoolStats, QueryProfiler, query_shape
+
+
+def test_pool_stats() -> None:
+    stats = PoolStats()
+    event: Any = None
+
+    # A connection is opened and checked out by an operation
+    stats.connection_created(event)
+    stats.connection_check_out_started(event)
+    assert stats.snapshot() == {"open": 1, "checked_out": 0, "waiting": 1}
+    stats.connection_checked_out(event)
+    assert stats.snapshot() == {"open": 1, "checked_out": 1, "waiting": 0}
+
+    # A second operation gives up waiting for a connection
+    stats.connection_check_out_started(event)
+    stats.connection_check_out_failed(event)
+
+    # The connection is returned to the pool and closed
+    stats.connection_checked_in(event)
+    stats.connection_closed(event)
+    assert stats.snapshot() == {"open": 0, "checked_out": 0, "waiting": 0}
+
+
+def test_query_shape_redacts_values() -> None:
+    command = {
+        "find": "products",
+        "filter": {
+            "category.name": "Phones",
+            "$or": [{"price": {"$gt": 10.99}}, {"price": 10.99, "_id": {"$gt": 1}}],
+            "_id": {"$in": [1, 2, 3]},
+        },
+        "sort": {"price": 1, "_id": 1},
+        "limit": 101,
+    }
+
+    shape = query_shape("find", command)
+
+    # Values are gone, while fields, operators and the sort are kept
+    assert "Phones" not in shape and "10.99" not in shape
+    assert shape == (
+        'find products {"filter": {"category.name": "?", "$or": '
+        '[{"price": {"$gt": "?"}}, {"price": "?", "_id": {"$gt": "?"}}], '
+        '"_id": {"$in": ["?"]}}, "sort": {"price": 1, "_id": 1}}'
+    )
+
+    # Commands that differ only in their values share a shape
+    other = {**command, "filter": {**command["filter"], "category.name": "Tablets"}}
+    assert query_shape("find", other) == shape
+
+
+def test_query_profiler(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    import app.monitoring
+    from app.middleware import request_scope
+
+    monkeypatch.setattr(app.monitoring.SETTINGS, "slow_query_ms", 50.0)
+    monkeypatch.setattr(app.monitoring.SETTINGS, "query_profiler_enabled", True)
+    profiler = QueryProfiler(max_shapes=2)
+
+    def run(collection: str, duration_micros: int, request_id: int) -> None:
+        command = {"find": collection, "filter": {"name": "secret"}}
+        profiler.started(
+            cast(
+                Any,
+                SimpleNamespace(
+                    command=command, connection_id=1, request_id=request_id
+                ),
+            )
+        )
+        profiler.succeeded(
+            cast(
+                Any,
+                SimpleNamespace(
+                    command_name="find",
+                    connection_id=1,
+                    request_id=request_id,
+                    duration_micros=duration_micros,
+                    reply={"cursor": {"firstBatch": [{}, {}]}},
+                ),
+            )
+        )
+
+    # Commands issued while handling a request are attributed to its route
+    token = request_scope.set({"method": "GET", "path": "/products/"})
+    try:
+        with caplog.at_level(logging.WARNING, logger="uvicorn.error"):
+            run("products", 80_000, 1)
+            run("products", 10_000, 2)
+    finally:
+        request_scope.reset(token)
+
+    # Only the slow command is logged, without the filtered value
+    slow = [r.getMessage() for r in caplog.records if "Slow MongoDB" in r.getMessage()]
+    assert len(slow) == 1
+    assert "80.0ms" in slow[0] and "documents=2" in slow[0]
+    assert "route=GET unmatched" in slow[0]
+    assert "secret" not in slow[0]
+
+    # Both commands add up under one shape
+    [top] = profiler.top(10)
+    assert top["count"] == 2
+    assert top["total_ms"] == 90.0
+    assert top["max_ms"] == 80.0
+
+    # The shape with the least total time is evicted when the limit is reached
+    run("users", 1_000, 3)
+    run("orders", 5_000, 4)
+    assert [s["shape"].split()[1] for s in profiler.top(10)] == ["products", "orders"]
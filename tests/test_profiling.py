@@ -0,0 +1,49 @@
+import sys
+from datetime import datetime, timezone
+
+from app.profiling import ProfileRateLimiter, collapse_stack, profile_path
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter() -> None:
+    clock = FakeClock()
+    limiter = ProfileRateLimiter(interval=10.0, clock=clock)
+
+    assert limiter.acquire()
+    # Only one request is profiled at a time
+    assert not limiter.acquire()
+    limiter.release()
+
+    # And no more than one per interval
+    clock.now = 5.0
+    assert not limiter.acquire()
+    clock.now = 10.0
+    assert limiter.acquire()
+
+
+def test_collapse_stack() -> None:
+    def inner() -> str:
+        return collapse_stack(sys._getframe())
+
+    frames = inner().split(";")
+    # Stacks run from the outermost frame to the innermost one
+    assert frames[-1].startswith(
+        "test_collapse_stack.<locals>.inner (test_profiling.py:"
+    )
+    assert frames[-2].startswith("test_collapse_stack (test_profiling.py:")
+
+
+def test_profile_path() -> None:
+    started = datetime(2025, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+    scope = {"method": "GET", "path": "/products/abc"}
+
+    path = profile_path(scope, started, "collapsed")
+
+    assert path.endswith("20250102T030405000006-GET-products_abc.collapsed")
@@ -0,0 +1,60 @@
+from beanie import PydanticObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.documents import Product
+from app.models import Category
+from app.responses import FastJSONResponse, response_include
+from app.schemas import GetAllProductsResponse, GetProductResponse
+
+
+def make_product(name: str) -> Product:
+    # Build a document without a database connection
+    return Product.model_construct(
+        id=PydanticObjectId(),
+        revision_id=None,
+        name=name,
+        description="Café crème",
+        price=1299.99,
+        category=Category(name="Phones", description="Mobile phones"),
+    )
+
+
+def test_response_include() -> None:
+    include = response_include(GetAllProductsResponse)
+
+    # Lists of models are filtered per item, nested models recursively
+    assert include["next"] is True
+    assert set(include["products"]["__all__"]) == set(GetProductResponse.model_fields)
+    assert include["products"]["__all__"]["category"] == {
+        "name": True,
+        "description": True,
+    }
+
+
+def test_fast_json_response_matches_validated_response() -> None:
+    content = {"products": [make_product("a1"), make_product("b2")], "next": "abc"}
+
+    # Render the content the way FastAPI does for a route with a response model
+    validated = GetAllProductsResponse.model_validate(
+        {
+            "products": [p.model_dump() for p in content["products"]],
+            "next": content["next"],
+        }
+    )
+    expected = JSONResponse(jsonable_encoder(validated)).body
+
+    fast = FastJSONResponse(content, include=response_include(GetAllProductsResponse))
+
+    # The document only fields are dropped and the bytes are identical
+    assert b"revision_id" not in fast.body
+    assert fast.body == expected
+
+
+def test_fast_json_response_object_id() -> None:
+    product_id = PydanticObjectId()
+
+    # Raw ObjectIds are rendered as strings
+    assert (
+        FastJSONResponse({"id": product_id}).body == f'{{"id":"{product_id}"}}'.encode()
+    )
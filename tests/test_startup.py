@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+import app.mongo
+from app.startup import StartupTimer
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_startup_timer_phases() -> None:
+    clock = FakeClock()
+    timer = StartupTimer(started=0.0, clock=clock)
+
+    # Each phase runs from the end of the previous one
+    clock.now = 0.5
+    timer.mark("imports")
+    clock.now = 0.75
+    timer.mark("client")
+
+    # Time in a phase marked again is added up
+    clock.now = 1.0
+    timer.mark("imports")
+
+    assert timer.phases == {"imports": 0.75, "client": 0.25}
+    assert timer.summary() == "imports=750.0ms client=250.0ms total=1000.0ms"
+
+
+async def test_wait_mongo_ready_after_startup(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def initialized() -> None:
+        pass
+
+    task = asyncio.create_task(initialized())
+    await task
+    monkeypatch.setattr(app.mongo, "_init_task", task)
+
+    # Once the background initialization has succeeded, nothing is awaited
+    def fail(*args: object) -> None:
+        raise AssertionError("wait_for should not be called")
+
+    monkeypatch.setattr(asyncio, "wait_for", fail)
+    await app.mongo.wait_mongo_ready(1.0)
@@ -0,0 +1,33 @@
+import time
+
+from app.timing import RequestTimings, request_timings, timed
+
+
+def test_request_timings_header() -> None:
+    timings = RequestTimings()
+    timings.add("action", 0.002)
+    timings.add("custom", 0.001)
+    timings.add("fetch", 0.0005)
+    # Time added to a metric again is added up
+    timings.add("fetch", 0.0005)
+
+    # Known metrics come first in a fixed order, then the others, then the total
+    assert timings.header(0.005) == (
+        "fetch;dur=1.000, action;dur=2.000, custom;dur=1.000, total;dur=5.000"
+    )
+
+
+def test_timed_collects_only_within_requests() -> None:
+    # Without request timings the block runs unmeasured
+    with timed("action"):
+        pass
+
+    timings = RequestTimings()
+    token = request_timings.set(timings)
+    try:
+        with timed("action"):
+            time.sleep(0.001)
+    finally:
+        request_timings.reset(token)
+
+    assert timings.durations["action"] >= 0.001